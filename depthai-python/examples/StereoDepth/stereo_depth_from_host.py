@@ -8,7 +8,12 @@ import datetime
 import argparse
 from pathlib import Path
 import math
-import os, re
+import os, re, sys
+import csv
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 datasetDefault = str((Path(__file__).parent / Path("../models/dataset")).resolve().absolute())
 parser = argparse.ArgumentParser()
@@ -20,6 +25,11 @@ parser.add_argument("--download", action="store_true", help="Downloads the 2014
 parser.add_argument("--calibration", help="Path to calibration file", default=None)
 parser.add_argument("--rectify", action="store_true", help="Enable rectified streams")
 parser.add_argument("--swapLR", action="store_true", help="Swap left and right cameras.")
+parser.add_argument("--batch", action="store_true", help="Headless evaluation of all datasets in the --evaluate directory, writes a report and exits.")
+parser.add_argument("--report", default="stereo_evaluation.csv", help="Batch evaluation report path, JSON if it ends with .json, CSV otherwise.")
+parser.add_argument("--workers", type=int, default=4, help="Number of threads that preload datasets in batch mode.")
+parser.add_argument("--saveDisparity", action="store_true", help="Batch mode: save the OAK disparity of each dataset as oak_disparity.npz, to be used with --replay.")
+parser.add_argument("--replay", action="store_true", help="Batch mode: evaluate disparities saved with --saveDisparity instead of running the device.")
 args = parser.parse_args()
 
 if args.evaluate is not None and args.dataset is not None:
@@ -29,6 +39,11 @@ if args.evaluate is not None and args.dataset is not None:
 evaluation_mode = args.evaluate is not None
 args.dataset = args.dataset or datasetDefault
 
+if (args.batch or args.replay or args.saveDisparity) and args.evaluate is None:
+    raise ValueError("--batch, --replay and --saveDisparity require the --evaluate argument.")
+if args.replay or args.saveDisparity:
+    args.batch = True
+
 if args.download and args.evaluate is None:
     import sys
     raise ValueError("Cannot use --download without --evaluate argument.")
@@ -633,8 +648,9 @@ if args.dumpdisparitycostvalues:
     stereo.debugDispCostDump.link(xoutDebugCostDump.input)
 
 
-StereoConfigHandler(stereo.initialConfig.get())
-StereoConfigHandler.registerWindow("Stereo control panel")
+if not args.batch:
+    StereoConfigHandler(stereo.initialConfig.get())
+    StereoConfigHandler.registerWindow("Stereo control panel")
 
 # stereo.setPostProcessingHardwareResources(3, 3)
 if(args.calibration):
@@ -753,27 +769,37 @@ def read_pfm(file):
     shape = (height, width, 3) if color else (height, width)
     return np.flip(np.reshape(data, shape), axis=0), scale
 
+BAD_THRESHOLDS = np.array([0.5, 1., 2., 4.], dtype=np.float32)
+ERR_PERCENTILES = [50, 90, 95, 99]
+
+def percentiles(values, qs):
+    # Same as np.percentile (linear interpolation), with a partial sort of only the needed ranks
+    positions = [q / 100. * (len(values) - 1) for q in qs]
+    ranks = sorted({int(math.floor(p)) for p in positions} | {int(math.ceil(p)) for p in positions})
+    part = np.partition(values, ranks)
+    out = []
+    for p in positions:
+        lo, hi = part[int(math.floor(p))], part[int(math.ceil(p))]
+        out.append(float(lo + (hi - lo) * (p - math.floor(p))))
+    return out
+
 def calculate_err_measures(gt_img, oak_img):
     assert gt_img.shape == oak_img.shape
 
+    # Masks and errors are computed once, everything else works on the compact array of valid pixel errors
     gt_mask = gt_img != np.inf
-    oak_mask = oak_img != np.inf
-    mask = gt_mask & oak_mask
-
-    gt_img[~gt_mask] = 0.
-    oak_img[~mask] = 0.
-    err = np.abs(gt_img - oak_img)
+    mask = gt_mask & (oak_img != np.inf)
+    with np.errstate(invalid="ignore"):
+        errs = np.abs(gt_img - oak_img)[mask]
 
-    n = np.sum(gt_mask)
-    invalid = np.sum(gt_mask & ~oak_mask)
+    n = np.count_nonzero(gt_mask)
+    valid = len(errs)
+    invalid = n - valid
 
-    bad05 = np.sum(mask & (err > 0.5))
-    bad1 = np.sum(mask & (err > 1.))
-    bad2 = np.sum(mask & (err > 2.))
-    bad4 = np.sum(mask & (err > 4.))
-    sum_err = np.sum(err[mask])
-    sum_sq_err = np.sum(err[mask] ** 2)
-    errs = err[mask]
+    bad05, bad1, bad2, bad4 = (np.count_nonzero(errs > t) for t in BAD_THRESHOLDS)
+    errs64 = errs.astype(np.float64)
+    sum_err = errs64.sum()
+    sum_sq_err = np.dot(errs64, errs64)
 
     bad05_p = 100. * bad05 / n
     total_bad05_p = 100. * (bad05 + invalid) / n
@@ -784,12 +810,9 @@ def calculate_err_measures(gt_img, oak_img):
     bad4_p = 100. * bad4 / n
     total_bad4_p = 100. * (bad4 + invalid) / n
     invalid_p = 100. * invalid / n
-    avg_err = sum_err / (n - invalid)
-    mse = sum_sq_err / (n - invalid)
-    a50 = np.percentile(errs, 50)
-    a90 = np.percentile(errs, 90)
-    a95 = np.percentile(errs, 95)
-    a99 = np.percentile(errs, 99)
+    avg_err = sum_err / valid if valid else float("nan")
+    mse = sum_sq_err / valid if valid else float("nan")
+    a50, a90, a95, a99 = percentiles(errs, ERR_PERCENTILES) if valid else [float("nan")] * 4
 
     return {
         "bad0.5": bad05_p,
@@ -803,6 +826,7 @@ def calculate_err_measures(gt_img, oak_img):
         "invalid": invalid_p,
         "avg_err": avg_err,
         "mse": mse,
+        "rmse": math.sqrt(mse),
         "a50": a50,
         "a90": a90,
         "a95": a95,
@@ -858,9 +882,131 @@ def show_debug_disparity(gt_img, oak_img):
     cv2.imshow("GT", gt_img)
     cv2.imshow("OAK", oak_img)
 
+def create_img_frame(data, timestamp_ms, instance_num):
+    tstamp = datetime.timedelta(seconds = timestamp_ms // 1000,
+                                milliseconds = timestamp_ms % 1000)
+    img = dai.ImgFrame()
+    img.setData(data)
+    img.setTimestamp(tstamp)
+    img.setInstanceNum(instance_num)
+    img.setType(dai.ImgFrame.Type.RAW8)
+    img.setWidth(width)
+    img.setHeight(height)
+    return img
+
+def load_input_image(path):
+    data = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    data = cv2.resize(data, (width, height), interpolation = cv2.INTER_AREA)
+    return data.reshape(height*width)
+
+def get_subpixel_bits(config):
+    # Disparity is in 1/subpixel_bits pixel units
+    if not config.get().algorithmControl.enableSubpixel:
+        return 1
+    return 1 << config.get().algorithmControl.subpixelFractionalBits
+
+def disparity_to_gt_scale(disparity, gt_shape, subpixel_bits):
+    # OAK disparity -> float disparity at the GT resolution, invalid (0) pixels are inf like in the GT
+    width_scale = float(gt_shape[1]) / float(disparity.shape[1])
+    disparity = disparity.astype(np.float32) * (width_scale / subpixel_bits)
+    disparity = cv2.resize(disparity, (gt_shape[1], gt_shape[0]), interpolation = cv2.INTER_LINEAR)
+    disparity[disparity == 0.] = np.inf
+    return disparity
+
+def load_sample(path):
+    """Inputs (left, right) and GT disparity of a dataset, runs on the preload pool."""
+    images = [load_input_image(os.path.join(path, f"im{i}.png")) for i in range(2)]
+    gt_disparity = np.ascontiguousarray(read_pfm(os.path.join(path, "disp1.pfm"))[0])
+    return images, gt_disparity
+
+def load_replay_sample(path):
+    """GT disparity and the OAK disparity saved with --saveDisparity."""
+    gt_disparity = np.ascontiguousarray(read_pfm(os.path.join(path, "disp1.pfm"))[0])
+    saved = np.load(os.path.join(path, "oak_disparity.npz"))
+    return gt_disparity, saved["disparity"], int(saved["subpixel_bits"])
+
+def prefetch(fn, items, workers):
+    """Yields (item, fn(item)) in order, with at most `workers` items loaded ahead on a thread pool."""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for item in items:
+            pending.append((item, pool.submit(fn, item)))
+            if len(pending) > workers:
+                item, future = pending.popleft()
+                yield item, future.result()
+        while pending:
+            item, future = pending.popleft()
+            yield item, future.result()
+
+def evaluate_sample(name, gt_disparity, disparity, subpixel_bits, device_ms):
+    start = time.monotonic()
+    disparity = disparity_to_gt_scale(disparity, gt_disparity.shape, subpixel_bits)
+    result = {"name": name}
+    result.update(calculate_err_measures(gt_disparity, disparity))
+    result["device_ms"] = device_ms
+    result["eval_ms"] = (time.monotonic() - start) * 1000
+    print(f"{name:30s} bad2 {result['bad2']:6.2f}%  invalid {result['invalid']:6.2f}%  rmse {result['rmse']:7.3f}")
+    return result
+
+def write_report(results, path):
+    metrics = [k for k in results[0] if k != "name"]
+    mean = {"name": "mean"}
+    for k in metrics:
+        values = [r[k] for r in results if r[k] is not None]
+        mean[k] = float(np.nanmean(values)) if values else None
+    if path.endswith(".json"):
+        with open(path, "w") as f:
+            json.dump({"config": {"width": width, "height": height, "lrcheck": lrcheck,
+                                  "extended": extended, "subpixel": subpixel},
+                       "datasets": results, "mean": mean}, f, indent=2, default=float)
+    else:
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["name"] + metrics)
+            writer.writeheader()
+            writer.writerows(results + [mean])
+    print(f"Evaluated {len(results)} datasets, report saved to {path}")
+
+def run_batch(dataset):
+    """
+    Headless evaluation of all datasets. Inputs are loaded and decoded ahead on a thread pool, and error measures
+    are computed on another one while the device processes the next pair.
+    """
+    names = sorted(dataset.names)
+    paths = [os.path.join(dataset.path, name) for name in names]
+    with ThreadPoolExecutor(max_workers=args.workers) as eval_pool:
+        futures = []
+        if args.replay:
+            for path, (gt_disparity, disparity, subpixel_bits) in prefetch(load_replay_sample, paths, args.workers):
+                futures.append(eval_pool.submit(evaluate_sample, os.path.basename(path), gt_disparity, disparity, subpixel_bits, None))
+        else:
+            print("Connecting and starting the pipeline")
+            with dai.Device(pipeline) as device:
+                in_q_list = [device.getInputQueue(s) for s in ["in_left", "in_right"]]
+                inStreamsCameraID = [dai.CameraBoardSocket.CAM_B, dai.CameraBoardSocket.CAM_C]
+                disparityQueue = device.getOutputQueue("disparity", 8, blocking=False)
+                inCfg = device.getOutputQueue("stereo_cfg", 8, blocking=False)
+                timestamp_ms = 0
+                for path, (images, gt_disparity) in prefetch(load_sample, paths, args.workers):
+                    start = time.monotonic()
+                    for i, q in enumerate(in_q_list):
+                        q.send(create_img_frame(images[i], timestamp_ms, inStreamsCameraID[i]))
+                    timestamp_ms += 50
+                    disparity = disparityQueue.get().getFrame()
+                    subpixel_bits = get_subpixel_bits(inCfg.get())
+                    device_ms = (time.monotonic() - start) * 1000
+                    if args.saveDisparity:
+                        np.savez(os.path.join(path, "oak_disparity.npz"), disparity=disparity, subpixel_bits=subpixel_bits)
+                    futures.append(eval_pool.submit(evaluate_sample, os.path.basename(path), gt_disparity, disparity, subpixel_bits, device_ms))
+        results = [f.result() for f in futures]
+    write_report(results, args.report)
+
 if evaluation_mode:
     dataset = DatasetManager(args.evaluate)
 
+if args.batch:
+    run_batch(dataset)
+    sys.exit(0)
+
 print("Connecting and starting the pipeline")
 # Connect to device and start pipeline
 with dai.Device(pipeline) as device:
@@ -892,19 +1038,7 @@ with dai.Device(pipeline) as device:
             frame_interval_ms = 50
             for i, q in enumerate(in_q_list):
                 path = os.path.join(dataset.get(), f"im{i}.png") if evaluation_mode else args.dataset + "/" + str(index) + "/" + q.getName() + ".png"
-                data = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
-                data = cv2.resize(data, (width, height), interpolation = cv2.INTER_AREA)
-                data = data.reshape(height*width)
-                tstamp = datetime.timedelta(seconds = timestamp_ms // 1000,
-                                            milliseconds = timestamp_ms % 1000)
-                img = dai.ImgFrame()
-                img.setData(data)
-                img.setTimestamp(tstamp)
-                img.setInstanceNum(inStreamsCameraID[i])
-                img.setType(dai.ImgFrame.Type.RAW8)
-                img.setWidth(width)
-                img.setHeight(height)
-                q.send(img)
+                q.send(create_img_frame(load_input_image(path), timestamp_ms, inStreamsCameraID[i]))
                 # print("Sent frame: {:25s}".format(path), "timestamp_ms:", timestamp_ms)
             timestamp_ms += frame_interval_ms
             index = (index + 1) % dataset_size
@@ -962,16 +1096,7 @@ with dai.Device(pipeline) as device:
             cv2.imshow(q.getName(), frame)
 
         if disparity is not None and gt_disparity is not None:
-            subpixel_bits = 1 << currentConfig.get().algorithmControl.subpixelFractionalBits
-            subpixel_enabled = currentConfig.get().algorithmControl.enableSubpixel
-            width_scale = float(gt_disparity.shape[1]) / float(disparity.shape[1])
-
-            disparity = disparity.astype(np.float32)
-            if subpixel_enabled:
-                disparity = disparity / subpixel_bits
-            disparity = disparity * width_scale
-            disparity = cv2.resize(disparity, (gt_disparity.shape[1], gt_disparity.shape[0]), interpolation = cv2.INTER_LINEAR)
-            disparity[disparity == 0.] = np.inf
+            disparity = disparity_to_gt_scale(disparity, gt_disparity.shape, get_subpixel_bits(currentConfig))
 
             # show_debug_disparity(gt_disparity, disparity)
             err_vals = calculate_err_measures(gt_disparity, disparity)
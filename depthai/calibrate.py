@@ -8,10 +8,11 @@ from argparse import ArgumentParser
 from pathlib import Path
 import time
 from datetime import datetime, timedelta
-from collections import deque 
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from scipy.spatial.transform import Rotation
 import traceback
-import itertools
+import bisect
 import math
 
 import cv2
@@ -166,6 +167,8 @@ def parse_args():
                         help="Enable the display of polynoms.")
     parser.add_argument('-dbg', '--debugProcessingMode', default=False, action="store_true",
                         help="Enable processing of images without using the camera.")
+    parser.add_argument('-dtw', '--detectionWidth', type=int, default=640,
+                        help="Width of the downscaled image that ChArUco markers are detected on before refining them on the full resolution image. 0 to detect on full resolution. Default: %(default)s")
     options = parser.parse_args()
     # Set some extra defaults, `-brd` would override them
     if options.defaultBoard is not None:
@@ -258,86 +261,168 @@ class HostSync:
 
 
 class MessageSync:
+    """
+    Syncs messages of multiple cameras by device timestamp.
+
+    The synced set is anchored on a message of the first camera: for each anchor, the closest message of every other
+    camera is found with a bisect, and the error of the set is the sum of absolute timestamp differences to the
+    anchor. That's the same error the exhaustive search over all queue index combinations used, but the cost is
+    O(N * K log K) instead of O(K ** N) for N cameras with K buffered messages.
+    """
     def __init__(self, num_queues, min_diff_timestamp, max_num_messages=4, min_queue_depth=3):
         self.num_queues = num_queues
         self.min_diff_timestamp = min_diff_timestamp
         self.max_num_messages = max_num_messages
-        # self.queues = [deque() for _ in range(num_queues)]
         self.queues = dict()
+        self.timestamps = dict()  # Device timestamps (seconds) of the queued messages
         self.queue_depth = min_queue_depth
-        # self.earliest_ts = {}
+        self.traceLevel = 0
 
     def add_msg(self, name, msg):
         if name not in self.queues:
             self.queues[name] = deque(maxlen=self.max_num_messages)
+            self.timestamps[name] = deque(maxlen=self.max_num_messages)
         self.queues[name].append(msg)
-        # if msg.getTimestampDevice() < self.earliest_ts:
-        #     self.earliest_ts = {name: msg.getTimestampDevice()}
+        self.timestamps[name].append(msg.getTimestampDevice().total_seconds())
 
-        # print('Queues: ', end='')
-        # for name in self.queues.keys():
-        #     print('\t: ', name, end='')
-        #     print(self.queues[name], end=', ')
-        #     print()
-        # print()
+    @staticmethod
+    def _closest(sorted_ts, order, ts):
+        # Index (in the queue) of the message closest to ts, the older one on a tie
+        i = bisect.bisect_left(sorted_ts, ts)
+        if i == len(sorted_ts) or (i > 0 and ts - sorted_ts[i - 1] <= sorted_ts[i] - ts):
+            i -= 1
+        return order[i], abs(sorted_ts[i] - ts)
 
     def get_synced(self):
-
         # Atleast 3 messages should be buffered
         min_len = min([len(queue) for queue in self.queues.values()])
         if min_len == 0:
             print('Status:', 'exited due to min len == 0', self.queues)
             return None
+        # Return a best combination only after being atleast queue_depth messages deep for all queues
+        if min_len <= self.queue_depth:
+            return None
 
-        # initializing list of list 
-        queue_lengths = []
-        for name in self.queues.keys():
-            queue_lengths.append(range(0, len(self.queues[name])))
-        permutations = list(itertools.product(*queue_lengths))
-        # print ("All possible permutations are : " +  str(permutations))
-
-        # Return a best combination after being atleast 3 messages deep for all queues
-        min_ts_diff = None
-        for indicies in permutations:
-            tmp = {}
-            i = 0
-            for n in self.queues.keys():
-                tmp[n] = indicies[i]
-                i = i + 1
-            indicies = tmp
-
+        names = list(self.queues.keys())
+        anchor_ts = self.timestamps[names[0]]
+        others = []
+        for name in names[1:]:
+            timestamps = self.timestamps[name]
+            order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+            others.append((name, [timestamps[i] for i in order], order))
+
+        best = None
+        for anchor, ts in enumerate(anchor_ts):
+            indices = {names[0]: anchor}
             acc_diff = 0.0
-            min_ts = None
-            for name in indicies.keys():
-                msg = self.queues[name][indicies[name]]
-                if min_ts is None:
-                    min_ts = msg.getTimestampDevice().total_seconds()
-            for name in indicies.keys():
-                msg = self.queues[name][indicies[name]]
-                acc_diff = acc_diff + abs(min_ts - msg.getTimestampDevice().total_seconds())
-
-            # Mark minimum
-            if min_ts_diff is None or (acc_diff < min_ts_diff['ts'] and abs(acc_diff - min_ts_diff['ts']) > 0.03):
-                min_ts_diff = {'ts': acc_diff, 'indicies': indicies.copy()}
-                print('new minimum:', min_ts_diff, 'min required:', self.min_diff_timestamp)
-
-            if min_ts_diff['ts'] < self.min_diff_timestamp:
-                # Check if atleast 5 messages deep
-                min_queue_depth = None
-                for name in indicies.keys():
-                    if min_queue_depth is None or indicies[name] < min_queue_depth:
-                        min_queue_depth = indicies[name]
-                if min_queue_depth >= self.queue_depth:
-                    # Retrieve and pop the others
-                    synced = {}
-                    for name in indicies.keys():
-                        synced[name] = self.queues[name][min_ts_diff['indicies'][name]]
-                        # pop out the older messages
-                        for i in range(0, min_ts_diff['indicies'][name]+1):
-                            self.queues[name].popleft()
-                    if self.traceLevel == 1:
-                        print('Returning synced messages with error:', min_ts_diff['ts'], min_ts_diff['indicies'])
-                    return synced
+            for name, sorted_ts, order in others:
+                indices[name], diff = self._closest(sorted_ts, order, ts)
+                acc_diff += diff
+            # Oldest set wins on a tie
+            if best is None or acc_diff < best['ts']:
+                best = {'ts': acc_diff, 'indicies': indices}
+
+        if self.traceLevel == 1:
+            print('Minimum:', best, 'min required:', self.min_diff_timestamp)
+        if best['ts'] >= self.min_diff_timestamp:
+            return None
+
+        # Retrieve and pop the synced and the older messages
+        synced = {}
+        for name, index in best['indicies'].items():
+            synced[name] = self.queues[name][index]
+            for _ in range(index + 1):
+                self.queues[name].popleft()
+                self.timestamps[name].popleft()
+        if self.traceLevel == 1:
+            print('Returning synced messages with error:', best['ts'], best['indicies'])
+        return synced
+
+
+class CharucoDetector:
+    """
+    Detects the ChArUco board on the frames of all cameras in parallel (OpenCV releases the GIL, so a thread pool is
+    enough). Markers are detected on a downscaled image, and refined (corner subpixel, refineDetectedMarkers,
+    interpolateCornersCharuco) on the full resolution image only. Detections are cached by the frame sequence
+    number, so the preview and the capture of the same frame share one detection. Only the capture falls back to the
+    full resolution detection (min_markers of detect_all()), the preview keeps the downscaled one.
+    """
+    def __init__(self, aruco_dictionary, charuco_board, detection_width=640, workers=None, cache_size=8):
+        self.aruco_dictionary = aruco_dictionary
+        self.charuco_board = charuco_board
+        self.detection_width = detection_width
+        self.cache_size = cache_size
+        self.cache = {}  # Camera name -> OrderedDict(sequence number -> (detection, full resolution))
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+
+    def _scale(self, width):
+        return self.detection_width / width if 0 < self.detection_width < width else 1.0
+
+    def detect(self, frame, full_resolution=False):
+        """
+        Returns marker_corners, ids, charuco_corners, charuco_ids of the frame (full resolution coordinates).
+        """
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        scale = 1.0 if full_resolution else self._scale(frame.shape[1])
+
+        if scale < 1.0:
+            small = cv2.resize(frame, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            marker_corners, ids, rejectedImgPoints = cv2.aruco.detectMarkers(small, self.aruco_dictionary)
+            # Back to full resolution, and refine the marker corners there
+            rejectedImgPoints = [np.ascontiguousarray(c / scale, dtype=np.float32) for c in rejectedImgPoints]
+            if len(marker_corners) > 0:
+                corners = np.concatenate(marker_corners).reshape(-1, 1, 2) / scale
+                win = max(3, int(math.ceil(1 / scale)) + 1)
+                criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.01)
+                corners = cv2.cornerSubPix(frame, np.ascontiguousarray(corners, dtype=np.float32), (win, win), (-1, -1), criteria)
+                marker_corners = [np.ascontiguousarray(c) for c in corners.reshape(-1, 1, 4, 2)]
+        else:
+            marker_corners, ids, rejectedImgPoints = cv2.aruco.detectMarkers(frame, self.aruco_dictionary)
+
+        marker_corners, ids, refusd, recoverd = cv2.aruco.refineDetectedMarkers(frame, self.charuco_board,
+                                                                                marker_corners, ids,
+                                                                                rejectedCorners=rejectedImgPoints)
+        if len(marker_corners) <= 0:
+            return marker_corners, ids, None, None
+        ret, charuco_corners, charuco_ids = cv2.aruco.interpolateCornersCharuco(marker_corners, ids, frame, self.charuco_board, minMarkers = 1)
+        return marker_corners, ids, charuco_corners, charuco_ids
+
+    def _detect_entry(self, frame, entry, min_markers):
+        if entry is None:
+            entry = (self.detect(frame), self._scale(frame.shape[1]) == 1.0)
+        if not entry[1] and len(entry[0][0]) < min_markers:
+            # Too few markers (eg. small or far board), detect at full resolution
+            entry = (self.detect(frame, full_resolution=True), True)
+        return entry
+
+    def detect_all(self, msgs, min_markers=0):
+        """
+        Detections of the frames of all cameras ({name: dai.ImgFrame}), cached ones are reused, others are detected
+        in parallel. Frames with fewer than min_markers markers on the downscaled image are detected at full
+        resolution, and that detection is cached.
+        """
+        detections = {}
+        futures = {}
+        for name, msg in msgs.items():
+            cache = self.cache.setdefault(name, OrderedDict())
+            entry = cache.get(msg.getSequenceNum())
+            if entry is not None and (entry[1] or len(entry[0][0]) >= min_markers):
+                detections[name] = entry[0]
+            else:
+                futures[name] = self.pool.submit(self._detect_entry, msg.getCvFrame(), entry, min_markers)
+
+        for name, future in futures.items():
+            cache = self.cache[name]
+            entry = cache[msgs[name].getSequenceNum()] = future.result()
+            detections[name] = entry[0]
+            while len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        return detections
+
+    def close(self):
+        self.pool.shutdown()
+        self.cache.clear()
 
 
 class Main:
@@ -471,13 +556,21 @@ class Main:
             if cam["name"] not in self.args.disableCamera:
                 self.camera_queue[cam['name']] = self.device.getOutputQueue(cam['name'], 1, False)
 
-    def is_markers_found(self, frame):
-        marker_corners, _, _ = cv2.aruco.detectMarkers(
-            frame, self.aruco_dictionary)
-        print("Markers count ... {}".format(len(marker_corners)))
+    def markers_needed(self):
         num_all_markers = math.floor(self.args.squaresX * self.args.squaresY / 2)
-        print(f'Total markers needed -> {int(num_all_markers * self.args.minDetectedMarkersPercent)}')
-        return not (len(marker_corners) <  int(num_all_markers * self.args.minDetectedMarkersPercent))
+        return int(num_all_markers * self.args.minDetectedMarkersPercent)
+
+    def is_markers_found(self, frame, detection=None):
+        markers_needed = self.markers_needed()
+        # The capture detection already fell back to full resolution if the downscaled one had too few markers
+        if detection is not None:
+            marker_corners = detection[0]
+        else:
+            marker_corners, _, _ = cv2.aruco.detectMarkers(
+                frame, self.aruco_dictionary)
+        print("Markers count ... {}".format(len(marker_corners)))
+        print(f'Total markers needed -> {markers_needed}')
+        return not (len(marker_corners) <  markers_needed)
 
     def detect_markers_corners(self, frame):
         marker_corners, ids, rejectedImgPoints = cv2.aruco.detectMarkers(frame, self.aruco_dictionary)
@@ -489,14 +582,16 @@ class Main:
         ret, charuco_corners, charuco_ids = cv2.aruco.interpolateCornersCharuco(marker_corners, ids, frame, self.charuco_board, minMarkers = 1)
         return marker_corners, ids, charuco_corners, charuco_ids
 
-    def draw_markers(self, frame):
-        marker_corners, ids, charuco_corners, charuco_ids = self.detect_markers_corners(frame)
+    def draw_markers(self, frame, detection=None):
+        marker_corners, ids, charuco_corners, charuco_ids = detection or self.detect_markers_corners(frame)
         if charuco_ids is not None and len(charuco_ids) > 0:
             return cv2.aruco.drawDetectedCornersCharuco(frame, charuco_corners, charuco_ids, (0, 255, 0))
         return frame
 
-    def draw_corners(self, frame, displayframe, color):
-        marker_corners, ids, charuco_corners, charuco_ids = self.detect_markers_corners(frame)
+    def draw_corners(self, frame, displayframe, color, detection=None):
+        marker_corners, ids, charuco_corners, charuco_ids = detection or self.detect_markers_corners(frame)
+        if charuco_corners is None:
+            charuco_corners = []  # No board in the frame
         for corner in charuco_corners:
             corner_int = (int(corner[0][0]), int(corner[0][1]))
             cv2.circle(displayframe, corner_int, 8*displayframe.shape[1]//1900, color, -1)
@@ -580,8 +675,8 @@ class Main:
         return pipeline
 
 
-    def parse_frame(self, frame, stream_name):
-        if not self.is_markers_found(frame):
+    def parse_frame(self, frame, stream_name, detection=None):
+        if not self.is_markers_found(frame, detection):
             return False
 
         filename = calibUtils.image_filename(self.current_polygon, self.images_captured)
@@ -702,6 +797,16 @@ class Main:
         return True
     
     def capture_images_sync(self):
+        # Detection runs for all cameras in parallel, the preview and the capture share the cached detections
+        charucoDetector = CharucoDetector(self.aruco_dictionary, self.charuco_board,
+                                          detection_width=self.args.detectionWidth,
+                                          workers=len(self.camera_queue))
+        try:
+            self._capture_images_sync(charucoDetector)
+        finally:
+            charucoDetector.close()
+
+    def _capture_images_sync(self, charucoDetector):
         finished = False
         capturing = False
         start_timer = False
@@ -717,12 +822,14 @@ class Main:
         sync_trys = 0
         while not finished:
             currImageList = {}
+            currMsgs = {}
             for key in self.camera_queue.keys():
                 frameMsg = self.camera_queue[key].get()
 
                 #print(f'Timestamp of  {key} is {frameMsg.getTimestamp()}')
 
                 syncCollector.add_msg(key, frameMsg)
+                currMsgs[key] = frameMsg
                 color_frame = None
                 if frameMsg.getType() in [dai.RawImgFrame.Type.RAW8, dai.RawImgFrame.Type.GRAY8] :
                     color_frame = cv2.cvtColor(frameMsg.getCvFrame(), cv2.COLOR_GRAY2BGR)
@@ -731,6 +838,7 @@ class Main:
                 currImageList[key] = color_frame
                 # print(gray_frame.shape)
 
+            detections = charucoDetector.detect_all(currMsgs)
             resizeHeight = 0
             resizeWidth = 0
             for name, imgFrame in currImageList.items():
@@ -738,7 +846,7 @@ class Main:
                 
                 # print(f'original Shape of {name} is {imgFrame.shape}' )
                
-                currImageList[name] = cv2.resize(self.draw_markers(imgFrame),
+                currImageList[name] = cv2.resize(self.draw_markers(imgFrame, detections[name]),
                                                  (0, 0), 
                                                  fx=self.output_scale_factor, 
                                                  fy=self.output_scale_factor)
@@ -905,13 +1013,14 @@ class Main:
                     sync_trys += 1
                     continue
 
+                syncedDetections = charucoDetector.detect_all(syncedMsgs, min_markers=self.markers_needed())
                 for name, frameMsg in syncedMsgs.items():
                     print(f"Time stamp of {name} is {frameMsg.getTimestamp()}")
                     if self.coverageImages[name] is None:
                         coverageShape = frameMsg.getCvFrame().shape
                         self.coverageImages[name] = np.ones(coverageShape, np.uint8) * 255
 
-                    tried[name] = self.parse_frame(frameMsg.getCvFrame(), name)
+                    tried[name] = self.parse_frame(frameMsg.getCvFrame(), name, syncedDetections[name])
                     print(f'Status of {name} is {tried[name]}')
                     allPassed = allPassed and tried[name]
                 if allPassed:
@@ -922,7 +1031,8 @@ class Main:
                             frameMsg_frame = cv2.cvtColor(frameMsg.getCvFrame(), cv2.COLOR_GRAY2RGB)
                         if len(self.coverageImages[name].shape) != 3:
                             self.coverageImages[name] = cv2.cvtColor(self.coverageImages[name], cv2.COLOR_GRAY2RGB)
-                        self.coverageImages[name] = self.draw_corners(frameMsg_frame, self.coverageImages[name], color)
+                        self.coverageImages[name] = self.draw_corners(frameMsg_frame, self.coverageImages[name], color,
+                                                                      syncedDetections[name])
                     if not self.images_captured:
                         if 'stereo_config' in self.board_config['cameras']:
                             leftStereo =  self.board_config['cameras'][self.board_config['stereo_config']['left_cam']]['name']
@@ -957,7 +1067,6 @@ class Main:
 
 
 
-
     def calibrate(self):
         print("Starting image processing")
         stereo_calib = calibUtils.StereoCalibration(self.args.traceLevel, self.args.outputScaleFactor, self.args.disableCamera)
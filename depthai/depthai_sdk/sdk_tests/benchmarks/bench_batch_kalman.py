@@ -0,0 +1,64 @@
+"""
+Compares per-object KalmanFilter (one filter per tracked object, as XoutTracker used before) with BatchKalmanFilter
+(all objects filtered in one vectorized call) on synthetic tracks. A device isn't required.
+
+Both 2D bbox (x, y, w, h) and 3D spatial (x, y, z) models are measured, at 10, 100 and 500 tracks.
+"""
+import time
+
+import numpy as np
+
+from depthai_sdk.tracking import BatchKalmanFilter, KalmanFilter
+
+FRAMES = 100
+TRACKS = [10, 100, 500]
+MODELS = {
+    '2d_bbox': 4,
+    '3d_spatial': 3,
+}
+DT = 1 / 30
+
+
+def measurements(n_tracks: int, dim_z: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    start = rng.uniform(0, 1000, (n_tracks, dim_z))
+    velocity = rng.uniform(-100, 100, (n_tracks, dim_z))
+    t = np.arange(FRAMES)[:, None, None] * DT
+    return start + velocity * t + rng.normal(0, 1, (FRAMES, n_tracks, dim_z))  # (frames, tracks, dim_z)
+
+
+def per_object(meas: np.ndarray) -> np.ndarray:
+    filters = [KalmanFilter(10, 0.1, z[:, None], 0.0) for z in meas[0]]
+    for frame in range(1, FRAMES):
+        ts = frame * DT
+        for kf, z in zip(filters, meas[frame]):
+            kf.predict(ts - kf.time)
+            kf.update(z[:, None])
+            kf.time = ts
+    return np.array([kf.x[:meas.shape[2], 0] for kf in filters])
+
+
+def batched(meas: np.ndarray) -> np.ndarray:
+    ids = list(range(meas.shape[1]))
+    kf = BatchKalmanFilter(meas.shape[2], 10, 0.1)
+    states, _ = kf.step(ids, meas[0], 0.0)
+    for frame in range(1, FRAMES):
+        states, _ = kf.step(ids, meas[frame], frame * DT)
+    return states
+
+
+def bench(name, fn, meas):
+    start = time.perf_counter()
+    result = fn(meas)
+    ms = (time.perf_counter() - start) / FRAMES * 1000
+    print(f'{name:40s} {ms:8.3f} ms/frame')
+    return result
+
+
+if __name__ == '__main__':
+    for model, dim_z in MODELS.items():
+        for n_tracks in TRACKS:
+            meas = measurements(n_tracks, dim_z)
+            expected = bench(f'{model} {n_tracks:4d} tracks per-object', per_object, meas)
+            actual = bench(f'{model} {n_tracks:4d} tracks batched', batched, meas)
+            print(f'{"":40s} max abs diff {np.abs(expected - actual).max():.2e}')
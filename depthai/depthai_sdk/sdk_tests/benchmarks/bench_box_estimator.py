@@ -0,0 +1,78 @@
+"""
+Compares the previous per-sample Python RANSAC loop of BoxEstimator.fit_plane_vec_constraint with the vectorized
+fit, and BoxEstimator.process_points (NumPy voxel downsampling) with the open3d processing (use_open3d=True, only if
+open3d is installed). A device isn't required, the point cloud is a synthetic 640x400 view of a 400x300x200 mm box on
+the ground, 1.5 m below the camera.
+"""
+import random
+import time
+
+import numpy as np
+
+from depthai_sdk.classes.box_estimator import BoxEstimator, o3d
+
+ITERATIONS = 20
+WIDTH, HEIGHT = 640, 400
+FOCAL = 450.0
+GROUND, BOX_HEIGHT = 1500, 200
+
+
+def synthetic_points(rng) -> np.ndarray:
+    xs, ys = np.meshgrid((np.arange(WIDTH) - WIDTH / 2) / FOCAL, (np.arange(HEIGHT) - HEIGHT / 2) / FOCAL)
+    depth = np.full((HEIGHT, WIDTH), GROUND, dtype=np.float32)
+    top = GROUND - BOX_HEIGHT
+    box = (np.abs(xs * top) < 200) & (np.abs(ys * top) < 150)
+    depth[box] = top
+    depth += rng.normal(0, 2, depth.shape).astype(np.float32)
+    depth[rng.random(depth.shape) < 0.05] = 0  # Invalid pixels
+    grid = np.stack([xs, ys, np.ones_like(xs)], axis=-1).astype(np.float32)
+    return grid * depth[..., None]
+
+
+def loop_fit_plane(estimator: BoxEstimator, norm_vec, pts, thresh, n_iterations):
+    best_eq = []
+    best_inliers = []
+    for _ in range(n_iterations):
+        point = pts[random.sample(range(0, pts.shape[0]), 1)]
+        plane_eq = [*norm_vec, -np.sum(np.multiply(norm_vec, point))]
+        pt_id_inliers = estimator.get_plane_inliers(plane_eq, pts, thresh)
+        if len(pt_id_inliers) > len(best_inliers):
+            best_eq = plane_eq
+            best_inliers = pt_id_inliers
+    return best_eq, best_inliers
+
+
+def bench(name: str, fn) -> None:
+    fn()
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn()
+    ms = (time.perf_counter() - start) / ITERATIONS * 1000
+    print(f'{name:40s} {ms:8.2f} ms')
+
+
+def create_estimator(use_open3d: bool) -> BoxEstimator:
+    estimator = BoxEstimator(calib_json_path='', use_open3d=use_open3d)
+    estimator.ground_plane_eq = np.array([0, 0, 1, -GROUND], dtype=np.float64)
+    return estimator
+
+
+if __name__ == '__main__':
+    points = synthetic_points(np.random.default_rng(0))
+
+    estimator = create_estimator(use_open3d=False)
+    dimensions, _ = estimator.process_points(points)
+    print(f'Dimensions (length, width, height): {tuple(round(float(d)) for d in dimensions)} mm')
+
+    box = estimator.box_pcl
+    bench('previous RANSAC loop (30 iterations)', lambda: loop_fit_plane(estimator, [0, 0, 1], box, 3, 30))
+    bench('vectorized RANSAC (30 iterations)', lambda: estimator.fit_plane_vec_constraint([0, 0, 1], box, 3, 30))
+    bench('previous RANSAC loop (300 iterations)', lambda: loop_fit_plane(estimator, [0, 0, 1], box, 3, 300))
+    bench('vectorized RANSAC (300 iterations)', lambda: estimator.fit_plane_vec_constraint([0, 0, 1], box, 3, 300))
+
+    bench('process_points', lambda: estimator.process_points(points))
+    if o3d is not None:
+        o3d_estimator = create_estimator(use_open3d=True)
+        bench('process_points (use_open3d=True)', lambda: o3d_estimator.process_points(points))
+    else:
+        print('open3d is not installed, skipping process_points (use_open3d=True)')
@@ -0,0 +1,68 @@
+"""
+Compares DepthColorizer with per-frame percentile normalization + cv2.applyColorMap (the previous depth colorization
+of gui_test.py), and with the previous PreviewDecoder.depth depth -> disparity -> color conversion. A device isn't
+required, frames are synthetic 1280x800 uint16 depth maps.
+"""
+import time
+
+import cv2
+import numpy as np
+
+from depthai_sdk.visualize.depth_colorizer import DepthColorizer
+
+ITERATIONS = 100
+WIDTH, HEIGHT = 1280, 800
+
+
+def synthetic_depth(rng) -> np.ndarray:
+    ys, xs = np.mgrid[0:HEIGHT, 0:WIDTH]
+    depth = 500 + xs * 3 + ys * 2 + rng.normal(0, 30, (HEIGHT, WIDTH))
+    depth[rng.random(depth.shape) < 0.1] = 0  # Invalid pixels
+    return depth.clip(0, 65535).astype(np.uint16)
+
+
+def percentile_colorize(depth: np.ndarray) -> np.ndarray:
+    downscaled = depth[::2, ::2]
+    non_zero = downscaled[downscaled != 0]
+    min_depth, max_depth = np.percentile(non_zero, 1), np.percentile(non_zero, 99)
+    normalized = np.clip((depth - min_depth) / (max_depth - min_depth) * 255.0, 0, 255).astype(np.uint8)
+    colorized = cv2.applyColorMap(normalized, cv2.COLORMAP_JET)
+    colorized[depth == 0] = [0, 0, 0]
+    return colorized
+
+
+def disparity_colorize(depth: np.ndarray, disp_scale_factor: float, levels: float) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        disparity = (disp_scale_factor / depth * 255. / levels).astype(np.uint8)
+    return cv2.applyColorMap(disparity, cv2.COLORMAP_JET)
+
+
+def bench(name: str, fn, frames) -> None:
+    fn(frames[0])  # Warm-up
+    start = time.perf_counter()
+    for i in range(ITERATIONS):
+        fn(frames[i % len(frames)])
+    ms = (time.perf_counter() - start) / ITERATIONS * 1000
+    print(f'{name:40s} {ms:8.3f} ms/frame')
+
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(0)
+    frames = [synthetic_depth(rng) for _ in range(4)]
+
+    bench('percentiles + applyColorMap', percentile_colorize, frames)
+    bench('DepthColorizer (auto range)', DepthColorizer(), frames)
+    bench('DepthColorizer (auto range, no smoothing)', DepthColorizer(smoothing=0), frames)
+
+    disp_scale_factor, levels = 75 * 800, 95
+    bench('depth -> disparity + applyColorMap', lambda f: disparity_colorize(f, disp_scale_factor, levels), frames)
+
+    def depth_to_index(depth):
+        with np.errstate(divide='ignore'):
+            index = disp_scale_factor / depth * 255. / levels
+        index[0] = 0
+        return index
+
+    colorizer = DepthColorizer(invalid_color=None)
+    colorizer.set_lut(depth_to_index)
+    bench('DepthColorizer (depth -> disparity LUT)', colorizer, frames)
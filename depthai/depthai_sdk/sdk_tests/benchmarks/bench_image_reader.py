@@ -0,0 +1,73 @@
+"""
+Compares ImageReader startup and per-image read time with the previous reader (all images decoded and resized at
+construction), on a synthetic folder of 1000 1280x800 jpg images, with lazy decoding + prefetching and with the
+memory-mapped frame store. A device isn't required.
+"""
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from depthai_sdk.readers.image_reader import ImageReader
+
+IMAGES = 1000
+WIDTH, HEIGHT = 1280, 800
+
+
+def create_folder(path: Path) -> None:
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 255, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+    for i in range(IMAGES):
+        cv2.imwrite(str(path / f'{i:06d}.jpg'), np.roll(base, i, axis=1))
+
+
+def eager_load(path: Path) -> list:
+    frames = []
+    shape = None
+    for file_name in sorted(os.listdir(str(path))):
+        if not file_name.endswith('.jpg'):
+            continue
+        frame = cv2.imread(str(path / file_name), cv2.IMREAD_COLOR)
+        if shape is None:
+            shape = (frame.shape[1], frame.shape[0])
+        frames.append(cv2.resize(frame, shape))
+    return frames
+
+
+def bench_reads(name: str, reader: ImageReader, startup: float) -> None:
+    reader.set_cycle_fps(1e6)  # Next image on every read
+    start = time.perf_counter()
+    for _ in range(IMAGES):
+        reader.read()
+        time.sleep(0.005)  # Rest of the replay loop, prefetching runs meanwhile
+    ms = ((time.perf_counter() - start) / IMAGES - 0.005) * 1000
+    print(f'{name:32s} startup {startup:7.3f} s, read {ms:6.2f} ms/image')
+    reader.close()
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp)
+        create_folder(path)
+
+        start = time.perf_counter()
+        eager_load(path)
+        print(f'{"previous (decode all)":32s} startup {time.perf_counter() - start:7.3f} s')
+
+        start = time.perf_counter()
+        reader = ImageReader(path, prefetch=0)
+        bench_reads('lazy', reader, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        reader = ImageReader(path)
+        bench_reads('lazy + prefetch', reader, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        ImageReader.build_store(path)
+        print(f'{"build_store()":32s} {time.perf_counter() - start:7.3f} s')
+        start = time.perf_counter()
+        reader = ImageReader(path)
+        bench_reads('frame store', reader, time.perf_counter() - start)
@@ -0,0 +1,99 @@
+"""
+Measures decode time of the SDK model handlers (nn_models/*/handler.py) on NNData tensors. A device isn't required.
+
+Recorded tensors can be used with `--tensors DIR`, where DIR contains `<model_name>.npz` files with one array per
+output layer (see `record_tensors()`). Models without a recording are benchmarked on synthetic tensors.
+"""
+import argparse
+import time
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+from depthai_sdk.components.nn_helper import DecodeHandler, getSupportedModels, loadModule
+
+ITERATIONS = 200
+
+
+class RecordedNNData:
+    """
+    Replays output layers of a dai.NNData, only the getters used by the handlers are implemented.
+    """
+
+    def __init__(self, layers: Dict[str, np.ndarray]):
+        self.layers = layers
+
+    def getLayerFp16(self, name: str):
+        return self.layers[name].ravel().tolist()
+
+    def getFirstLayerInt32(self):
+        return next(iter(self.layers.values())).ravel().astype(np.int32).tolist()
+
+
+def record_tensors(nn_data, path: str) -> None:
+    """
+    Saves output layers of a dai.NNData (eg. from a NN packet callback), to be used with `--tensors`.
+    """
+    np.savez(path, **{t.name: np.array(nn_data.getLayerFp16(t.name)) for t in nn_data.getRaw().tensors})
+
+
+def _heatmaps(rng, channels: int, h: int, w: int, peaks: int) -> np.ndarray:
+    ys, xs = np.mgrid[0:h, 0:w]
+    maps = rng.uniform(0, 0.05, (channels, h, w))
+    for c in range(channels):
+        for y, x in rng.uniform((0, 0), (h, w), (peaks, 2)):
+            maps[c] += np.exp(-((ys - y) ** 2 + (xs - x) ** 2) / 2)
+    return maps
+
+
+def synthetic_tensors(model: str) -> Dict[str, np.ndarray]:
+    rng = np.random.default_rng(0)
+    if model == 'palm_detection_128x128':
+        scores = rng.normal(-5, 1, 896)
+        scores[rng.choice(896, 20, replace=False)] = 3  # ~20 anchors above the threshold
+        return {'regressors': rng.normal(0, 10, (896, 18)), 'classificators': scores}
+    if model == 'facemesh_192x192':
+        return {'conv2d_31': np.array([3.0]), 'conv2d_210': rng.uniform(0, 192, (468, 3))}
+    if model == 'human-pose-estimation-0001':
+        return {'Mconv7_stage2_L2': _heatmaps(rng, 19, 32, 57, peaks=3),  # 3 people
+                'Mconv7_stage2_L1': rng.uniform(-0.5, 0.5, (38, 32, 57))}
+    return {}
+
+
+def bench(model: str, path: Path, tensors_dir: Path = None):
+    handler = loadModule(path / 'handler.py')
+    decode = getattr(handler, 'decode', None)
+    if not callable(decode):
+        return
+
+    recorded = tensors_dir / f'{model}.npz' if tensors_dir else None
+    if recorded and recorded.exists():
+        layers, source = dict(np.load(str(recorded))), 'recorded'
+    else:
+        layers, source = synthetic_tensors(model), 'synthetic'
+    if not layers:
+        return
+    nn_data = RecordedNNData(layers)
+
+    start = time.perf_counter()
+    if isinstance(decode, DecodeHandler):
+        decode.prepare()
+    setup_ms = (time.perf_counter() - start) * 1000
+
+    decode(nn_data)  # Warm-up
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        decode(nn_data)
+    ms = (time.perf_counter() - start) / ITERATIONS * 1000
+    print(f'{model:40s} {source:10s} setup {setup_ms:8.3f} ms {ms:8.3f} ms/decode')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tensors', type=Path, default=None, help='Directory with recorded <model_name>.npz')
+    args = parser.parse_args()
+
+    for model, path in sorted(getSupportedModels(printModels=False).items()):
+        if (path / 'handler.py').exists() and not model.startswith('_'):
+            bench(model, path, args.tensors)
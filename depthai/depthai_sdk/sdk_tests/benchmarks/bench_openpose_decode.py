@@ -0,0 +1,242 @@
+"""
+Compares the loop-based OpenPose decoding (previously in the human-pose-estimation-0001 and _openpose2 handlers,
+kept below as the reference) with the vectorized OpenPoseDecoder, on recorded or synthetic tensors. A device isn't
+required.
+
+Recorded tensors can be used with `--tensors FILE.npz`, containing the `Mconv7_stage2_L2` (heatmaps) and
+`Mconv7_stage2_L1` (PAFs) layers of human-pose-estimation-0001. Otherwise synthetic tensors with 1, 3 and 6 people
+are generated.
+"""
+import argparse
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from depthai_sdk.components.openpose_helper import OpenPoseDecoder, POSE_PAIRS, MAP_IDX, N_POINTS
+
+ITERATIONS = 20
+NN_HEIGHT, NN_WIDTH = 256, 456
+OUT_HEIGHT, OUT_WIDTH = 32, 57
+THRESHOLD = 0.3
+PEOPLE = [1, 3, 6]
+
+
+def reference_decode(heatmaps, pafs):
+    outputs = np.concatenate((heatmaps, pafs), axis=0)[None]
+    new_keypoints = []
+    new_keypoints_list = np.zeros((0, 3))
+    keypoint_id = 0
+
+    for row in range(N_POINTS):
+        prob_map = cv2.resize(outputs[0, row, :, :], (NN_WIDTH, NN_HEIGHT))
+        keypoints = get_keypoints(prob_map, threshold=THRESHOLD)
+        new_keypoints_list = np.vstack([new_keypoints_list, *keypoints])
+        keypoints_with_id = []
+        for i in range(len(keypoints)):
+            keypoints_with_id.append(keypoints[i] + (keypoint_id,))
+            keypoint_id += 1
+        new_keypoints.append(keypoints_with_id)
+
+    valid_pairs, invalid_pairs = get_valid_pairs(outputs, w=NN_WIDTH, h=NN_HEIGHT, detected_keypoints=new_keypoints)
+    personwise_keypoints = get_personwise_keypoints(valid_pairs, invalid_pairs, new_keypoints_list)
+    return new_keypoints, personwise_keypoints, new_keypoints_list
+
+
+def get_keypoints(prob_map, threshold=0.2):
+    map_smooth = cv2.GaussianBlur(prob_map, (3, 3), 0, 0)
+    map_mask = np.uint8(map_smooth > threshold)
+    keypoints = []
+
+    try:
+        # OpenCV4.x
+        contours, _ = cv2.findContours(map_mask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    except:
+        # OpenCV3.x
+        _, contours, _ = cv2.findContours(map_mask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+
+    for cnt in contours:
+        blob_mask = np.zeros(map_mask.shape)
+        blob_mask = cv2.fillConvexPoly(blob_mask, cnt, 1)
+        masked_prob_map = map_smooth * blob_mask
+        _, max_val, _, max_loc = cv2.minMaxLoc(masked_prob_map)
+        keypoints.append(max_loc + (prob_map[max_loc[1], max_loc[0]],))
+
+    return keypoints
+
+
+def get_valid_pairs(outputs, w, h, detected_keypoints, paf_maps=None):
+    valid_pairs = []
+    invalid_pairs = []
+    n_interp_samples = 10
+    paf_score_th = 0.2
+    conf_th = 0.4
+
+    for k in range(len(MAP_IDX)):
+        paf_a = outputs[0, MAP_IDX[k][0], :, :]
+        paf_b = outputs[0, MAP_IDX[k][1], :, :]
+        paf_a = cv2.resize(paf_a, (w, h), dst=paf_maps[0] if paf_maps else None)
+        paf_b = cv2.resize(paf_b, (w, h), dst=paf_maps[1] if paf_maps else None)
+
+        cand_a = detected_keypoints[POSE_PAIRS[k][0]]
+        cand_b = detected_keypoints[POSE_PAIRS[k][1]]
+
+        n_a = len(cand_a)
+        n_b = len(cand_b)
+
+        if (n_a != 0 and n_b != 0):
+            valid_pair = np.zeros((0, 3))
+            for i in range(n_a):
+                max_j = -1
+                max_score = -1
+                found = 0
+                for j in range(n_b):
+                    d_ij = np.subtract(cand_b[j][:2], cand_a[i][:2])
+                    norm = np.linalg.norm(d_ij)
+                    if norm:
+                        d_ij = d_ij / norm
+                    else:
+                        continue
+                    interp_coord = list(zip(np.linspace(cand_a[i][0], cand_b[j][0], num=n_interp_samples),
+                                            np.linspace(cand_a[i][1], cand_b[j][1], num=n_interp_samples)))
+                    paf_interp = []
+                    for k in range(len(interp_coord)):
+                        paf_interp.append([paf_a[int(round(interp_coord[k][1])), int(round(interp_coord[k][0]))],
+                                           paf_b[int(round(interp_coord[k][1])), int(round(interp_coord[k][0]))]])
+                    paf_scores = np.dot(paf_interp, d_ij)
+                    avg_paf_score = sum(paf_scores) / len(paf_scores)
+
+                    if (len(np.where(paf_scores > paf_score_th)[0]) / n_interp_samples) > conf_th:
+                        if avg_paf_score > max_score:
+                            max_j = j
+                            max_score = avg_paf_score
+                            found = 1
+                if found:
+                    valid_pair = np.append(valid_pair, [[cand_a[i][3], cand_b[max_j][3], max_score]], axis=0)
+
+            valid_pairs.append(valid_pair)
+        else:
+            invalid_pairs.append(k)
+            valid_pairs.append([])
+
+    return valid_pairs, invalid_pairs
+
+
+def get_personwise_keypoints(valid_pairs, invalid_pairs, keypoints_list):
+    personwise_keypoints = -1 * np.ones((0, 19))
+
+    for k in range(len(MAP_IDX)):
+        if k in invalid_pairs:
+            continue
+
+        part_as = valid_pairs[k][:, 0]
+        part_bs = valid_pairs[k][:, 1]
+        index_a, index_b = np.array(POSE_PAIRS[k])
+
+        for i in range(len(valid_pairs[k])):
+            found = 0
+            person_idx = -1
+            for j in range(len(personwise_keypoints)):
+                if personwise_keypoints[j][index_a] == part_as[i]:
+                    person_idx = j
+                    found = 1
+                    break
+
+            if found:
+                personwise_keypoints[person_idx][index_b] = part_bs[i]
+                personwise_keypoints[person_idx][-1] += keypoints_list[part_bs[i].astype(int), 2] + \
+                                                        valid_pairs[k][i][2]
+
+            elif not found and k < 17:
+                row = -1 * np.ones(19)
+                row[index_a] = part_as[i]
+                row[index_b] = part_bs[i]
+                row[-1] = sum(keypoints_list[valid_pairs[k][i, :2].astype(int), 2]) + valid_pairs[k][i][2]
+                personwise_keypoints = np.vstack([personwise_keypoints, row])
+
+    return personwise_keypoints
+
+
+def synthetic_tensors(n_people: int, seed: int = 0):
+    """
+    Heatmaps with a gaussian peak at each keypoint, and PAFs with unit vectors along each limb of each person.
+    """
+    rng = np.random.default_rng(seed)
+    heatmaps = np.zeros((19, OUT_HEIGHT, OUT_WIDTH), dtype=np.float32)
+    pafs = np.zeros((38, OUT_HEIGHT, OUT_WIDTH), dtype=np.float32)
+    ys, xs = np.mgrid[0:OUT_HEIGHT, 0:OUT_WIDTH]
+
+    for person in range(n_people):
+        center = np.array([(person + 0.5) * OUT_WIDTH / n_people, OUT_HEIGHT / 2])
+        spread = np.array([OUT_WIDTH / n_people / 3, OUT_HEIGHT / 3])
+        points = center + rng.uniform(-1, 1, (N_POINTS, 2)) * spread
+        for part, (x, y) in enumerate(points):
+            heatmaps[part] = np.maximum(heatmaps[part], np.exp(-((xs - x) ** 2 + (ys - y) ** 2) / 1.0))
+
+        for k, (a, b) in enumerate(POSE_PAIRS):
+            d = points[b] - points[a]
+            length = np.linalg.norm(d)
+            if length == 0:
+                continue
+            u = d / length
+            rel_x, rel_y = xs - points[a][0], ys - points[a][1]
+            along = rel_x * u[0] + rel_y * u[1]
+            across = np.abs(rel_x * u[1] - rel_y * u[0])
+            limb = (along >= -1) & (along <= length + 1) & (across <= 1)
+            pafs[MAP_IDX[k][0] - 19][limb] = u[0]
+            pafs[MAP_IDX[k][1] - 19][limb] = u[1]
+
+    heatmaps[18] = 1 - heatmaps[:18].max(axis=0)  # Background
+    return heatmaps, pafs
+
+
+def compare(expected, actual) -> str:
+    exp_kps, exp_persons, exp_list = expected
+    act_kps, act_persons, act_list = actual
+
+    # Keypoint ids can differ (blob order), so results are compared by keypoint coordinates
+    exp_parts = [sorted((k[0], k[1]) for k in kps) for kps in exp_kps]
+    act_parts = [sorted((k[0], k[1]) for k in kps) for kps in act_kps]
+
+    def people(persons, kp_list):
+        out = []
+        for p in persons:
+            parts = tuple(tuple(kp_list[int(i), :2]) if i >= 0 else None for i in p[:-1])
+            out.append((parts, p[-1]))
+        return sorted(out, key=lambda x: str(x[0]))
+
+    exp_people, act_people = people(exp_persons, exp_list), people(act_persons, act_list)
+    same_people = [e[0] for e in exp_people] == [a[0] for a in act_people]
+    score_diff = max([abs(e[1] - a[1]) for e, a in zip(exp_people, act_people)], default=0.0)
+    return f'keypoints equal: {exp_parts == act_parts}, people equal: {same_people} ({len(act_people)}), ' \
+           f'max score diff: {score_diff:.2e}'
+
+
+def bench(name, fn, *args):
+    result = fn(*args)
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn(*args)
+    ms = (time.perf_counter() - start) / ITERATIONS * 1000
+    print(f'{name:40s} {ms:8.3f} ms/decode')
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tensors', type=Path, default=None, help='Recorded human-pose-estimation-0001 layers (.npz)')
+    args = parser.parse_args()
+
+    if args.tensors:
+        layers = np.load(str(args.tensors))
+        inputs = {'recorded': (layers['Mconv7_stage2_L2'].reshape(19, OUT_HEIGHT, OUT_WIDTH).astype(np.float32),
+                               layers['Mconv7_stage2_L1'].reshape(38, OUT_HEIGHT, OUT_WIDTH).astype(np.float32))}
+    else:
+        inputs = {f'{n} people': synthetic_tensors(n) for n in PEOPLE}
+
+    decoder = OpenPoseDecoder((NN_WIDTH, NN_HEIGHT), (OUT_WIDTH, OUT_HEIGHT), threshold=THRESHOLD)
+    for name, (heatmaps, pafs) in inputs.items():
+        expected = bench(f'{name} reference (loops)', reference_decode, heatmaps, pafs)
+        actual = bench(f'{name} vectorized', decoder.decode, heatmaps, pafs)
+        print(f'{"":40s} {compare(expected, actual)}')
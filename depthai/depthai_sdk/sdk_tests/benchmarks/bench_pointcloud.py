@@ -0,0 +1,55 @@
+"""
+Compares the previous XoutPointcloud projection (float64 ray grid multiplied by the depth frame) with
+PointcloudProjector: dense float32 grid, decimated, range filtered compact points, and colored compact points.
+A device isn't required, frames are synthetic 1280x800 uint16 depth maps.
+"""
+import time
+
+import numpy as np
+
+from depthai_sdk.components.pointcloud_helper import PointcloudProjector
+
+ITERATIONS = 100
+WIDTH, HEIGHT = 1280, 800
+FX = FY = 800.0
+
+
+def ray_grid(dtype) -> np.ndarray:
+    xs, ys = np.meshgrid(np.arange(WIDTH, dtype=dtype), np.arange(HEIGHT, dtype=dtype))
+    grid = np.ones((HEIGHT, WIDTH, 3), dtype=dtype)
+    grid[..., 0] = (xs - WIDTH / 2) / FX
+    grid[..., 1] = (ys - HEIGHT / 2) / FY
+    return grid
+
+
+def synthetic_depth(rng) -> np.ndarray:
+    ys, xs = np.mgrid[0:HEIGHT, 0:WIDTH]
+    depth = 500 + xs * 3 + ys * 2 + rng.normal(0, 30, (HEIGHT, WIDTH))
+    depth[rng.random(depth.shape) < 0.1] = 0  # Invalid pixels
+    return depth.clip(0, 65535).astype(np.uint16)
+
+
+def bench(name: str, fn) -> None:
+    fn()  # Warm-up, buffers are allocated on the first call
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn()
+    ms = (time.perf_counter() - start) / ITERATIONS * 1000
+    print(f'{name:40s} {ms:8.2f} ms/frame')
+
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(0)
+    depth = synthetic_depth(rng)
+    color = rng.integers(0, 255, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+    grid64, grid32 = ray_grid(np.float64), ray_grid(np.float32)
+
+    dense = PointcloudProjector()
+    decimated = PointcloudProjector(decimation=2)
+    compact = PointcloudProjector(min_range=1000, max_range=4000, compact=True, buffers=2)
+
+    bench('previous (float64 grid * depth)', lambda: grid64 * depth[..., None])
+    bench('PointcloudProjector', lambda: dense.project(depth, grid32))
+    bench('PointcloudProjector decimation=2', lambda: decimated.project(depth, grid32))
+    bench('PointcloudProjector compact, range', lambda: compact.project(depth, grid32))
+    bench('PointcloudProjector compact, range, color', lambda: compact.project(depth, grid32, color))
@@ -0,0 +1,75 @@
+"""
+Compares Replay throughput of the previous loop (read, convert and send, then sleep 1/FPS) with the prefetching replay,
+in real time and as fast as possible modes. A device isn't required: frames are sent to a queue that simulates the
+XLink transfer time, the recording is a synthetic 1080p color + 2x 800p mono mp4 recording.
+"""
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from depthai_sdk.replay import Replay
+
+FRAMES = 90
+FPS = 30
+SEND_SEC = 0.003  # Simulated transfer time of a frame to the device
+
+
+class SimulatedQueue:
+    def send(self, img_frame) -> None:
+        time.sleep(SEND_SEC)
+
+
+def create_recording(path: Path) -> None:
+    rng = np.random.default_rng(0)
+    for name, size, color in [('color', (1920, 1080), True), ('left', (1280, 800), False),
+                              ('right', (1280, 800), False)]:
+        writer = cv2.VideoWriter(str(path / f'{name}.mp4'), cv2.VideoWriter_fourcc(*'mp4v'), FPS, size, color)
+        base = rng.integers(0, 255, (size[1], size[0], 3) if color else (size[1], size[0]), dtype=np.uint8)
+        for i in range(FRAMES):
+            writer.write(np.roll(base, i * 5, axis=1))
+        writer.release()
+
+
+def create_replay(path: Path) -> Replay:
+    replay = Replay(path)
+    replay.resize('color', (1280, 720))
+    for stream in replay.streams.values():
+        stream.queue = SimulatedQueue()
+    return replay
+
+
+def bench_fixed_delay(path: Path) -> None:
+    replay = create_replay(path)
+    start = time.perf_counter()
+    while replay.sendFrames():
+        time.sleep(1 / FPS)
+    report('fixed delay (previous)', time.perf_counter() - start)
+    replay.close()
+
+
+def bench(path: Path, name: str, realtime: bool, prefetch: int) -> None:
+    replay = create_replay(path)
+    replay.set_realtime(realtime)
+    replay.set_prefetch(prefetch)
+    start = time.perf_counter()
+    replay.start()
+    replay.thread.join()
+    report(name, time.perf_counter() - start)
+    replay.close()
+
+
+def report(name: str, seconds: float) -> None:
+    print(f'{name:40s} {seconds:6.2f} s, {FRAMES / seconds:6.1f} FPS (recorded at {FPS} FPS)')
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp)
+        create_recording(path)
+        bench_fixed_delay(path)
+        bench(path, 'real time, no prefetching', realtime=True, prefetch=0)
+        bench(path, 'real time, prefetching', realtime=True, prefetch=8)
+        bench(path, 'as fast as possible, prefetching', realtime=False, prefetch=8)
@@ -0,0 +1,62 @@
+"""
+Compares ImgFrame -> ROS Image data conversion before and after the DepthAi2Ros2 changes, on synthetic frames.
+ROS and a device aren't required; message data buffers are emulated with array.array('B'), same as in rclpy.
+
+Old path: color frames converted with getCvFrame() (NV12 -> BGR), then copied with frombytes() into a new message.
+New path: frame data (zero-copy view) copied once into a reused message buffer, NV12 published as-is (opt-in with
+publish_nv12, otherwise NV12 is converted to bgr8 as before).
+"""
+import array
+import time
+
+import cv2
+import numpy as np
+
+ITERATIONS = 100
+
+FRAMES = {
+    'color_1080p_nv12': (1080, 1920),
+    'color_4k_nv12': (2160, 3840),
+}
+DEPTH = {
+    'depth_800p': (800, 1280),
+}
+
+
+def old_color(nv12: np.ndarray, h: int, w: int) -> int:
+    bgr = cv2.cvtColor(nv12.reshape(h * 3 // 2, w), cv2.COLOR_YUV2BGR_NV12)  # getCvFrame()
+    data = array.array('B')
+    data.frombytes(bgr)
+    return bgr.nbytes + len(data)  # Conversion output + copy into the message
+
+
+def old_raw(raw: np.ndarray) -> int:
+    data = array.array('B')
+    data.frombytes(raw)
+    return len(data)
+
+
+def new_raw(raw: np.ndarray, data: array.array) -> int:
+    memoryview(data)[:] = raw.reshape(-1)
+    return raw.nbytes
+
+
+def bench(name, fn, *args):
+    copied = fn(*args)
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn(*args)
+    ms = (time.perf_counter() - start) / ITERATIONS * 1000
+    print(f'{name:40s} {copied / 1e6:8.2f} MB copied/frame {ms:8.3f} ms/frame')
+
+
+if __name__ == '__main__':
+    for name, (h, w) in FRAMES.items():
+        nv12 = np.random.randint(0, 255, h * w * 3 // 2, dtype=np.uint8)
+        bench(f'{name} old (BGR + frombytes)', old_color, nv12, h, w)
+        bench(f'{name} new (nv12, reused msg)', new_raw, nv12, array.array('B', bytes(nv12.size)))
+
+    for name, (h, w) in DEPTH.items():
+        depth = np.random.randint(0, 255, h * w * 2, dtype=np.uint8)
+        bench(f'{name} old (frombytes)', old_raw, depth)
+        bench(f'{name} new (reused msg)', new_raw, depth, array.array('B', bytes(depth.size)))
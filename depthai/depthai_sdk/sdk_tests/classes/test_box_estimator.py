@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from depthai_sdk.classes.box_estimator import BoxEstimator
+
+WIDTH, HEIGHT = 1280, 800
+FOCAL = 800.0
+BOX = (400, 300, 200)  # Length, width, height [mm]
+
+
+def synthetic_points(ground: float, flying_pixels: float = 0.0) -> np.ndarray:
+    """
+    Point cloud (mm) of a box on the ground, ground distance away from the camera that looks straight down.
+    """
+    rng = np.random.default_rng(0)
+    xs, ys = np.meshgrid((np.arange(WIDTH) - WIDTH / 2) / FOCAL, (np.arange(HEIGHT) - HEIGHT / 2) / FOCAL)
+    depth = np.full((HEIGHT, WIDTH), ground, dtype=np.float32)
+    top = ground - BOX[2]
+    depth[(np.abs(xs * top) < BOX[0] / 2) & (np.abs(ys * top) < BOX[1] / 2)] = top
+    depth += rng.normal(0, 2, depth.shape).astype(np.float32)
+    flying = rng.random(depth.shape) < flying_pixels
+    depth[flying] = rng.uniform(top - 500, ground, np.count_nonzero(flying))
+    depth[rng.random(depth.shape) < 0.05] = 0  # Invalid pixels
+    return np.stack([xs, ys, np.ones_like(xs)], axis=-1).astype(np.float32) * depth[..., None]
+
+
+def estimate(points: np.ndarray, ground: float):
+    estimator = BoxEstimator(calib_json_path='')
+    estimator.ground_plane_eq = np.array([0, 0, 1, -ground], dtype=np.float64)
+    dimensions, corners = estimator.process_points(points)
+    assert dimensions is not None, 'Box not found'
+    return sorted(dimensions, reverse=True)
+
+
+@pytest.mark.parametrize('ground', [1000, 2000, 3500])
+@pytest.mark.parametrize('decimation', [1, 2, 3])
+def test_dimensions_across_distance_and_decimation(ground, decimation):
+    points = synthetic_points(ground)[::decimation, ::decimation]
+    length, width, height = estimate(points, ground)
+
+    assert length == pytest.approx(BOX[0], abs=25)
+    assert width == pytest.approx(BOX[1], abs=25)
+    assert height == pytest.approx(BOX[2], abs=5)
+
+
+def test_flying_pixels_are_removed():
+    length, width, height = estimate(synthetic_points(1000, flying_pixels=0.005), 1000)
+
+    assert length == pytest.approx(BOX[0], abs=25)
+    assert width == pytest.approx(BOX[1], abs=25)
+    assert height == pytest.approx(BOX[2], abs=5)
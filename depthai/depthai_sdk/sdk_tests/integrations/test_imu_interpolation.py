@@ -0,0 +1,92 @@
+import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from depthai_sdk.integrations.ros.imu_interpolation import ImuInterpolation, ImuSyncMethod, TS, SEQ, AX, GX
+
+
+class Report(SimpleNamespace):
+    def getTimestampDevice(self):
+        return datetime.timedelta(seconds=self.ts)
+
+
+DISABLED = Report(ts=0.0, sequence=0, x=0.0, y=0.0, z=0.0)  # Report of a disabled sensor
+
+
+def report(ts: float, seq: int, value: float) -> Report:
+    return Report(ts=ts, sequence=seq, x=value, y=2 * value, z=3 * value)
+
+
+def packet(accel=DISABLED, gyro=DISABLED, rotation=None) -> SimpleNamespace:
+    return SimpleNamespace(acceleroMeter=accel, gyroscope=gyro, rotationVector=rotation, magneticField=None)
+
+
+def interleaved_packets():
+    # Accelerometer at 10 ms, gyroscope at 5 ms period (offset by 2 ms), both reports in every packet
+    accels = [report(1.0 + 0.01 * i, i, 10.0 * i) for i in range(6)]
+    gyros = [report(1.002 + 0.005 * i, i, float(i)) for i in range(10)]
+    return [packet(accels[int((g.ts - 1.0) // 0.01)], g) for g in gyros]
+
+
+def test_interpolates_accel_at_gyro_timestamps():
+    interpolation = ImuInterpolation(ImuSyncMethod.LINEAR_INTERPOLATE_ACCEL)
+    samples = [s for p in interleaved_packets() for s in interpolation.add_packet(p)]
+
+    assert len(samples) > 0
+    for sample in samples:
+        # Accelerometer x is 10 * i at 1.0 + 0.01 * i, so 1000 * (ts - 1.0) when interpolated
+        assert sample[AX] == pytest.approx(1000 * (sample[TS] - 1.0))
+        assert sample[GX] == pytest.approx((sample[TS] - 1.002) / 0.005)
+    assert [s[SEQ] for s in samples] == sorted(s[SEQ] for s in samples)
+
+
+def test_batch_matches_streaming():
+    packets = interleaved_packets()
+    interpolation = ImuInterpolation()
+    streaming = np.array([s for p in packets for s in interpolation.add_packet(p)])
+    batch = ImuInterpolation().add_imu_data(packets)
+
+    np.testing.assert_allclose(batch, streaming)
+
+
+@pytest.mark.parametrize('sync_mode', [ImuSyncMethod.LINEAR_INTERPOLATE_ACCEL, ImuSyncMethod.LINEAR_INTERPOLATE_GYRO])
+def test_single_sensor_passthrough(sync_mode):
+    accel_only = [packet(accel=report(1.0 + 0.01 * i, i, float(i))) for i in range(5)]
+    gyro_only = [packet(gyro=report(1.0 + 0.01 * i, i, float(i))) for i in range(5)]
+
+    for packets, column, zero_column in [(accel_only, AX, GX), (gyro_only, GX, AX)]:
+        interpolation = ImuInterpolation(sync_mode)
+        samples = [s for p in packets for s in interpolation.add_packet(p)]
+        assert [s[column] for s in samples] == [0.0, 1.0, 2.0, 3.0, 4.0]
+        assert all(s[zero_column] == 0.0 for s in samples)
+
+        batch = ImuInterpolation(sync_mode).add_imu_data(packets)
+        np.testing.assert_allclose(batch, np.array(samples))
+
+
+def test_rotation_vector_only():
+    packets = [packet(rotation=report(1.0 + 0.01 * i, i, 0.5)) for i in range(3)]
+    interpolation = ImuInterpolation()
+    samples = [s for p in packets for s in interpolation.add_packet(p)]
+
+    assert [s[SEQ] for s in samples] == [0, 1, 2]
+    assert [s[TS] for s in samples] == pytest.approx([1.0, 1.01, 1.02])
+
+
+def test_repeated_reports_are_emitted_once():
+    single = packet(accel=report(1.0, 7, 1.0))
+    interpolation = ImuInterpolation()
+    assert len(interpolation.add_packet(single)) == 1
+    assert len(interpolation.add_packet(single)) == 0
+
+
+def test_imu_msg_values_and_timestamp_from_same_sample():
+    interpolation = ImuInterpolation()
+    for p in interleaved_packets():
+        msg = SimpleNamespace(linear_acceleration=SimpleNamespace(), angular_velocity=SimpleNamespace(),
+                              orientation=SimpleNamespace())
+        sample = interpolation.Imu(msg, p)
+        assert msg.linear_acceleration.x == pytest.approx(sample[AX])
+        assert msg.angular_velocity.x == pytest.approx(sample[GX])
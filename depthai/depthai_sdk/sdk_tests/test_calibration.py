@@ -0,0 +1,131 @@
+import gc
+import weakref
+
+import depthai as dai
+import numpy as np
+import pytest
+
+import depthai_sdk.calibration
+from depthai_sdk.calibration import DeviceCalibration
+
+SOCKET = dai.CameraBoardSocket.CAM_A
+WIDTH, HEIGHT = 640, 400
+INTRINSICS = [[450.0, 0.0, 320.0], [0.0, 450.0, 200.0], [0.0, 0.0, 1.0]]
+
+
+class FakeDevice:
+    """
+    Device whose EEPROM reads are counted.
+    """
+
+    def __init__(self, mxid: str = '14442C10D13EABCE00'):
+        self.mxid = mxid
+        self.reads = 0
+
+    def getMxId(self) -> str:
+        return self.mxid
+
+    def readCalibration(self) -> dai.CalibrationHandler:
+        self.reads += 1
+        calibration = dai.CalibrationHandler()
+        calibration.setCameraIntrinsics(SOCKET, INTRINSICS, WIDTH, HEIGHT)
+        return calibration
+
+
+@pytest.fixture
+def calibration_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(depthai_sdk.calibration, 'CALIBRATION_PATH', tmp_path)
+    return tmp_path
+
+
+def test_eeprom_is_read_once():
+    device = FakeDevice()
+    calibration = DeviceCalibration(device)
+    assert device.reads == 0  # Read on the first access
+
+    intrinsics = calibration.intrinsics(SOCKET)
+    assert calibration.intrinsics(SOCKET) is intrinsics
+    assert calibration.handler is calibration.handler
+    assert device.reads == 1
+    np.testing.assert_allclose(intrinsics, INTRINSICS)
+    assert not intrinsics.flags.writeable  # Shared by all callers
+
+
+def test_memoized_once_per_key():
+    calibration = DeviceCalibration(FakeDevice())
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return object()
+
+    value = calibration._memoize('key', compute)
+    assert calibration._memoize('key', compute) is value
+    assert calibration._memoize('other', compute) is not value
+    assert len(calls) == 2
+
+
+def test_of_returns_shared_calibration():
+    device, other = FakeDevice(), FakeDevice()
+    calibration = DeviceCalibration.of(device)
+    assert DeviceCalibration.of(device) is calibration
+    assert DeviceCalibration.of(other) is not calibration
+
+    replayed = DeviceCalibration.register(device, DeviceCalibration(calibration=dai.CalibrationHandler()))
+    assert DeviceCalibration.of(device) is replayed
+    DeviceCalibration.release(device)
+    assert DeviceCalibration.of(device) is not replayed
+    DeviceCalibration.release(device)
+    DeviceCalibration.release(other)
+
+
+def test_registry_releases_collected_device():
+    registered = len(DeviceCalibration._devices)
+    device = FakeDevice()
+    calibration = DeviceCalibration.of(device)
+    calibration.intrinsics(SOCKET)
+    assert len(DeviceCalibration._devices) == registered + 1
+
+    device_ref = weakref.ref(device)
+    del device
+    gc.collect()
+    # Neither the registry nor the calibration keeps the device alive
+    assert device_ref() is None
+    assert len(DeviceCalibration._devices) == registered
+    assert calibration._get_device() is None
+
+
+def test_persisted_calibration_round_trip(calibration_path):
+    device = FakeDevice()
+    np.testing.assert_allclose(DeviceCalibration(device, persist=True).intrinsics(SOCKET), INTRINSICS)
+    assert device.reads == 1
+    assert (calibration_path / f'{device.mxid}.json').exists()
+    assert not list(calibration_path.glob('*.tmp'))
+
+    # Loaded from the stored calibration, without reading the EEPROM
+    np.testing.assert_allclose(DeviceCalibration(device, persist=True).intrinsics(SOCKET), INTRINSICS)
+    assert device.reads == 1
+
+    # Another device (MxId) isn't loaded from it
+    other = FakeDevice('18443010B1CDEF1200')
+    DeviceCalibration(other, persist=True).handler
+    assert other.reads == 1
+    assert len(list(calibration_path.glob('*.json'))) == 2
+
+    # Not stored without persist
+    not_persisted = FakeDevice('1944301021B5EF1300')
+    DeviceCalibration(not_persisted).handler
+    assert not_persisted.reads == 1
+    assert len(list(calibration_path.glob('*.json'))) == 2
+
+
+def test_clear_persisted(calibration_path):
+    device = FakeDevice()
+    calibration = DeviceCalibration(device, persist=True)
+    intrinsics = calibration.intrinsics(SOCKET)
+
+    calibration.clear_persisted()
+    assert not (calibration_path / f'{device.mxid}.json').exists()
+    assert calibration.intrinsics(SOCKET) is not intrinsics  # Memoized data is dropped, the EEPROM read again
+    assert device.reads == 2
+    assert (calibration_path / f'{device.mxid}.json').exists()
@@ -0,0 +1,109 @@
+import threading
+
+import pytest
+
+from depthai_sdk.record import QueuePolicy, Record, RecordType, _StreamWorker
+
+TIMEOUT = 5
+
+
+class GatedRecorder:
+    """
+    Recorder whose writes wait until the gate is opened, so the stream queue can be filled deterministically.
+    """
+
+    def __init__(self, fail_on=()):
+        self.gate = threading.Event()
+        self.writing = threading.Event()  # Set once the first write started
+        self.fail_on = fail_on
+        self.written = []
+
+    def write(self, name, msg):
+        self.writing.set()
+        assert self.gate.wait(TIMEOUT)
+        if msg in self.fail_on:
+            raise RuntimeError(f'Failed to write {msg}')
+        self.written.append(msg)
+
+    def close(self):
+        pass
+
+
+def fill(worker: _StreamWorker, recorder: GatedRecorder, msgs) -> None:
+    worker.put(msgs[0])
+    assert recorder.writing.wait(TIMEOUT)  # Worker took the first frame and waits in write()
+    for msg in msgs[1:]:
+        worker.put(msg)
+
+
+@pytest.mark.parametrize('policy, written, dropped', [
+    (QueuePolicy.DROP_NEWEST, [0, 1, 2], 2),
+    (QueuePolicy.DROP_OLDEST, [0, 3, 4], 2),
+])
+def test_drop_policies(policy, written, dropped):
+    recorder = GatedRecorder()
+    worker = _StreamWorker('color', recorder, queue_size=2, policy=policy)
+    fill(worker, recorder, list(range(5)))  # 1 frame being written, 2 queued, 2 don't fit
+
+    recorder.gate.set()
+    worker.stop()
+    assert recorder.written == written
+    assert worker.get_stats()['dropped'] == dropped
+
+
+def test_block_policy_writes_all_frames():
+    recorder = GatedRecorder()
+    worker = _StreamWorker('color', recorder, queue_size=2, policy=QueuePolicy.BLOCK)
+    producer = threading.Thread(target=fill, args=(worker, recorder, list(range(5))))
+    producer.start()
+
+    producer.join(0.2)
+    assert producer.is_alive()  # Blocked on the full queue
+    recorder.gate.set()
+    producer.join(TIMEOUT)
+    assert not producer.is_alive()
+
+    worker.stop()
+    assert recorder.written == list(range(5))
+    assert worker.get_stats()['dropped'] == 0
+
+
+@pytest.mark.parametrize('policy', list(QueuePolicy))
+def test_failed_write_keeps_draining(policy):
+    recorder = GatedRecorder(fail_on={0})
+    worker = _StreamWorker('color', recorder, queue_size=2, policy=policy)
+    worker.put(0)
+    assert recorder.writing.wait(TIMEOUT)
+    recorder.gate.set()  # First write fails
+    producer = threading.Thread(target=lambda: [worker.put(i) for i in range(1, 5)])
+    producer.start()
+    producer.join(TIMEOUT)
+    assert not producer.is_alive()
+
+    worker.stop()
+    stats = worker.get_stats()
+    assert stats['errors'] == 1
+    assert 0 not in recorder.written
+    assert stats['written'] == len(recorder.written)
+    if policy == QueuePolicy.BLOCK:
+        assert recorder.written == [1, 2, 3, 4]
+
+
+def test_no_worker_started_after_close(tmp_path):
+    record = Record(tmp_path, RecordType.VIDEO)
+    recorder = GatedRecorder()
+    recorder.gate.set()
+    record.recorder = recorder
+    record._started = True  # As after start(), without a device
+
+    record._get_worker('color').put(0)
+    record.close()
+    threads = threading.active_count()
+
+    # Frames of a write() racing close() are dropped, instead of starting a worker that is never stopped
+    assert record._get_worker('depth') is None
+    assert 'depth' not in record._workers
+    assert threading.active_count() == threads
+    record._workers['color'].put(1)  # Worker already stopped
+    assert recorder.written == [0]
+    record.close()  # Closing again is a no-op
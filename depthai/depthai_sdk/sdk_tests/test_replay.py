@@ -0,0 +1,105 @@
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from depthai_sdk.replay import Replay
+
+TIMEOUT = 5
+FPS = 10
+FRAMES = 60  # mp4v puts a keyframe every 12 frames, so seeks decode from a preceding keyframe
+WIDTH, HEIGHT = 64, 48
+
+
+def source_frames() -> np.ndarray:
+    # Each frame is the same noise shifted by its index, so a decoded frame is matched to its index
+    base = np.random.default_rng(0).integers(0, 255, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+    return np.stack([np.roll(base, i, axis=1) for i in range(FRAMES)])
+
+
+@pytest.fixture(scope='module')
+def recording(tmp_path_factory):
+    path = tmp_path_factory.mktemp('recording')
+    writer = cv2.VideoWriter(str(path / 'color.mp4'), cv2.VideoWriter_fourcc(*'mp4v'), FPS, (WIDTH, HEIGHT))
+    if not writer.isOpened():
+        pytest.skip('OpenCV can not write mp4 videos')
+    for frame in source_frames():
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+class SentFrames:
+    """
+    Indices (matched by the content) of the frames the replay sent.
+    """
+
+    def __init__(self, replay: Replay):
+        self.replay = replay
+        self.source = source_frames().astype(np.float32)
+        self.indices = []
+        stream = replay.streams['color']
+        stream.disabled = True  # Not sent to a device, only to the callback
+        stream.callbacks.append(self._sent)
+
+    def _sent(self, name, img_frame):
+        frame = self.replay.streams[name].frame.astype(np.float32)
+        self.indices.append(int(np.argmin(((self.source - frame) ** 2).mean(axis=(1, 2, 3)))))
+
+    def wait_for(self, frame_index: int) -> int:
+        deadline = time.monotonic() + TIMEOUT
+        while self.replay.get_frame_index() != frame_index and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert self.replay.get_frame_index() == frame_index
+        return self.indices[-1]
+
+
+@pytest.fixture
+def paused_replay(recording):
+    replay = Replay(recording)
+    sent = SentFrames(replay)
+    replay.toggle_pause()
+    replay.start()
+    yield replay, sent
+    replay.close()
+
+
+def test_seek_frame_index(paused_replay):
+    replay, sent = paused_replay
+    for frame_index in [17, 5, 36, 0]:
+        replay.seek(frame_index=frame_index)
+        assert sent.wait_for(frame_index) == frame_index
+
+
+def test_seek_timestamp(paused_replay):
+    replay, sent = paused_replay
+    replay.seek(timestamp=2.55)  # Last frame at or before the timestamp
+    assert sent.wait_for(25) == 25
+
+
+def test_seek_past_end_clamps_to_last_frame(paused_replay):
+    replay, sent = paused_replay
+    replay.seek(frame_index=FRAMES + 10)
+    assert sent.wait_for(FRAMES - 1) == FRAMES - 1
+
+
+def test_step(paused_replay):
+    replay, sent = paused_replay
+    replay.seek(frame_index=20)
+    assert sent.wait_for(20) == 20
+    for frames, expected in [(1, 21), (5, 26), (-3, 23), (-1, 22), (-30, 0)]:
+        replay.step(frames)
+        assert sent.wait_for(expected) == expected
+
+
+def test_set_range(recording):
+    replay = Replay(recording)
+    sent = SentFrames(replay)
+    replay.set_realtime(False)
+    replay.set_range(1.05, 1.95)
+    replay.start()
+    replay.thread.join(TIMEOUT)
+    assert not replay.thread.is_alive()
+    replay.close()
+    assert sent.indices == list(range(10, 20))
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from depthai_sdk.tracking import BatchKalmanFilter, KalmanFilter
+
+ACC_STD, MEAS_STD = 10, 0.1
+# Object ids of each frame: objects are added, removed (REMOVED_AFTER frame), re-added (1) and reordered
+FRAMES = [[0, 1, 2], [0, 1, 2], [2, 0, 3], [3, 2, 0, 4], [0, 4, 1], [4, 1, 3, 5], [5, 1, 4]]
+REMOVED_AFTER = {1: [1], 4: [0], 5: [3]}
+# Irregular frame intervals, with microsecond resolution like the tracklet timestamps (timedelta)
+TIMES = np.round(np.cumsum([0.0, 1 / 30, 1 / 30, 2 / 30, 1 / 15, 1 / 30, 0.1]), 6)
+
+
+class PerObject:
+    """
+    Previous XoutTracker filtering: a KalmanFilter per tracked object, initialized with its first measurement.
+    """
+
+    def __init__(self):
+        self.filters = {}
+
+    def step(self, ids, z, time, meas_std=None):
+        states, filtered = [], []
+        for i, obj_id in enumerate(ids):
+            kf = self.filters.get(obj_id)
+            if kf is None:
+                self.filters[obj_id] = KalmanFilter(ACC_STD, MEAS_STD, z[i][:, None], time)
+                states.append(z[i])
+                filtered.append(False)
+                continue
+            kf.predict(time - kf.time)
+            kf.update(z[i][:, None])
+            kf.time = time
+            if meas_std is not None:
+                kf.meas_std = meas_std[i]
+            states.append(kf.x[:len(z[i]), 0])
+            filtered.append(True)
+        return np.array(states), np.array(filtered)
+
+    def remove(self, obj_id):
+        self.filters.pop(obj_id, None)
+
+
+def measurement(obj_id: int, frame: int, dim_z: int) -> np.ndarray:
+    rng = np.random.default_rng(100 * obj_id + frame)
+    start = np.arange(dim_z) * 100.0 + obj_id * 10
+    return start + (obj_id + 1) * 30.0 * TIMES[frame] + rng.normal(0, 1, dim_z)
+
+
+@pytest.mark.parametrize('dim_z, with_meas_std', [(4, False), (3, True)])
+def test_matches_per_object_filters(dim_z, with_meas_std):
+    batch = BatchKalmanFilter(dim_z, ACC_STD, MEAS_STD, capacity=2)  # Also grows the arrays
+    expected = PerObject()
+    for frame, ids in enumerate(FRAMES):
+        z = np.array([measurement(obj_id, frame, dim_z) for obj_id in ids])
+        meas_std = z[:, -1] ** 2 / (75 * 440) if with_meas_std else None
+
+        states, filtered = batch.step(ids, z, TIMES[frame], meas_std)
+        expected_states, expected_filtered = expected.step(ids, z, TIMES[frame], meas_std)
+
+        np.testing.assert_array_equal(filtered, expected_filtered)
+        np.testing.assert_allclose(states, expected_states, rtol=1e-9, atol=1e-9)
+        for obj_id in ids:  # Full state (with velocity and acceleration) and covariance
+            row = batch._rows[obj_id]
+            np.testing.assert_allclose(batch.x[row], expected.filters[obj_id].x, rtol=1e-9, atol=1e-9)
+            np.testing.assert_allclose(batch.P[row], expected.filters[obj_id].P, rtol=1e-9, atol=1e-6)
+
+        for obj_id in REMOVED_AFTER.get(frame, []):
+            batch.remove(obj_id)
+            expected.remove(obj_id)
+            assert obj_id not in batch
+        assert len(batch) == len(expected.filters)
+
+
+def test_remove_unknown_object():
+    batch = BatchKalmanFilter(3, ACC_STD, MEAS_STD)
+    batch.step([1, 2], np.zeros((2, 3)), 0.0)
+    batch.remove(3)
+    assert len(batch) == 2
+    batch.remove(1)
+    batch.remove(1)
+    assert len(batch) == 1 and 2 in batch
@@ -0,0 +1,133 @@
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import depthai as dai
+import numpy as np
+import pytest
+
+from depthai_sdk.oak_outputs.xout.xout_base import ReplayStream
+from depthai_sdk.oak_outputs.xout.xout_tracker import TrackedObject, XoutTracker
+from depthai_sdk.tracking import TrackletHistory
+from depthai_sdk.visualize.bbox import BoundingBox
+
+FPS = 30
+
+
+def previous_speed(samples, ts: float) -> float:
+    """
+    Per-tracklet speed of the previous TrackedObject.calc_speed, over all (timestamp, (x, y, z)) samples.
+    """
+    speeds = []
+    for (t1, p1), (t2, p2) in zip(samples, samples[1:]):
+        if ts - t1 > 1:
+            continue
+        speeds.append(np.linalg.norm(np.subtract(p2, p1)) / 1000 / (t2 - t1))
+    if not speeds:
+        return 0.0
+    window = np.hanning(3)
+    window /= window.sum()
+    return float(np.mean(np.convolve(speeds, window, mode='same')))
+
+
+def random_track(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    timestamps = np.arange(n) / FPS + rng.uniform(0, 0.2 / FPS, n)  # Jittered, but ordered
+    coords = np.cumsum(rng.normal(0, 20, (n, 3)), axis=0) + (0, 0, 2000)
+    return list(zip(timestamps.tolist(), coords.tolist()))
+
+
+def tracklet(obj_id: int, status, x: float = 0.0, y: float = 0.0, z: float = 0.0) -> dai.Tracklet:
+    detection = dai.ImgDetection()
+    detection.xmin, detection.ymin, detection.xmax, detection.ymax = 0.2, 0.2, 0.4, 0.4
+    detection.label = 0
+    detection.confidence = 0.9
+    t = dai.Tracklet()
+    t.id = obj_id
+    t.status = status
+    t.srcImgDetection = detection
+    t.spatialCoordinates = dai.Point3f(x, y, z)
+    return t
+
+
+def test_speed_matches_previous_implementation():
+    samples = random_track(200)
+    history = TrackletHistory(capacity=128, window=1.0)
+    for i, (ts, (x, y, z)) in enumerate(samples):
+        history.add(ts, x, y, z)
+        assert history.speed(ts) == pytest.approx(previous_speed(samples[:i + 1], ts))
+
+
+def test_constant_velocity_speed():
+    history = TrackletHistory()
+    for i in range(2 * FPS):
+        ts = i / FPS
+        history.add(ts, 1500 * ts, 0, 2000)  # 1.5 m/s along x
+    assert history.speed(ts) == pytest.approx(1.5)
+
+
+def test_speed_needs_two_samples_within_window():
+    history = TrackletHistory(window=1.0)
+    assert history.speed(0.0) == 0.0
+    history.add(0.0, 0, 0, 0)
+    assert history.speed(0.0) == 0.0
+    history.add(0.5, 500, 0, 0)
+    assert history.speed(0.5) == pytest.approx(previous_speed([(0.0, (0, 0, 0)), (0.5, (500, 0, 0))], 0.5))
+    assert history.speed(1.6) == 0.0  # Both samples are older than the window
+
+
+def test_history_is_bounded():
+    samples = random_track(100, seed=1)
+    history = TrackletHistory(capacity=16, window=10.0)
+    for ts, (x, y, z) in samples:
+        history.add(ts, x, y, z)
+    assert len(history) == 16
+    assert history._ts.shape == (16,)
+    # Only the last 16 samples (about half a second) are kept
+    ts = samples[-1][0]
+    assert history.speed(ts) == pytest.approx(previous_speed(samples[-16:], ts))
+
+
+def test_tracked_object_history_is_bounded():
+    obj = TrackedObject(baseline=75, focal=440, apply_kalman=False, calculate_speed=True, history_size=5)
+    for i in range(12):
+        obj.new_tracklet(tracklet(1, dai.Tracklet.TrackingStatus.TRACKED, x=100 * i, z=2000),
+                         timedelta(seconds=i / FPS), (255, 255, 255), 'car')
+    assert len(obj.previous_detections) == 5
+    assert len(obj.history) == 5
+    assert [d.ts for d in obj.previous_detections] == [timedelta(seconds=i / FPS) for i in range(7, 12)]
+    assert obj.previous_detections[-1].speed == pytest.approx(100 / 1000 * FPS, rel=1e-4)  # Microsecond timestamps
+
+
+def create_tracker(forget_after_n_frames=None) -> XoutTracker:
+    det_nn = SimpleNamespace(_labels=None, _ar_resize_mode=None, _size=(300, 300))
+    return XoutTracker(det_nn, ReplayStream('frames'), MagicMock(), ReplayStream('tracklets'), BoundingBox(),
+                       apply_kalman=True, forget_after_n_frames=forget_after_n_frames, calculate_speed=True)
+
+
+def package(tracker: XoutTracker, frame: int, tracklets):
+    msg = SimpleNamespace(tracklets=tracklets, getTimestamp=lambda: timedelta(seconds=frame / FPS))
+    return tracker.package({'tracklets': msg, 'frames': MagicMock()})
+
+
+def test_lost_tracklets_are_evicted():
+    tracked, lost = dai.Tracklet.TrackingStatus.TRACKED, dai.Tracklet.TrackingStatus.LOST
+    tracker = create_tracker(forget_after_n_frames=2)
+    package(tracker, 0, [tracklet(1, tracked, z=2000), tracklet(2, tracked, z=3000)])
+    package(tracker, 1, [tracklet(1, tracked, z=2000), tracklet(2, lost, z=3000)])
+    assert set(tracker.tracked_objects) == {1, 2}
+
+    packet = package(tracker, 2, [tracklet(1, tracked, z=2000), tracklet(2, lost, z=3000)])
+    assert set(tracker.tracked_objects) == {1}
+    assert set(packet.tracklets) == {1}
+    assert 2 not in tracker._kalman_2d and 2 not in tracker._kalman_3d
+    assert 1 in tracker._kalman_2d and 1 in tracker._kalman_3d
+
+
+def test_removed_tracklets_are_evicted():
+    tracker = create_tracker()
+    package(tracker, 0, [tracklet(1, dai.Tracklet.TrackingStatus.TRACKED, z=2000)])
+    packet = package(tracker, 1, [tracklet(1, dai.Tracklet.TrackingStatus.REMOVED, z=2000)])
+    assert tracker.tracked_objects == {}
+    assert packet.tracklets == {}
+    assert len(tracker._kalman_2d) == 0 and len(tracker._kalman_3d) == 0
@@ -0,0 +1,213 @@
+import os
+import weakref
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, MutableMapping, Optional
+
+import depthai as dai
+import numpy as np
+
+from depthai_sdk.logger import LOGGER
+
+CALIBRATION_PATH = Path.home() / Path('.cache/calibration')
+
+
+class DeviceCalibration:
+    """
+    Calibration of a device, shared by all components and outputs of the device. The EEPROM is read only once (over
+    PoE every read is a round trip), when the calibration is first needed, and derived data (intrinsics at a
+    resolution, baseline, FOV, XYZ ray grid) is computed once and memoized.
+
+    OakCamera registers the calibration of its device (from the recording when replaying), and DeviceCalibration.of()
+    returns it from anywhere the device is available. With persist=True the calibration is stored by the MxId of the
+    device in CALIBRATION_PATH and loaded from there on the following starts, instead of reading the EEPROM. Use it
+    only if the device isn't recalibrated, or call clear_persisted() after the recalibration.
+
+    Devices are referenced weakly, by the registry and by the calibration, so a calibration of a device that was
+    garbage collected is dropped, even if release() wasn't called.
+    """
+    _devices: MutableMapping[dai.Device, 'DeviceCalibration'] = weakref.WeakKeyDictionary()
+    _devices_lock = Lock()
+
+    def __init__(self,
+                 device: Optional[dai.Device] = None,
+                 calibration: Optional[dai.CalibrationHandler] = None,
+                 persist: bool = False):
+        """
+        Args:
+            device: Device the calibration is read from, if calibration isn't specified. It's referenced weakly, the
+                caller keeps it alive while the calibration is used.
+            calibration: Calibration to use instead of reading it from the device (eg. of a recording).
+            persist: Store the calibration by MxId, and use the stored calibration on the next starts.
+        """
+        self._device_ref = weakref.ref(device) if device is not None else None
+        self._handler = calibration
+        self._from_device = calibration is None
+        self._persist = persist
+        self._lock = Lock()
+        self._memo: Dict[Hashable, Any] = dict()
+
+    @classmethod
+    def of(cls, device: dai.Device) -> 'DeviceCalibration':
+        """
+        Returns the calibration of the device, shared by everything that uses the device.
+        """
+        with cls._devices_lock:
+            calibration = cls._devices.get(device)
+            if calibration is None:
+                calibration = cls._devices[device] = cls(device)
+            return calibration
+
+    @classmethod
+    def register(cls, device: dai.Device, calibration: 'DeviceCalibration') -> 'DeviceCalibration':
+        """
+        Sets the calibration returned by of() for the device.
+        """
+        with cls._devices_lock:
+            cls._devices[device] = calibration
+        return calibration
+
+    @classmethod
+    def release(cls, device: dai.Device) -> None:
+        """
+        Forgets the calibration of the device, called when the device is closed.
+        """
+        with cls._devices_lock:
+            cls._devices.pop(device, None)
+
+    def _get_device(self) -> Optional[dai.Device]:
+        return self._device_ref() if self._device_ref is not None else None
+
+    @property
+    def handler(self) -> Optional[dai.CalibrationHandler]:
+        """
+        Calibration handler of the device, the EEPROM is read on the first access.
+        """
+        with self._lock:
+            device = self._get_device()
+            if self._handler is None and device is not None:
+                self._handler = self._read(device)
+            return self._handler
+
+    def _read(self, device: dai.Device) -> dai.CalibrationHandler:
+        path = self._persisted_path(device) if self._persist else None
+        if path is not None and path.exists():
+            try:
+                return dai.CalibrationHandler(str(path))
+            except RuntimeError as e:
+                LOGGER.warning(f"Couldn't load the stored calibration {path}, reading the device: {e}")
+
+        calibration = device.readCalibration()
+        if path is not None:
+            try:
+                CALIBRATION_PATH.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_suffix('.tmp')
+                calibration.eepromToJsonFile(str(tmp_path))
+                os.replace(str(tmp_path), str(path))
+            except (OSError, RuntimeError) as e:
+                LOGGER.warning(f"Couldn't store the calibration to {path}: {e}")
+        return calibration
+
+    @staticmethod
+    def _persisted_path(device: dai.Device) -> Path:
+        return CALIBRATION_PATH / f'{device.getMxId()}.json'
+
+    def clear_persisted(self) -> None:
+        """
+        Removes the stored calibration of the device and the memoized data, so the EEPROM is read again.
+        """
+        device = self._get_device()
+        if device is None or not self._from_device:
+            return
+        path = self._persisted_path(device)
+        if path.exists():
+            path.unlink()
+        with self._lock:
+            self._handler = None
+            self._memo.clear()
+
+    def _memoize(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._memo:
+                return self._memo[key]
+        value = fn()
+        with self._lock:
+            return self._memo.setdefault(key, value)
+
+    def eeprom(self) -> dai.EepromData:
+        return self._memoize('eeprom', lambda: self.handler.getEepromData())
+
+    def stereo_left(self) -> dai.CameraBoardSocket:
+        return self._memoize('stereo_left', lambda: self.handler.getStereoLeftCameraId())
+
+    def stereo_right(self) -> dai.CameraBoardSocket:
+        return self._memoize('stereo_right', lambda: self.handler.getStereoRightCameraId())
+
+    def intrinsics(self, socket: dai.CameraBoardSocket, width: int = -1, height: int = -1) -> np.ndarray:
+        """
+        3x3 camera matrix of the camera, scaled to the resolution (calibration resolution by default).
+        """
+        return self._memoize(('intrinsics', socket, width, height),
+                             lambda: _read_only(np.array(self.handler.getCameraIntrinsics(socket, width, height))))
+
+    def distortion(self, socket: dai.CameraBoardSocket) -> np.ndarray:
+        return self._memoize(('distortion', socket),
+                             lambda: _read_only(np.array(self.handler.getDistortionCoefficients(socket))))
+
+    def fov(self, socket: dai.CameraBoardSocket) -> float:
+        return self._memoize(('fov', socket), lambda: self.handler.getFov(socket))
+
+    def baseline(self,
+                 left: Optional[dai.CameraBoardSocket] = None,
+                 right: Optional[dai.CameraBoardSocket] = None,
+                 use_spec_translation: bool = True) -> float:
+        """
+        Distance between the cameras (stereo pair by default) in cm.
+        """
+        left = self.stereo_left() if left is None else left
+        right = self.stereo_right() if right is None else right
+        return self._memoize(('baseline', left, right, use_spec_translation),
+                             lambda: self.handler.getBaselineDistance(cam1=left,
+                                                                      cam2=right,
+                                                                      useSpecTranslation=use_spec_translation))
+
+    def xyz(self, width: int, height: int, socket: dai.CameraBoardSocket = dai.CameraBoardSocket.RIGHT) -> np.ndarray:
+        """
+        HxWx3 grid of rays (x, y, 1) through the pixels of the camera at the resolution, depth multiplied by the grid
+        gives the point cloud.
+        """
+        return self._memoize(('xyz', socket, width, height),
+                             lambda: _read_only(_create_xyz(self.intrinsics(socket, width, height), width, height)))
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    # Memoized arrays are shared, so they must not be modified in-place
+    array.flags.writeable = False
+    return array
+
+
+def _create_xyz(camera_matrix: np.ndarray, width: int, height: int) -> np.ndarray:
+    camera_matrix = camera_matrix.astype(np.float32)  # float32 grid
+    xs = np.linspace(0, width - 1, width, dtype=np.float32)
+    ys = np.linspace(0, height - 1, height, dtype=np.float32)
+
+    # generate grid by stacking coordinates
+    base_grid = np.stack(np.meshgrid(xs, ys))  # WxHx2
+    points_2d = base_grid.transpose(1, 2, 0)  # 1xHxWx2
+
+    # unpack coordinates
+    u_coord: np.array = points_2d[..., 0]
+    v_coord: np.array = points_2d[..., 1]
+
+    # unpack intrinsics
+    fx: np.array = camera_matrix[0, 0]
+    fy: np.array = camera_matrix[1, 1]
+    cx: np.array = camera_matrix[0, 2]
+    cy: np.array = camera_matrix[1, 2]
+
+    # projective
+    x_coord: np.array = (u_coord - cx) / fx
+    y_coord: np.array = (v_coord - cy) / fy
+
+    xyz = np.stack([x_coord, y_coord], axis=-1)
+    return np.pad(xyz, ((0, 0), (0, 0), (0, 1)), "constant", constant_values=1.0)
@@ -1,23 +1,49 @@
 import numpy as np
 import cv2
-import random
 from typing import Tuple
-import open3d as o3d
 import json
 from depthai_sdk.logger import LOGGER
 
+try:
+    import open3d as o3d
+except ImportError:
+    o3d = None
+
 N_POINTS_SAMPLED_PLANE = 3
 MAX_ITER_PLANE = 300
+RANSAC_BATCH = 32  # Candidate planes evaluated at once
+
 
 class BoxEstimator:
-    def __init__(self, median_window=3, calib_json_path: str = None, threshold=50):
+    def __init__(self, median_window=3, calib_json_path: str = None, threshold=50, voxel_size=10,
+                 min_voxel_occupancy=0.1, use_open3d=False):
         """
         Box estimator helper class. Currently it's applicable for scanning only one box at a time.
 
+        Points are processed as float32 NumPy arrays. Voxel downsampling keeps the centroid of every voxel, except voxels
+        with fewer points than min_voxel_occupancy times the median number of points per voxel. The criterion is
+        relative to the point density (distance, decimation), so only sparse outliers (flying pixels) are removed.
+        With use_open3d=True, open3d voxel downsampling and statistical outlier removal are used instead.
+
         Args:
+            median_window (int, optional): Number of last measurements the dimensions are median filtered over.
+            calib_json_path (str, optional): Ground plane calibration file. Defaults to plane_eq.json.
             threshold (int, optional): Distance threshold for plane fitting. Defaults to 50 mm.
+            voxel_size (int, optional): Voxel size for downsampling. Defaults to 10 mm.
+            min_voxel_occupancy (float, optional): Voxels with fewer points than this fraction of the median voxel
+                occupancy are removed as outliers, 0 keeps all voxels. Defaults to 0.1.
+            use_open3d (bool, optional): Use open3d for downsampling and outlier removal. Defaults to False.
         """
+        if use_open3d and o3d is None:
+            raise ImportError('open3d is not installed. Please install it with `pip install open3d`')
+        self.use_open3d = use_open3d
+        self.voxel_size = voxel_size
+        self.min_voxel_occupancy = min_voxel_occupancy
+        self._rng = np.random.default_rng()
+
         self.top_side_pcl = None
+        self.box_pcl = None
+        self.plane_pcl = None
 
         self.ground_plane_eq = None
         self.threshold = threshold
@@ -30,13 +56,10 @@ class BoxEstimator:
         self.rotation_matrix = None
         self.translate_vector = None
 
-        # Median filter
+        # Median filter, ring buffer of the last median_window dimensions
         self.median_window = median_window
-        self.prev_dimensions = []
-
-        self.pcd = o3d.geometry.PointCloud()
-        self.plane_pcd = o3d.geometry.PointCloud()
-        self.box_pcd = o3d.geometry.PointCloud()
+        self._dimensions = np.zeros((max(1, median_window), 3), dtype=np.float64)
+        self._n_dimensions = 0
 
         self.corners = None
 
@@ -58,12 +81,11 @@ class BoxEstimator:
         """
         Get outliers and inliers from a point cloud
         """
-        A,B,C,D = self.ground_plane_eq
-        # Calculate the denominator (constant for all points)
-        denominator = np.sqrt(A**2 + B**2 + C**2)
-        threshold = 45 # mm
-        distances = np.abs(A * points[:, 0] + B * points[:, 1] + C * points[:, 2] + D) / denominator
-        return (points[distances > self.threshold], points[distances <= self.threshold])
+        plane_eq = np.asarray(self.ground_plane_eq, dtype=np.float64)
+        plane_eq = plane_eq / np.linalg.norm(plane_eq[:3])
+        distances = np.abs(points @ plane_eq[:3].astype(points.dtype) + plane_eq[3])
+        inliers = distances <= self.threshold
+        return np.compress(~inliers, points, axis=0), np.compress(inliers, points, axis=0)
 
     def is_calibrated(self) -> bool:
         return self.ground_plane_eq is not None
@@ -78,13 +100,17 @@ class BoxEstimator:
         Returns:
             None
         """
-        pcd = o3d.geometry.PointCloud()
-        pcd.points = o3d.utility.Vector3dVector(points.reshape(-1, 3))
-        pcd = pcd.voxel_down_sample(voxel_size=10)
-        pcd = pcd.remove_statistical_outlier(30, 0.1)[0]
+        points = self._downsample(points)
+        if len(points) < N_POINTS_SAMPLED_PLANE:
+            LOGGER.error("Not enough points found. Please try again.")
+            return False
 
         # Get plane segmentation
-        plane_eq, plane_inliers = pcd.segment_plane(self.threshold, N_POINTS_SAMPLED_PLANE, MAX_ITER_PLANE)
+        if self.use_open3d:
+            pcd = o3d.geometry.PointCloud(o3d.utility.Vector3dVector(points.astype(np.float64)))
+            plane_eq, plane_inliers = pcd.segment_plane(self.threshold, N_POINTS_SAMPLED_PLANE, MAX_ITER_PLANE)
+        else:
+            plane_eq, plane_inliers = segment_plane(points, self.threshold, MAX_ITER_PLANE, self._rng)
         inlier_points_num = len(plane_inliers)
         inline_percentage = inlier_points_num / len(points)
         if inline_percentage < 0.8:
@@ -150,48 +176,52 @@ class BoxEstimator:
         return positions, indices, normals
 
     def process_points(self, points_roi: np.ndarray) -> Tuple:
-        self.pcd.points = o3d.utility.Vector3dVector(points_roi)
-        self.pcd = self.pcd.voxel_down_sample(voxel_size=10)
-        self.pcd = self.pcd.remove_statistical_outlier(30, 0.1)[0]
+        """
+        Estimates the box dimensions (median filtered) and its 3D corners from the point cloud (mm) of the ROI.
 
-        self.box_pcl, self.plane_pcl = self.get_outliers(np.asarray(self.pcd.points))
+        Returns:
+            (length, width, height), corners; or None, None if there's no box
+        """
+        points = self._downsample(points_roi)
+        self.box_pcl, self.plane_pcl = self.get_outliers(points)
 
         # Remove outliers
-        self.plane_pcd = self.plane_pcd.remove_statistical_outlier(30, 0.1)[0]
-        self.box_pcd = self.box_pcd.remove_statistical_outlier(30, 0.1)[0]
-
+        if self.use_open3d:
+            self.plane_pcl = self._remove_statistical_outlier(self.plane_pcl)
+            self.box_pcl = self._remove_statistical_outlier(self.box_pcl)
 
         if len(self.box_pcl) < 100:
             return None, None  # No box
 
         self.get_box_top(self.ground_plane_eq)
-        dimensions = self.get_dimensions()
-        self.prev_dimensions.append(dimensions)
+        self._add_dimensions(self.get_dimensions())
         corners = self.get_3d_corners()
         return self._filtered_dimensions(), corners
 
-    @property
-    def box_pcl(self):
-        return np.asarray(self.box_pcd.points)
-    @box_pcl.setter
-    def box_pcl(self, points):
-        self.box_pcd.points = o3d.utility.Vector3dVector(points)
-    @property
-    def plane_pcl(self):
-        return np.asarray(self.plane_pcd.points)
-    @plane_pcl.setter
-    def plane_pcl(self, points):
-        self.plane_pcd.points = o3d.utility.Vector3dVector(points)
+    def _downsample(self, points: np.ndarray) -> np.ndarray:
+        points = points.reshape(-1, 3)
+        points = np.compress(points[:, 2] > 0, points, axis=0)  # Invalid depth pixels are (0, 0, 0)
+        if not self.use_open3d:
+            return voxel_down_sample(points, self.voxel_size, self.min_voxel_occupancy)
 
-    def _filtered_dimensions(self):
-        # If too many dimensions, remove the oldest one
-        if len(self.prev_dimensions) > self.median_window:
-            self.prev_dimensions.pop(0)
+        pcd = o3d.geometry.PointCloud(o3d.utility.Vector3dVector(points.astype(np.float64)))
+        pcd = pcd.voxel_down_sample(voxel_size=self.voxel_size)
+        pcd = pcd.remove_statistical_outlier(30, 0.1)[0]
+        return np.asarray(pcd.points, dtype=np.float32)
+
+    def _remove_statistical_outlier(self, points: np.ndarray) -> np.ndarray:
+        pcd = o3d.geometry.PointCloud(o3d.utility.Vector3dVector(points.astype(np.float64)))
+        pcd = pcd.remove_statistical_outlier(30, 0.1)[0]
+        return np.asarray(pcd.points, dtype=np.float32)
 
+    def _add_dimensions(self, dimensions):
+        # Overwrites the oldest dimensions once the window is full
+        self._dimensions[self._n_dimensions % len(self._dimensions)] = dimensions
+        self._n_dimensions += 1
+
+    def _filtered_dimensions(self):
         # Get median of the dimensions
-        length = np.median([d[0] for d in self.prev_dimensions])
-        width = np.median([d[1] for d in self.prev_dimensions])
-        height = np.median([d[2] for d in self.prev_dimensions])
+        length, width, height = np.median(self._dimensions[:min(self._n_dimensions, len(self._dimensions))], axis=0)
         return length, width, height
 
 
@@ -208,15 +238,16 @@ class BoxEstimator:
 
     def get_box_top(self, plane_eq):
         rot_matrix = self.create_rotation_matrix(plane_eq[0:3], [0, 0, 1])
-        self.plane_pcl = self.rotate_points(self.plane_pcl, rot_matrix)
-        avg_z = np.average(self.plane_pcl[:, 2])
+        # Average z of the rotated plane points, without rotating them first
+        avg_z = rot_matrix[2] @ self.plane_pcl.mean(axis=0, dtype=np.float64)
 
         translate_vector = [0, 0, -avg_z]
         self.translate_vector = np.array(translate_vector)
 
-        self.plane_pcl = self.translate_points(self.plane_pcl, translate_vector)
-        self.box_pcl = self.rotate_points(self.box_pcl, rot_matrix)
-        self.box_pcl = self.translate_points(self.box_pcl, translate_vector)
+        rot_matrix = rot_matrix.astype(np.float32)
+        translate_vector = self.translate_vector.astype(np.float32)
+        self.plane_pcl = self.translate_points(self.rotate_points(self.plane_pcl, rot_matrix), translate_vector)
+        self.box_pcl = self.translate_points(self.rotate_points(self.box_pcl, rot_matrix), translate_vector)
 
         top_plane_eq, top_plane_inliers = self.fit_plane_vec_constraint([0, 0, 1], self.box_pcl, 3, 30)
 
@@ -228,7 +259,7 @@ class BoxEstimator:
 
     def get_dimensions(self):
         upper_plane_points = self.top_side_pcl
-        coordinates = np.c_[upper_plane_points[:, 0], upper_plane_points[:, 1]].astype('float32')
+        coordinates = np.ascontiguousarray(upper_plane_points[:, :2], dtype=np.float32)
         rect = cv2.minAreaRect(coordinates)
         self.bounding_box = cv2.boxPoints(rect)
         self.width, self.length = rect[1][0], rect[1][1]
@@ -266,20 +297,22 @@ class BoxEstimator:
         return box_points
 
     def fit_plane_vec_constraint(self, norm_vec, pts, thresh=0.05, n_iterations=300):
-        best_eq = []
-        best_inliers = []
-
-        n_points = pts.shape[0]
-        for _ in range(n_iterations):
-            id_sample = random.sample(range(0, n_points), 1)
-            point = pts[id_sample]
-            d = -np.sum(np.multiply(norm_vec, point))
-            plane_eq = [*norm_vec, d]
-            pt_id_inliers = self.get_plane_inliers(plane_eq, pts, thresh)
-            if len(pt_id_inliers) > len(best_inliers):
-                best_eq = plane_eq
-                best_inliers = pt_id_inliers
-
+        """
+        RANSAC fit of a plane with the normal norm_vec, through one of n_iterations randomly sampled points. All
+        candidate planes are evaluated at once: inliers of a candidate are counted with a binary search of the
+        candidate's offset along the normal in the sorted offsets of the points.
+        """
+        norm_vec = np.asarray(norm_vec, dtype=pts.dtype)
+        offsets = pts @ norm_vec
+        sorted_offsets = np.sort(offsets)
+        candidates = offsets[self._rng.integers(0, len(pts), n_iterations)]
+        margin = thresh * np.linalg.norm(norm_vec)
+        counts = (np.searchsorted(sorted_offsets, candidates + margin, side='right')
+                  - np.searchsorted(sorted_offsets, candidates - margin, side='left'))
+        best = candidates[np.argmax(counts)]
+
+        best_eq = [*norm_vec.tolist(), -float(best)]
+        best_inliers = np.flatnonzero(np.abs(offsets - best) <= margin)
         return best_eq, best_inliers
 
     def get_plane_inliers(self, plane_eq, pts, thresh=0.05):
@@ -297,4 +330,57 @@ class BoxEstimator:
         return np.dot(points, rotation_matrix.T)
 
     def translate_points(self, points, translate_vector):
-        return points + translate_vector
\ No newline at end of file
+        return points + translate_vector
+
+
+def voxel_down_sample(points: np.ndarray, voxel_size: float, min_occupancy: float = 0.0) -> np.ndarray:
+    """
+    Downsamples the Nx3 points to the centroids (float32) of the points in each voxel. Voxels with fewer points than
+    min_occupancy times the median number of points per voxel are dropped.
+    """
+    if len(points) == 0:
+        return np.empty((0, 3), dtype=np.float32)
+    voxels = np.floor(np.multiply(points, np.float32(1 / voxel_size))).astype(np.int64)
+    # Per column, reductions along axis 0 of Nx3 arrays are slow
+    low = [voxels[:, axis].min() for axis in range(3)]
+    dims = [voxels[:, axis].max() - low[axis] + 1 for axis in range(3)]
+    keys = ((voxels[:, 0] - low[0]) * dims[1] + (voxels[:, 1] - low[1])) * dims[2] + (voxels[:, 2] - low[2])
+
+    # Points of a voxel are consecutive after sorting by the voxel key
+    order = np.argsort(keys)
+    keys = np.take(keys, order)
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    counts = np.diff(np.append(starts, len(keys)))
+    sums = np.add.reduceat(np.take(points, order, axis=0), starts, axis=0, dtype=np.float64)
+    keep = counts >= min_occupancy * np.median(counts)
+    return np.compress(keep, sums / counts[:, None], axis=0).astype(np.float32)
+
+
+def segment_plane(points: np.ndarray, threshold: float, n_iterations: int, rng: np.random.Generator
+                  ) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    RANSAC plane fit through 3 randomly sampled points, RANSAC_BATCH candidate planes are evaluated at once.
+
+    Returns:
+        Plane equation (A, B, C, D) with a unit normal, and indices of the inlier points
+    """
+    best_eq, best_count = None, -1
+    for start in range(0, n_iterations, RANSAC_BATCH):
+        samples = points[rng.integers(0, len(points), (min(RANSAC_BATCH, n_iterations - start), 3))].astype(np.float64)
+        normals = np.cross(samples[:, 1] - samples[:, 0], samples[:, 2] - samples[:, 0])
+        norms = np.linalg.norm(normals, axis=1)
+        valid = norms > 0  # Collinear samples don't define a plane
+        if not valid.any():
+            continue
+        normals = normals[valid] / norms[valid, None]
+        ds = -np.einsum('ij,ij->i', normals, samples[valid, 0])
+
+        counts = np.count_nonzero(np.abs(points @ normals.T + ds) <= threshold, axis=0)
+        i = np.argmax(counts)
+        if counts[i] > best_count:
+            best_eq, best_count = np.append(normals[i], ds[i]), counts[i]
+
+    if best_eq is None:
+        return np.zeros(4), np.empty(0, dtype=np.int64)
+    inliers = np.flatnonzero(np.abs(points @ best_eq[:3] + best_eq[3]) <= threshold)
+    return best_eq, inliers
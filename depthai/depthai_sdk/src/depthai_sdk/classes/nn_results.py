@@ -90,6 +90,16 @@ class Detections(GenericNNOutput):
         self.detections: List[ExtendedImgDetection] = []
         self.is_rotated = is_rotated
 
+    def add(self, label: int, confidence: float, bbox: Tuple[float, float, float, float]) -> None:
+        """
+        Adds a detection decoded on the host, with bbox as normalized (xmin, ymin, xmax, ymax).
+        """
+        det = dai.ImgDetection()
+        det.label = int(label)
+        det.confidence = float(confidence)
+        det.xmin, det.ymin, det.xmax, det.ymax = (float(v) for v in bbox)
+        self.detections.append(det)
+
 
 @dataclass
 class SemanticSegmentation(GenericNNOutput):  # In core, extend from NNData
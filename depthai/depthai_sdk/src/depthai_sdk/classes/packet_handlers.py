@@ -56,19 +56,28 @@ class BasePacketHandler:
 
     def configure_syncing(self,
                           enable_sync: bool = True,
-                          threshold_ms: int = 17):
+                          threshold_ms: int = 17,
+                          max_queue_size: int = 30):
         """
         If multiple outputs are used, then PacketHandler can do timestamp syncing of multiple packets
         before calling new_packet().
         Args:
             enable_sync: If True, then syncing is enabled.
             threshold_ms: Maximum time difference between packets in milliseconds.
+            max_queue_size: Maximum number of packets buffered per output while waiting to be synced.
         """
         if enable_sync:
             if len(self.outputs) < 2:
                 LOGGER.error('Syncing requires at least 2 outputs! Skipping syncing.')
                 return
-            self.sync = TimestampSync(len(self.outputs), threshold_ms)
+            self.sync = TimestampSync(len(self.outputs), threshold_ms, max_queue_size)
+
+    def get_sync_stats(self) -> Optional[Dict]:
+        """
+        Returns syncing statistics (synced count, buffered and dropped packets per output), or None if syncing
+        isn't enabled.
+        """
+        return self.sync.get_stats() if self.sync is not None else None
 
     def _poll(self):
         """
@@ -194,6 +203,12 @@ class RecordPacketHandler(BasePacketHandler):
     def new_packet(self, packet: BasePacket):
         self.recorder.write(packet)
 
+    def get_record_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns per-stream recording statistics (queue size, written/dropped frames, write latency).
+        """
+        return self.recorder.get_stats()
+
     def close(self):
         self.recorder.close()
 
@@ -229,15 +244,17 @@ class QueuePacketHandler(BasePacketHandler):
 
     def configure_syncing(self,
                           enable_sync: bool = True,
-                          threshold_ms: int = 17) -> 'QueuePacketHandler':
+                          threshold_ms: int = 17,
+                          max_queue_size: int = 30) -> 'QueuePacketHandler':
         """
         If multiple outputs are used, then PacketHandler can do timestamp syncing of multiple packets
         before calling new_packet().
         Args:
             enable_sync: If True, then syncing is enabled.
             threshold_ms: Maximum time difference between packets in milliseconds.
+            max_queue_size: Maximum number of packets buffered per output while waiting to be synced.
         """
-        super().configure_syncing(enable_sync, threshold_ms)
+        super().configure_syncing(enable_sync, threshold_ms, max_queue_size)
         return self
 
     def new_packet(self, packet):
@@ -120,10 +120,12 @@ class DisparityPacket(FramePacket):
                  colorize: StereoColor = None,
                  colormap: int = None,
                  aligned_frame: Optional[dai.ImgFrame] = None,
-                 confidence_map: Optional[np.ndarray] = None
+                 confidence_map: Optional[np.ndarray] = None,
+                 colorizer=None
                  ):
         """
-        disparity_map might be filtered, eg. if WLS filter is enabled
+        disparity_map might be filtered, eg. if WLS filter is enabled. colorizer (DepthColorizer) is shared by the
+        packets of the same output, it's used for RGB colorization of integer frames.
         """
         super().__init__(name=name, msg=img)
         self.aligned_frame = aligned_frame
@@ -131,6 +133,7 @@ class DisparityPacket(FramePacket):
         self.multiplier = multiplier
         self.colorize = colorize
         self.colormap = colormap
+        self.colorizer = colorizer
 
         self.confidence_map = confidence_map
         self.depth_score = None
@@ -145,15 +148,11 @@ class DisparityPacket(FramePacket):
         else:
             self.msg.getFrame()
 
-    def get_colorized_frame(self, visualizer) -> np.ndarray:
-        frame = self.get_disparity()
-        colorized_disp = frame * self.multiplier
-
-        try:
-            aligned_frame = self.aligned_frame.getCvFrame()
-        except AttributeError:
-            aligned_frame = None
-
+    def get_colorized_frame(self, visualizer, copy: bool = True) -> np.ndarray:
+        """
+        Colorized disparity frame. With copy=False, RGB colorization may return the colorizer's reused output buffer,
+        which is overwritten by the colorization of later packets (for immediate display only).
+        """
         stereo_config = visualizer.config.stereo
 
         colorize = self.colorize or stereo_config.colorize
@@ -163,6 +162,19 @@ class DisparityPacket(FramePacket):
             colormap = stereo_config.colormap
             colormap[0] = [0, 0, 0]  # Invalidate pixels 0 to be black
 
+        if colorize == StereoColor.RGB and self.colorizer is not None:
+            colorized_disp = self._colorize_lut(colormap)
+            if colorized_disp is not None:
+                return colorized_disp.copy() if copy else colorized_disp
+
+        frame = self.get_disparity()
+        colorized_disp = frame * self.multiplier
+
+        try:
+            aligned_frame = self.aligned_frame.getCvFrame()
+        except AttributeError:
+            aligned_frame = None
+
         if aligned_frame is not None and colorized_disp.ndim == 2 and aligned_frame.ndim == 3:
             colorized_disp = colorized_disp[..., np.newaxis]
 
@@ -176,6 +188,17 @@ class DisparityPacket(FramePacket):
             )
         return colorized_disp
 
+    def _colorize_lut(self, colormap) -> Optional[np.ndarray]:
+        """
+        Same as RGB colorization, with the lookup tables of the colorizer. Returns None for non-integer frames.
+        """
+        frame = self.get_disparity()
+        if frame is None or frame.dtype not in (np.uint8, np.uint16):
+            return None
+        self.colorizer.set_colormap(colormap)
+        self.colorizer.set_scale(self.multiplier)
+        return self.colorizer.colorize(frame)
+
 
 class DepthPacket(FramePacket):
     def __init__(self, name: str,
@@ -192,7 +215,8 @@ class DisparityDepthPacket(DisparityPacket):
                  colormap: int = None,
                  aligned_frame: Optional[dai.ImgFrame] = None,
                  disp_scale_factor=255 / 95,
-                 confidence_map=None
+                 confidence_map=None,
+                 colorizer=None
                  ):
         # DepthPacket.__init__(self, name=name, msg=img_frame)
         super().__init__(
@@ -203,7 +227,8 @@ class DisparityDepthPacket(DisparityPacket):
             colorize=colorize,
             colormap=colormap,
             aligned_frame=aligned_frame,
-            confidence_map=confidence_map
+            confidence_map=confidence_map,
+            colorizer=colorizer
         )
         self.disp_scale_factor = disp_scale_factor
 
@@ -213,6 +238,18 @@ class DisparityDepthPacket(DisparityPacket):
         disparity[disparity == np.inf] = 0
         return disparity
 
+    def _colorize_lut(self, colormap) -> Optional[np.ndarray]:
+        # Depth -> disparity conversion is folded into the lookup table, so there's no per-pixel division
+        def depth_to_index(depth: np.ndarray) -> np.ndarray:
+            with np.errstate(divide='ignore'):
+                index = self.disp_scale_factor / depth * self.multiplier
+            index[0] = 0
+            return index
+
+        self.colorizer.set_colormap(colormap)
+        self.colorizer.set_lut(depth_to_index, key=('depth', self.disp_scale_factor, self.multiplier))
+        return self.colorizer.colorize(self.msg.getFrame())
+
     # def get_colorized_frame(self, visualizer) -> np.ndarray:
     # Convert depth to disparity for nicer visualization
 
@@ -222,10 +259,21 @@ class PointcloudPacket(BasePacket):
                  name: str,
                  points: np.ndarray,
                  depth_map: dai.ImgFrame,
-                 colorize_frame: Optional[dai.ImgFrame]):
+                 colorize_frame: Union[None, dai.ImgFrame, np.ndarray],
+                 colors: Optional[np.ndarray] = None):
+        """
+        Args:
+            points: Points (float32, mm), HxWx3 grid or Nx3 array of valid points only.
+            depth_map: Depth frame the points were projected from.
+            colorize_frame: Color frame (BGR) aligned to the depth frame.
+            colors: RGB (uint8) colors of the points, same layout as the points.
+        """
         super().__init__(name=name)
         self.points = points
-        self.colorize_frame = colorize_frame.getCvFrame() if colorize_frame is not None else None
+        self.colors = colors
+        if isinstance(colorize_frame, dai.ImgFrame):
+            colorize_frame = colorize_frame.getCvFrame()
+        self.colorize_frame = colorize_frame
         self.depth_map = depth_map
 
     def get_sequence_num(self) -> int:
@@ -240,6 +288,8 @@ class PointcloudPacket(BasePacket):
 
         Returns: Cropped section of the point cloud
         """
+        if self.points.ndim != 3:
+            raise ValueError('Compact (Nx3) point clouds can\'t be cropped, only HxWx3 point grids')
         x1, y1, x2, y2 = bb.to_tuple(self.points.shape)
         return self.points[y1:y2, x1:x2]
 
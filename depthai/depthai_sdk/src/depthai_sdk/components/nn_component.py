@@ -321,10 +321,13 @@ class NNComponent(Component):
         if 'handler' in self._config:
             self._handler = loadModule(model_config.parent / self._config["handler"])
 
-            if not callable(getattr(self._handler, "decode", None)):
+            decode = getattr(self._handler, "decode", None)
+            if not callable(decode):
                 LOGGER.debug("Custom model handler does not contain 'decode' method!")
             else:
-                self._decode_fn = self._handler.decode if self._decode_fn is None else self._decode_fn
+                if isinstance(decode, DecodeHandler):
+                    decode.prepare(self._config)  # Precompute handler's state once, before any NN results arrive
+                self._decode_fn = decode if self._decode_fn is None else self._decode_fn
 
         if 'nn_config' in self._config:
             nn_config = self._config.get("nn_config", {})
@@ -1,7 +1,7 @@
 import importlib
 import os
 from pathlib import Path
-from typing import Dict, Union
+from typing import Any, Dict, Optional, Union
 
 import requests
 
@@ -30,6 +30,57 @@ def getBlob(url: str) -> Path:
     return filePath
 
 
+class DecodeHandler:
+    """
+    Base class for NN decoding handlers (handler.py) that need precomputed state, eg. anchors, lookup tables,
+    colormaps or preallocated output buffers. The state is created once in `setup()` and reused by `decode()`
+    for every NN result, instead of being rebuilt on each call.
+
+    Handler module exposes an instance as `decode`, so it's called the same way as a plain decode function:
+
+        class PalmDetectionHandler(DecodeHandler):
+            def setup(self, config):
+                self.anchors = np.load('anchors.npy')
+
+            def decode(self, nn_data):
+                ...
+
+        decode = PalmDetectionHandler()
+    """
+
+    def __init__(self):
+        self.config: Dict = {}
+        self._is_setup = False
+
+    def setup(self, config: Dict) -> None:
+        """
+        Creates the state reused across decode() calls. Called only once.
+
+        Args:
+            config: Model's JSON config, empty if the handler is used without it.
+        """
+        pass
+
+    def prepare(self, config: Optional[Dict] = None) -> None:
+        """
+        Calls setup() if it wasn't called yet. NNComponent prepares handlers when the model config is loaded,
+        otherwise it's done lazily on the first decode.
+        """
+        if self._is_setup:
+            return
+        self.config = config or {}
+        self.setup(self.config)
+        self._is_setup = True
+
+    def decode(self, nn_data) -> Any:
+        raise NotImplementedError
+
+    def __call__(self, nn_data) -> Any:
+        if not self._is_setup:
+            self.prepare()
+        return self.decode(nn_data)
+
+
 # Copied from utils.py - remove that once DepthAI Demo is deprecated
 def loadModule(path: Path):
     """
@@ -0,0 +1,214 @@
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+__all__ = ['OpenPoseDecoder', 'POSE_PAIRS', 'MAP_IDX', 'N_POINTS']
+
+N_POINTS = 18
+POSE_PAIRS = [
+    [1, 2], [1, 5], [2, 3], [3, 4], [5, 6], [6, 7], [1, 8], [8, 9], [9, 10], [1, 11],
+    [11, 12], [12, 13], [1, 0], [0, 14], [14, 16], [0, 15], [15, 17], [2, 17], [5, 16]
+]
+# PAF channels of each pose pair, in the concatenated (heatmaps + PAFs) NN output
+MAP_IDX = [
+    [31, 32], [39, 40], [33, 34], [35, 36], [41, 42], [43, 44], [19, 20], [21, 22], [23, 24], [25, 26],
+    [27, 28], [29, 30], [47, 48], [49, 50], [53, 54], [51, 52], [55, 56], [37, 38], [45, 46]
+]
+N_HEATMAPS = 19
+
+Keypoint = Tuple[int, int, float, int]  # x, y, probability, keypoint id
+
+
+class OpenPoseDecoder:
+    """
+    Vectorized OpenPose decoder (keypoint heatmaps + part affinity fields), equivalent to the per-blob/per-pair
+    loop decoding of the pose handlers:
+
+    - Heatmaps without values above the threshold are skipped. Keypoints are non-maximum suppressed within each
+      blob above the threshold (connected components) with array operations, which gives one peak per blob.
+    - PAFs aren't upscaled; they are bilinearly sampled at the interpolation points only, with the same sampling
+      as cv2.resize(INTER_LINEAR) to the input size.
+    - All candidate pairs of a pose pair (n_a x n_b x n_interp_samples) are scored with array operations.
+    """
+
+    def __init__(self,
+                 input_size: Tuple[int, int],
+                 output_size: Tuple[int, int],
+                 threshold: float = 0.3,
+                 n_interp_samples: int = 10,
+                 paf_score_th: float = 0.2,
+                 conf_th: float = 0.4):
+        """
+        Args:
+            input_size: NN input size (width, height), keypoints are decoded at this resolution.
+            output_size: Size of the heatmaps/PAFs (width, height).
+            threshold: Keypoint probability threshold.
+            n_interp_samples: Number of PAF samples along each candidate limb.
+            paf_score_th: PAF score threshold of a sample.
+            conf_th: Min ratio of samples above paf_score_th for a limb to be valid.
+        """
+        self.w, self.h = input_size
+        self.threshold = threshold
+        self.n_interp_samples = n_interp_samples
+        self.paf_score_th = paf_score_th
+        self.conf_th = conf_th
+
+        # Lookups for sampling low-res PAFs at integer input-size coordinates, same as cv2.resize(INTER_LINEAR)
+        out_w, out_h = output_size
+        self._x0, self._x1, self._fx = self._linear_lookup(self.w, out_w)
+        self._y0, self._y1, self._fy = self._linear_lookup(self.h, out_h)
+
+        self._pose_pairs = np.array(POSE_PAIRS)
+        self._paf_idx = np.array(MAP_IDX) - N_HEATMAPS  # PAF channels, without heatmaps
+        # Preallocated buffers for the upscaled heatmap of a part
+        self._prob_map = np.empty((self.h, self.w), dtype=np.float32)
+        self._smooth = np.empty_like(self._prob_map)
+        self._mask = np.empty((self.h, self.w), dtype=bool)
+
+    @staticmethod
+    def _linear_lookup(dst_size: int, src_size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        src = (np.arange(dst_size) + 0.5) * (src_size / dst_size) - 0.5
+        src = np.clip(src, 0, src_size - 1)
+        i0 = np.floor(src).astype(np.int64)
+        i1 = np.minimum(i0 + 1, src_size - 1)
+        return i0, i1, (src - i0).astype(np.float32)
+
+    def decode(self, heatmaps: np.ndarray, pafs: np.ndarray) -> Tuple[List[List[Keypoint]], np.ndarray, np.ndarray]:
+        """
+        Args:
+            heatmaps: Keypoint heatmaps, shape (>= 18, out_h, out_w).
+            pafs: Part affinity fields, shape (38, out_h, out_w).
+
+        Returns:
+            Detected keypoints (list of (x, y, prob, id) per part), personwise keypoints (N, 19) with keypoint ids
+            of each part (-1 if missing) and total score, and the list of all keypoints (K, 3) as (x, y, prob).
+        """
+        detected_keypoints, keypoints_list = self.get_keypoints(heatmaps)
+        valid_pairs, invalid_pairs = self.get_valid_pairs(pafs, detected_keypoints)
+        personwise_keypoints = self.get_personwise_keypoints(valid_pairs, invalid_pairs, keypoints_list)
+        return detected_keypoints, personwise_keypoints, keypoints_list
+
+    def get_keypoints(self, heatmaps: np.ndarray) -> Tuple[List[List[Keypoint]], np.ndarray]:
+        detected_keypoints = []
+        keypoints_list = []
+        keypoint_id = 0
+        for part in range(N_POINTS):
+            keypoints = []
+            detected_keypoints.append(keypoints)
+            # Upscaling and blurring don't increase the maximum, so parts without any value above the
+            # threshold can be skipped early
+            low_res = np.ascontiguousarray(heatmaps[part], dtype=np.float32)
+            if low_res.max() <= self.threshold:
+                continue
+
+            prob_map = cv2.resize(low_res, (self.w, self.h), dst=self._prob_map)
+            smooth = cv2.GaussianBlur(prob_map, (3, 3), 0, dst=self._smooth, sigmaY=0)
+            np.greater(smooth, self.threshold, out=self._mask)
+            n_blobs, labels = cv2.connectedComponents(self._mask.view(np.uint8), connectivity=8)
+            if n_blobs <= 1:
+                continue
+
+            # Non-maximum suppression within each blob: sort by blob, then by descending value (stable, so the
+            # first of equal maxima is kept, same as cv2.minMaxLoc)
+            pixels = np.flatnonzero(self._mask)
+            blob = labels.ravel()[pixels]
+            order = np.lexsort((-smooth.ravel()[pixels], blob))
+            first = np.flatnonzero(np.diff(blob[order], prepend=0))
+            peaks = pixels[order[first]][::-1]  # Same order as cv2.findContours returns blobs
+
+            ys, xs = np.divmod(peaks, self.w)
+            for x, y, prob in zip(xs.tolist(), ys.tolist(), prob_map[ys, xs]):
+                keypoints.append((x, y, prob, keypoint_id))
+                keypoints_list.append((x, y, prob))
+                keypoint_id += 1
+
+        return detected_keypoints, np.array(keypoints_list, dtype=np.float64).reshape(-1, 3)
+
+    def _sample(self, paf: np.ndarray, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        x0, x1, fx = self._x0[xs], self._x1[xs], self._fx[xs]
+        y0, y1, fy = self._y0[ys], self._y1[ys], self._fy[ys]
+        top = paf[y0, x0] * (1 - fx) + paf[y0, x1] * fx
+        bottom = paf[y1, x0] * (1 - fx) + paf[y1, x1] * fx
+        return top * (1 - fy) + bottom * fy
+
+    def get_valid_pairs(self,
+                        pafs: np.ndarray,
+                        detected_keypoints: List[List[Keypoint]]) -> Tuple[List[np.ndarray], List[int]]:
+        """
+        For each pose pair, returns (n, 3) array of (keypoint id A, keypoint id B, score) - best scoring B for
+        each A, and the list of pose pairs without candidates.
+        """
+        valid_pairs = []
+        invalid_pairs = []
+
+        for k, (part_a, part_b) in enumerate(self._pose_pairs):
+            cand_a = detected_keypoints[part_a]
+            cand_b = detected_keypoints[part_b]
+            if len(cand_a) == 0 or len(cand_b) == 0:
+                invalid_pairs.append(k)
+                valid_pairs.append(np.zeros((0, 3)))
+                continue
+
+            a = np.array([c[:2] for c in cand_a], dtype=np.float64)[:, None, :]  # (n_a, 1, 2)
+            b = np.array([c[:2] for c in cand_b], dtype=np.float64)[None, :, :]  # (1, n_b, 2)
+            d = b - a
+            norm = np.linalg.norm(d, axis=-1)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                unit = d / norm[..., None]
+
+            # Interpolation points along each candidate limb, (n_a, n_b, n_interp_samples)
+            pts = np.rint(np.linspace(a, b, num=self.n_interp_samples, axis=-2)).astype(np.int64)
+            xs, ys = pts[..., 0], pts[..., 1]
+            paf_x = self._sample(pafs[self._paf_idx[k][0]], xs, ys)
+            paf_y = self._sample(pafs[self._paf_idx[k][1]], xs, ys)
+            scores = paf_x * unit[..., None, 0] + paf_y * unit[..., None, 1]
+
+            avg_scores = scores.mean(axis=-1)
+            valid = (norm > 0) \
+                    & ((scores > self.paf_score_th).sum(axis=-1) / self.n_interp_samples > self.conf_th) \
+                    & (avg_scores > -1)
+            avg_scores = np.where(valid, avg_scores, -np.inf)
+
+            best = np.argmax(avg_scores, axis=1)
+            found = valid.any(axis=1)
+            ids_a = np.array([c[3] for c in cand_a])
+            ids_b = np.array([c[3] for c in cand_b])
+            rows = np.flatnonzero(found)
+            valid_pairs.append(np.stack([ids_a[rows], ids_b[best[rows]], avg_scores[rows, best[rows]]], axis=-1)
+                               .astype(np.float64))
+
+        return valid_pairs, invalid_pairs
+
+    def get_personwise_keypoints(self,
+                                 valid_pairs: List[np.ndarray],
+                                 invalid_pairs: List[int],
+                                 keypoints_list: np.ndarray) -> np.ndarray:
+        """
+        Assembles valid pairs into people. Returns (N, 19) array with keypoint id of each part (-1 if missing),
+        and the total score of the person as the last column.
+        """
+        persons = -1 * np.ones((8, N_POINTS + 1))
+        n = 0
+
+        for k, pairs in enumerate(valid_pairs):
+            if k in invalid_pairs:
+                continue
+            index_a, index_b = POSE_PAIRS[k]
+
+            for part_a, part_b, score in pairs.tolist():
+                matches = np.flatnonzero(persons[:n, index_a] == part_a)
+                if len(matches):
+                    person = matches[0]
+                    persons[person, index_b] = part_b
+                    persons[person, -1] += keypoints_list[int(part_b), 2] + score
+
+                elif k < 17:
+                    if n == len(persons):
+                        persons = np.vstack([persons, -1 * np.ones_like(persons)])
+                    persons[n, index_a] = part_a
+                    persons[n, index_b] = part_b
+                    persons[n, -1] = keypoints_list[int(part_a), 2] + keypoints_list[int(part_b), 2] + score
+                    n += 1
+
+        return persons[:n]
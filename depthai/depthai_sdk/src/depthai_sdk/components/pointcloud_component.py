@@ -1,14 +1,16 @@
-from typing import Optional, Union, Any
+from typing import Optional, Union, Any, Dict, Tuple
 
 import depthai as dai
 
 from depthai_sdk.components.camera_component import CameraComponent
 from depthai_sdk.components.component import Component, ComponentOutput
+from depthai_sdk.components.pointcloud_helper import PointcloudProjector
 from depthai_sdk.components.stereo_component import StereoComponent
 from depthai_sdk.components.tof_component import ToFComponent
 from depthai_sdk.oak_outputs.xout.xout_base import XoutBase, StreamXout
 from depthai_sdk.oak_outputs.xout.xout_pointcloud import XoutPointcloud
 from depthai_sdk.replay import Replay
+from depthai_sdk.visualize.bbox import BoundingBox
 
 
 class PointcloudComponent(Component):
@@ -34,6 +36,7 @@ class PointcloudComponent(Component):
         self.colorize_comp: Optional[CameraComponent] = colorize
 
         self._replay: Optional[Replay] = replay
+        self._projector_args: Dict[str, Any] = dict()
 
         # Depth aspect
         if depth_input is None:
@@ -71,6 +74,30 @@ class PointcloudComponent(Component):
         elif isinstance(depth_input, dai.Node.Output):
             self.depth = depth_input
 
+    def config_pointcloud(self,
+                          decimation: Optional[int] = None,
+                          roi: Union[None, BoundingBox, Tuple[float, float, float, float]] = None,
+                          min_range: Optional[int] = None,
+                          max_range: Optional[int] = None,
+                          compact: Optional[bool] = None,
+                          buffers: Optional[int] = None) -> None:
+        """
+        Configures the host-side point cloud projection.
+
+        Args:
+            decimation: Only every decimation-th depth pixel (in both axes) is projected.
+            roi: Normalized (xmin, ymin, xmax, ymax) region of the depth frame that is projected.
+            min_range: Depth (mm) below which points are invalid.
+            max_range: Depth (mm) above which points are invalid.
+            compact: Output only the valid points as Nx3 array (and Nx3 colors), instead of the HxWx3 grid.
+            buffers: Number of reused output arrays (HxWx3 grids only). Packets are then overwritten by the buffers-th
+                next packet, use only if packets aren't kept (or queued) for longer. 0 (default) allocates new arrays
+                for each packet.
+        """
+        args = dict(decimation=decimation, roi=roi, min_range=min_range, max_range=max_range, compact=compact,
+                    buffers=buffers)
+        self._projector_args.update({name: value for name, value in args.items() if value is not None})
+
     def config_postprocessing(self) -> None:
         """
         Configures postprocessing options.
@@ -85,7 +112,8 @@ class PointcloudComponent(Component):
                     colorize = StreamXout(self._comp.colorize_comp.stream, name="Color")
                 return XoutPointcloud(device,
                                       StreamXout(self._comp.depth),
-                                      color_frames=colorize).set_comp_out(self)
+                                      color_frames=colorize,
+                                      projector=PointcloudProjector(**self._comp._projector_args)).set_comp_out(self)
 
         def __init__(self, component: 'PointcloudComponent'):
             self.pointcloud = self.PointcloudOut(component)
@@ -1,32 +1,145 @@
+from typing import List, Optional, Tuple, Union
+
+import cv2
 import depthai as dai
 import numpy as np
 
+from depthai_sdk.calibration import DeviceCalibration
+from depthai_sdk.visualize.bbox import BoundingBox
+
+
+def create_xyz(device: dai.Device, width: int, height: int) -> np.ndarray:
+    """
+    Grid of rays through the pixels of the right camera, shared by all users of the device (see
+    DeviceCalibration.xyz), so it must not be modified in-place.
+    """
+    return DeviceCalibration.of(device).xyz(width, height, dai.CameraBoardSocket.RIGHT)
+
+
+class PointcloudProjector:
+    """
+    Projects depth frames to point clouds (in depth units, mm) with the ray grid of the depth camera, as float32 and
+    without per-frame allocations of intermediate arrays. Decimation and ROI are applied to the depth frame before the
+    projection, so the skipped pixels cost nothing.
+
+    Points are either a dense HxWx3 grid (invalid points are 0), or only the valid points as compact Nx3 array.
+    Colors (RGB, uint8) of the points have the same layout.
+
+    With ``buffers`` > 0 the returned dense arrays are reused: they are overwritten by the ``buffers``-th next call,
+    copy them if they have to be kept longer. By default, and always in compact mode, new output arrays are returned.
+    Not thread-safe.
+    """
+
+    def __init__(self,
+                 decimation: int = 1,
+                 roi: Union[None, BoundingBox, Tuple[float, float, float, float]] = None,
+                 min_range: Optional[int] = None,
+                 max_range: Optional[int] = None,
+                 compact: bool = False,
+                 buffers: int = 0):
+        """
+        Args:
+            decimation: Only every decimation-th pixel (in both axes) is projected.
+            roi: Normalized (xmin, ymin, xmax, ymax) region of the depth frame that is projected.
+            min_range: Depth (mm) below which points are invalid.
+            max_range: Depth (mm) above which points are invalid.
+            compact: Return only the valid points (Nx3) instead of the HxWx3 grid.
+            buffers: Number of dense output arrays that are used in rotation, 0 allocates new arrays on every call.
+        """
+        self.decimation = max(1, int(decimation))
+        self.roi = BoundingBox(roi) if roi is not None and not isinstance(roi, BoundingBox) else roi
+        self.min_range = min_range
+        self.max_range = max_range
+        self.compact = compact
+        self.buffers = max(0, int(buffers))
+
+        self._key = None
+        self._slices: Tuple[slice, slice] = (slice(None), slice(None))
+        self._grid_x: Optional[np.ndarray] = None  # x / z and y / z of the projected pixels
+        self._grid_y: Optional[np.ndarray] = None
+        self._depth: Optional[np.ndarray] = None
+        self._x: Optional[np.ndarray] = None
+        self._y: Optional[np.ndarray] = None
+        self._out_points: List[Optional[np.ndarray]] = [None] * max(1, self.buffers)
+        self._out_colors: List[Optional[np.ndarray]] = [None] * max(1, self.buffers)
+        self._next = 0
+
+    def project(self,
+                depth: np.ndarray,
+                xyz: np.ndarray,
+                color: Optional[np.ndarray] = None
+                ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Args:
+            depth: HxW uint16 depth frame.
+            xyz: HxWx3 ray grid of the depth camera, see create_xyz().
+            color: BGR frame aligned to the depth frame, resized to the depth frame size if it differs.
+
+        Returns:
+            Points (float32) and their RGB colors (uint8, None without color frame).
+        """
+        self._setup(depth.shape, xyz)
+        sy, sx = self._slices
+
+        np.copyto(self._depth, depth[sy, sx], casting='unsafe')
+        if self.max_range is not None:
+            cv2.threshold(self._depth, self.max_range, 0, cv2.THRESH_TOZERO_INV, dst=self._depth)
+        if self.min_range is not None:
+            # Keeps values above the threshold, min_range itself is valid
+            threshold = float(np.nextafter(np.float32(self.min_range), np.float32(0)))
+            cv2.threshold(self._depth, threshold, 0, cv2.THRESH_TOZERO, dst=self._depth)
+
+        if color is not None:
+            if color.shape[:2] != depth.shape[:2]:
+                color = cv2.resize(color, (depth.shape[1], depth.shape[0]), interpolation=cv2.INTER_NEAREST)
+            color = color[sy, sx]
 
-def create_xyz(device: dai.Device, width: int, height: int):
-    calibData = device.readCalibration()
-    M_right = calibData.getCameraIntrinsics(dai.CameraBoardSocket.RIGHT, dai.Size2f(width, height))
-    camera_matrix = np.array(M_right).reshape(3, 3)
+        points, colors = self._outputs(self._depth.shape, color is not None)
+        cv2.multiply(self._grid_x, self._depth, dst=self._x)
+        cv2.multiply(self._grid_y, self._depth, dst=self._y)
+        cv2.merge([self._x, self._y, self._depth], dst=points)
+        if colors is not None:
+            cv2.cvtColor(color, cv2.COLOR_BGR2RGB, dst=colors)
 
-    xs = np.linspace(0, width - 1, width, dtype=np.float32)
-    ys = np.linspace(0, height - 1, height, dtype=np.float32)
+        if self.compact:
+            # Boolean gather of whole points (and RGB pixels) as single items, the valid points are scattered
+            valid = np.not_equal(self._depth, 0).reshape(-1)
+            points = points.view(np.dtype((np.void, 12))).reshape(-1)[valid].view(np.float32).reshape(-1, 3)
+            if colors is not None:
+                colors = colors.view(np.dtype((np.void, 3))).reshape(-1)[valid].view(np.uint8).reshape(-1, 3)
+        return points, colors
 
-    # generate grid by stacking coordinates
-    base_grid = np.stack(np.meshgrid(xs, ys))  # WxHx2
-    points_2d = base_grid.transpose(1, 2, 0)  # 1xHxWx2
+    def _setup(self, shape: Tuple[int, ...], xyz: np.ndarray) -> None:
+        key = (shape, id(xyz), self.decimation, self.roi.to_tuple() if self.roi is not None else None)
+        if key == self._key:
+            return
+        self._key = key
 
-    # unpack coordinates
-    u_coord: np.array = points_2d[..., 0]
-    v_coord: np.array = points_2d[..., 1]
+        x1, y1, x2, y2 = 0, 0, shape[1], shape[0]
+        if self.roi is not None:
+            x1, y1, x2, y2 = self.roi.clip().to_tuple(shape)
+        self._slices = (slice(y1, y2, self.decimation), slice(x1, x2, self.decimation))
 
-    # unpack intrinsics
-    fx: np.array = camera_matrix[0, 0]
-    fy: np.array = camera_matrix[1, 1]
-    cx: np.array = camera_matrix[0, 2]
-    cy: np.array = camera_matrix[1, 2]
+        sy, sx = self._slices
+        self._grid_x = np.ascontiguousarray(xyz[sy, sx, 0], dtype=np.float32)
+        self._grid_y = np.ascontiguousarray(xyz[sy, sx, 1], dtype=np.float32)
+        self._depth = np.empty(self._grid_x.shape, dtype=np.float32)
+        self._x = np.empty_like(self._depth)
+        self._y = np.empty_like(self._depth)
+        self._out_points = [None] * max(1, self.buffers)
+        self._out_colors = [None] * max(1, self.buffers)
 
-    # projective
-    x_coord: np.array = (u_coord - cx) / fx
-    y_coord: np.array = (v_coord - cy) / fy
+    def _outputs(self, shape: Tuple[int, ...], has_color: bool) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        # Compact points are gathered from the dense grid into new arrays, so a single dense grid is enough
+        buffers = 1 if self.compact else self.buffers
+        if buffers == 0:
+            return (np.empty(shape + (3,), dtype=np.float32),
+                    np.empty(shape + (3,), dtype=np.uint8) if has_color else None)
 
-    xyz = np.stack([x_coord, y_coord], axis=-1)
-    return np.pad(xyz, ((0, 0), (0, 0), (0, 1)), "constant", constant_values=1.0)
+        i = self._next
+        self._next = (self._next + 1) % buffers
+        if self._out_points[i] is None:
+            self._out_points[i] = np.empty(shape + (3,), dtype=np.float32)
+        if has_color and self._out_colors[i] is None:
+            self._out_colors[i] = np.empty(shape + (3,), dtype=np.uint8)
+        return self._out_points[i], self._out_colors[i] if has_color else None
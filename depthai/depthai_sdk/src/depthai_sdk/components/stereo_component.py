@@ -6,11 +6,12 @@ import cv2
 import depthai as dai
 import numpy as np
 
+from depthai_sdk.calibration import DeviceCalibration
 from depthai_sdk.components.camera_component import CameraComponent, ComponentOutput
 from depthai_sdk.components.component import Component
 from depthai_sdk.components.parser import parse_median_filter, parse_encode, encoder_profile_to_fourcc
 from depthai_sdk.components.stereo_control import StereoControl
-from depthai_sdk.components.undistort import _get_mesh
+from depthai_sdk.components.undistort import _get_meshes
 from depthai_sdk.logger import LOGGER
 from depthai_sdk.oak_outputs.xout.xout_base import XoutBase, StreamXout
 from depthai_sdk.oak_outputs.xout.xout_depth import XoutDisparityDepth
@@ -183,11 +184,10 @@ class StereoComponent(Component):
         self.node.setRectifyEdgeFillColor(0)
 
         if self._undistortion_offset is not None:
-            calib_data = self._replay._calibData if self._replay else device.readCalibration()
+            calib_data = self._replay._calibData if self._replay else DeviceCalibration.of(device).handler
             w_frame, h_frame = self._get_stream_size(self.left)
-            mapX_left, mapY_left, mapX_right, mapY_right = self._get_maps(w_frame, h_frame, calib_data)
-            mesh_l = _get_mesh(mapX_left, mapY_left)
-            mesh_r = _get_mesh(mapX_right, mapY_right)
+            mesh_l, mesh_r = _get_meshes(calib_data, w_frame, h_frame, self._undistortion_offset,
+                                         lambda: self._get_maps(w_frame, h_frame, calib_data))
             mesh_left = list(mesh_l.tobytes())
             mesh_right = list(mesh_r.tobytes())
             self.node.loadMeshData(mesh_left, mesh_right)
@@ -410,9 +410,9 @@ class StereoComponent(Component):
         `depth = disparity_factor / disparity`
         @param device: OAK device
         """
-        calib = device.readCalibration()
-        baseline = calib.getBaselineDistance(useSpecTranslation=True) * 10  # mm
-        intrinsics = calib.getCameraIntrinsics(dai.CameraBoardSocket.RIGHT, self.right.getResolutionSize())
+        calib = DeviceCalibration.of(device)
+        baseline = calib.baseline(use_spec_translation=True) * 10  # mm
+        intrinsics = calib.intrinsics(dai.CameraBoardSocket.RIGHT, *self.right.getResolutionSize())
         focal_length = intrinsics[0][0]
         disp_levels = self.node.getMaxDisparity() / 95
         return baseline * focal_length * disp_levels
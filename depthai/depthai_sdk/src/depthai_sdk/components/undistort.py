@@ -1,33 +1,73 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Callable, Tuple
+
+import depthai as dai
 import numpy as np
 
+from depthai_sdk.logger import LOGGER
+
+MESHES_PATH = Path.home() / Path('.cache/undistortion-meshes')
+_MESH_CELL_SIZE = 16
+
+
+def _get_mesh(mapX: np.ndarray, mapY: np.ndarray, mesh_cell_size: int = _MESH_CELL_SIZE) -> np.ndarray:
+    """
+    Creates subsampled mesh which will be loaded on to device to undistort the image. Every mesh_cell_size-th
+    (mapY, mapX) pair of each row is taken, for every mesh_cell_size-th row, including the last row/column if
+    the size is divisible by mesh_cell_size. Rows are padded to an even number of points.
+    """
+    height, width = mapX.shape
+    ys = np.minimum(np.arange(0, height + 1, mesh_cell_size), height - 1)
+    xs = np.minimum(np.arange(0, width + 1, mesh_cell_size), width - 1)
+    pad = 1 if (width % mesh_cell_size) % 2 != 0 else 0
+
+    mesh = np.zeros((len(ys), len(xs) + pad, 2), dtype=np.float32)
+    mesh[:, :len(xs), 0] = mapY[np.ix_(ys, xs)]
+    mesh[:, :len(xs), 1] = mapX[np.ix_(ys, xs)]
+    return mesh.reshape(len(ys), -1)
+
+
+def _calib_hash(calib: dai.CalibrationHandler) -> str:
+    eeprom = json.dumps(calib.eepromToJson(), sort_keys=True)
+    return hashlib.sha256(eeprom.encode()).hexdigest()[:16]
+
+
+def _get_meshes(calib: dai.CalibrationHandler,
+                width: int,
+                height: int,
+                M2_offset: int,
+                get_maps: Callable[[], Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]
+                ) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns left and right undistortion meshes. Meshes are cached in MESHES_PATH, keyed by the calibration (EEPROM)
+    hash, resolution and M2 offset, so they are only created (from the maps returned by get_maps) once per device and
+    configuration.
+
+    @param calib: Calibration of the device
+    @param width: Width of the stereo input frames
+    @param height: Height of the stereo input frames
+    @param M2_offset: Focal length offset of the rectified camera matrix
+    @param get_maps: Function that returns (mapX_left, mapY_left, mapX_right, mapY_right)
+    @return: Left and right meshes
+    """
+    path = MESHES_PATH / f'{_calib_hash(calib)}_{width}x{height}_{M2_offset}.npz'
+    try:
+        with np.load(str(path)) as cached:
+            return cached['left'], cached['right']
+    except (OSError, KeyError, ValueError):
+        pass  # Not cached yet
+
+    mapX_left, mapY_left, mapX_right, mapY_right = get_maps()
+    mesh_left, mesh_right = _get_mesh(mapX_left, mapY_left), _get_mesh(mapX_right, mapY_right)
 
-def _get_mesh(mapX: np.ndarray, mapY: np.ndarray):
-    mesh_cell_size = 16
-    mesh0 = []
-    # Creates subsampled mesh which will be loaded on to device to undistort the image
-    for y in range(mapX.shape[0] + 1):  # iterating over height of the image
-        if y % mesh_cell_size == 0:
-            row_left = []
-            for x in range(mapX.shape[1] + 1):  # iterating over width of the image
-                if x % mesh_cell_size == 0:
-                    if y == mapX.shape[0] and x == mapX.shape[1]:
-                        row_left.append(mapY[y - 1, x - 1])
-                        row_left.append(mapX[y - 1, x - 1])
-                    elif y == mapX.shape[0]:
-                        row_left.append(mapY[y - 1, x])
-                        row_left.append(mapX[y - 1, x])
-                    elif x == mapX.shape[1]:
-                        row_left.append(mapY[y, x - 1])
-                        row_left.append(mapX[y, x - 1])
-                    else:
-                        row_left.append(mapY[y, x])
-                        row_left.append(mapX[y, x])
-            if (mapX.shape[1] % mesh_cell_size) % 2 != 0:
-                row_left.append(0)
-                row_left.append(0)
-
-            mesh0.append(row_left)
-
-    mesh0 = np.array(mesh0)
-    # mesh = list(map(tuple, mesh0))
-    return mesh0
+    try:
+        MESHES_PATH.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.stem + '.tmp.npz')
+        np.savez(str(tmp_path), left=mesh_left, right=mesh_right)
+        os.replace(str(tmp_path), str(path))
+    except OSError as e:
+        LOGGER.warning(f"Couldn't cache undistortion meshes to {path}: {e}")
+    return mesh_left, mesh_right
@@ -1,5 +1,6 @@
+import array
 import time
-from typing import Tuple, List, Union
+from typing import Tuple, List, Union, Dict, Optional
 import depthai as dai
 import numpy as np
 import rclpy
@@ -14,17 +15,43 @@ from sensor_msgs.msg import CompressedImage, Image, Imu  # , PointCloud2, PointF
 from std_msgs.msg import Header
 from builtin_interfaces.msg import Time
 
-from depthai_sdk.integrations.ros.imu_interpolation import ImuInterpolation
+from depthai_sdk.integrations.ros.imu_interpolation import ImuInterpolation, TS, SEQ, AX, GZ
+
+TYPE = dai.ImgFrame.Type
+# dai.ImgFrame.Type -> (ROS encoding, bytes per pixel). These frames are published as-is, without converting them to
+# BGR on the host.
+IMG_ENCODINGS = {
+    TYPE.RAW16: ('mono16', 2),  # Depth
+    TYPE.GRAY8: ('mono8', 1),
+    TYPE.RAW8: ('mono8', 1),
+    TYPE.YUV422i: ('yuv422_yuy2', 2),
+    TYPE.BGR888i: ('bgr8', 3),
+    TYPE.RGB888i: ('rgb8', 3),
+}
 
 
 class DepthAi2Ros2:
     xyz = dict()
 
-    def __init__(self, device: dai.Device) -> None:
+    def __init__(self, device: dai.Device, msg_pool_size: int = 0, publish_nv12: bool = False) -> None:
+        """
+        Args:
+            device: OAK device.
+            msg_pool_size: Number of ROS messages reused (round-robin) per topic. Reused messages keep their data
+                buffer, so frames are copied into it without reallocating. Messages must not be used anymore once
+                they are recycled, so this has to be larger than the number of messages the consumer holds at once.
+                0 disables reuse.
+            publish_nv12: Publish NV12 frames as-is, with the non-standard 'nv12' encoding (not supported by
+                cv_bridge, rviz or Foxglove), instead of converting them to bgr8. The Image is then height * 3 / 2
+                rows of width bytes: the Y plane, followed by height / 2 rows of interleaved U, V samples.
+        """
         self.start_time = dai.Clock.now()
         self.device = device
         self.imu_packets = []
         self.imu_interpolation = ImuInterpolation()
+        self.msg_pool_size = msg_pool_size
+        self.publish_nv12 = publish_nv12
+        self._msg_pools: Dict[str, List] = dict()  # topic -> [messages, next index]
 
     def set_header(self, msg, dai_msg: Union[dai.ImgFrame, dai.IMUReport]) -> Header:
         try:
@@ -37,33 +64,63 @@ class DepthAi2Ros2:
         msg.header.stamp = Time(sec=ts.seconds, nanosec=ts.microseconds * 1000)
         return msg
 
-    def CompressedImage(self, imgFrame: dai.ImgFrame) -> CompressedImage:
-        msg = CompressedImage()
+    def _get_msg(self, msg_type, topic: Optional[str]):
+        if not self.msg_pool_size or topic is None:
+            return msg_type()
+
+        pool = self._msg_pools.get(topic)
+        if pool is None:
+            pool = self._msg_pools[topic] = [[msg_type() for _ in range(self.msg_pool_size)], 0]
+
+        msgs, i = pool
+        pool[1] = (i + 1) % len(msgs)
+        return msgs[i]
+
+    @staticmethod
+    def _set_data(msg, data: np.ndarray) -> None:
+        """
+        Copies frame data (zero-copy view from dai.Buffer.getData()) into the message with a single memcpy.
+        If the message is reused and its buffer has the same size, the buffer is overwritten in place.
+        """
+        data = data.reshape(-1)
+        if len(msg.data) == data.size:
+            memoryview(msg.data)[:] = data
+        else:
+            buf = array.array('B')
+            buf.frombytes(data)
+            msg.data = buf
+
+    def CompressedImage(self, imgFrame: dai.ImgFrame, topic: Optional[str] = None) -> CompressedImage:
+        msg = self._get_msg(CompressedImage, topic)
         self.set_header(msg, imgFrame)
         msg.format = "jpeg"
-        msg.data.frombytes(imgFrame.getData())
+        self._set_data(msg, imgFrame.getData())
         return msg
 
-    def Image(self, imgFrame: dai.ImgFrame) -> Image:
-        msg = Image()
+    def Image(self, imgFrame: dai.ImgFrame, topic: Optional[str] = None) -> Image:
+        msg = self._get_msg(Image, topic)
         self.set_header(msg, imgFrame)
         msg.height = imgFrame.getHeight()
         msg.width = imgFrame.getWidth()
-        msg.step = imgFrame.getWidth()
         msg.is_bigendian = 0
 
-        type = imgFrame.getType()
-        TYPE = dai.ImgFrame.Type
-        if type == TYPE.RAW16:  # Depth
-            msg.encoding = 'mono16'
-            msg.step *= 2  # 2 bytes per pixel
-            msg.data.frombytes(imgFrame.getData())
-        elif type in [TYPE.GRAY8, TYPE.RAW8]:  # Mono frame
-            msg.encoding = 'mono8'
-            msg.data.frombytes(imgFrame.getData())
+        encoding = IMG_ENCODINGS.get(imgFrame.getType())
+        if imgFrame.getType() == TYPE.NV12 and self.publish_nv12:
+            # Y plane and the half-height interleaved UV plane, as rows of width bytes (len(data) == step * height)
+            msg.encoding = 'nv12'
+            msg.height = imgFrame.getHeight() * 3 // 2
+            msg.step = imgFrame.getWidth()
+            self._set_data(msg, imgFrame.getData())
+        elif encoding is not None:
+            # Publish frame data directly, no host-side conversion
+            msg.encoding, bytes_per_pixel = encoding
+            msg.step = imgFrame.getWidth() * bytes_per_pixel
+            self._set_data(msg, imgFrame.getData())
         else:
+            # NV12, planar or other formats, convert to interleaved BGR
             msg.encoding = 'bgr8'
-            msg.data.frombytes(imgFrame.getCvFrame())
+            msg.step = imgFrame.getWidth() * 3
+            self._set_data(msg, imgFrame.getCvFrame())
         return msg
 
     # def TfMessage(self,
@@ -138,20 +195,43 @@ class DepthAi2Ros2:
     #
     #     xyz = np.stack([x_coord, y_coord], axis=-1)
     #     self.xyz[str(height)] = np.pad(xyz, ((0, 0), (0, 0), (0, 1)), "constant", constant_values=1.0)
-    def Imu(self, dai_msg):
-        dai_msg: dai.IMUData
-        for packet in dai_msg.packets:
+    def _imu_packets(self, dai_msg: Union[dai.IMUData, dai.IMUPacket, List[dai.IMUPacket]]) -> List[dai.IMUPacket]:
+        if isinstance(dai_msg, dai.IMUData):
+            return dai_msg.packets
+        if isinstance(dai_msg, dai.IMUPacket):
+            return [dai_msg]
+        return list(dai_msg)
+
+    def Imu(self, dai_msg: Union[dai.IMUData, dai.IMUPacket, List[dai.IMUPacket]]) -> List[Imu]:
+        """
+        Converts all IMU packets of the IMUData batch into (interpolated) Imu messages.
+        """
+        samples = self.imu_interpolation.add_imu_data(self._imu_packets(dai_msg))
+        if len(samples) == 0:
+            return []
+
+        # Header stamps for the whole batch at once
+        ts = samples[:, TS] - self.start_time.total_seconds()
+        secs = np.floor(ts).astype(np.int64)
+        nanosecs = np.minimum(np.round((ts - secs) * 1e9).astype(np.int64), 999_999_999)
+        seqs = samples[:, SEQ].astype(np.int64)
+
+        orientation_cov = np.array([-1.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0])
+        zeros = np.zeros(9)
+
+        msgs = []
+        for seq, sec, nanosec, (ax, ay, az, gx, gy, gz) in zip(seqs.tolist(), secs.tolist(), nanosecs.tolist(),
+                                                              samples[:, AX:GZ + 1].tolist()):
             msg = Imu(
                 orientation=Quaternion(x=0.0, y=0.0, z=0.0, w=1.0),
-                orientation_covariance=np.array([-1.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]),
-                angular_velocity=Vector3(x=0.0, y=0.0, z=0.0),
-                angular_velocity_covariance=np.zeros(9),
-                linear_acceleration=Vector3(x=0.0,y=0.0, z=0.0),
-                linear_acceleration_covariance=np.zeros(9)
+                orientation_covariance=orientation_cov,
+                angular_velocity=Vector3(x=gx, y=gy, z=gz),
+                angular_velocity_covariance=zeros,
+                linear_acceleration=Vector3(x=ax, y=ay, z=az),
+                linear_acceleration_covariance=zeros
             )
-            report = packet.acceleroMeter or packet.gyroscope or packet.magneticField or packet.rotationVector
-            self.set_header(msg, report)
-            self.imu_interpolation.Imu(msg, packet)
-            # TODO: publish from here directly, so single IMUData can result in more Imu packets?
-            return msg
+            msg.header.frame_id = str(seq)
+            msg.header.stamp = Time(sec=sec, nanosec=nanosec)
+            msgs.append(msg)
 
+        return msgs
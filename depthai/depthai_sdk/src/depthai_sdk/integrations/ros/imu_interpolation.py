@@ -1,5 +1,6 @@
+from collections import deque
 from enum import Enum
-from typing import List
+from typing import Iterable, List, Optional, Tuple, Union
 
 import depthai as dai
 import numpy as np
@@ -11,34 +12,264 @@ class ImuSyncMethod(Enum):
     COPY = 'COPY'
 
 
+# Columns of the interpolated samples
+TS, SEQ, AX, AY, AZ, GX, GY, GZ = range(8)
+ImuSample = Tuple[float, int, float, float, float, float, float, float]
+
+
 class ImuInterpolation:
-    def __init__(self):
-        self.imu_packets: List[dai.IMUPacket] = []
+    """
+    Streaming IMU interpolation. One sensor (reference) keeps its samples, and the other sensor is linearly
+    interpolated at the reference timestamps:
+
+    - LINEAR_INTERPOLATE_ACCEL: gyroscope samples are the reference, accelerometer is interpolated.
+    - LINEAR_INTERPOLATE_GYRO: accelerometer samples are the reference, gyroscope is interpolated.
+    - COPY: no interpolation, accelerometer and gyroscope values of each packet are used as-is.
+
+    Only the two most recent samples of the interpolated sensor are kept, together with the reference samples
+    that are newer than the latest interpolated sample (they get emitted once the next interpolated sample
+    arrives). Each reference sample is emitted exactly once, so the cost per sample is O(1).
+
+    Samples are tuples/rows of (timestamp [s], sequence, ax, ay, az, gx, gy, gz), where timestamp and sequence
+    are taken from the reference sensor report.
+
+    Packets that don't have both accelerometer and gyroscope reports (eg. only one of them is enabled, or only the
+    rotation vector) can't be interpolated, their samples are passed through with zeros for the missing sensor.
+    """
+
+    def __init__(self,
+                 sync_mode: ImuSyncMethod = ImuSyncMethod.LINEAR_INTERPOLATE_ACCEL,
+                 max_pending: int = 100):
+        """
+        Args:
+            sync_mode: Interpolation method.
+            max_pending: Maximum number of reference samples waiting for the next interpolated sensor sample.
+        """
+        self.sync_mode = sync_mode
+        self.max_pending = max_pending
+        self.reset()
+
+    def reset(self) -> None:
+        self._interp = deque(maxlen=2)  # (ts, x, y, z) of the interpolated sensor
+        self._pending = deque(maxlen=self.max_pending)  # (ts, seq, x, y, z) of the reference sensor
+        self._last_accel_seq = None
+        self._last_gyro_seq = None
+        self._last_single_seq = None
+
+    def _set_sync_mode(self, sync_mode: ImuSyncMethod) -> None:
+        if sync_mode != self.sync_mode:
+            self.sync_mode = sync_mode
+            self.reset()
+
+    def _new_reports(self, imu_packet: dai.IMUPacket) -> Tuple[tuple, tuple]:
+        """
+        Returns new (not yet seen) accelerometer and gyroscope reports of the packet as
+        (ts, seq, x, y, z) tuples, or None if the report was already seen in the previous packet.
+        """
+        accel = imu_packet.acceleroMeter
+        gyro = imu_packet.gyroscope
+
+        new_accel = None
+        if accel.sequence != self._last_accel_seq:
+            self._last_accel_seq = accel.sequence
+            new_accel = (accel.getTimestampDevice().total_seconds(), accel.sequence, accel.x, accel.y, accel.z)
+
+        new_gyro = None
+        if gyro.sequence != self._last_gyro_seq:
+            self._last_gyro_seq = gyro.sequence
+            new_gyro = (gyro.getTimestampDevice().total_seconds(), gyro.sequence, gyro.x, gyro.y, gyro.z)
+
+        return new_accel, new_gyro
+
+    @staticmethod
+    def _present(report) -> bool:
+        # Reports of disabled sensors are default-constructed, without a timestamp
+        return report is not None and report.getTimestampDevice().total_seconds() > 0
+
+    def _single_sensor(self, imu_packet: dai.IMUPacket) -> Optional[List[ImuSample]]:
+        """
+        Returns the new sample of a packet without accelerometer or gyroscope report (values of the missing sensor
+        are zeros), or None if the packet has both reports and is interpolated.
+        """
+        accel = imu_packet.acceleroMeter
+        gyro = imu_packet.gyroscope
+        has_accel, has_gyro = self._present(accel), self._present(gyro)
+        if has_accel and has_gyro:
+            return None
+
+        report = accel if has_accel else gyro if has_gyro else imu_packet.rotationVector or imu_packet.magneticField
+        if report is None or report.sequence == self._last_single_seq:
+            return []
+        self._last_single_seq = report.sequence
+        a = (accel.x, accel.y, accel.z) if has_accel else (0.0, 0.0, 0.0)
+        g = (gyro.x, gyro.y, gyro.z) if has_gyro else (0.0, 0.0, 0.0)
+        return [(report.getTimestampDevice().total_seconds(), report.sequence, a[0], a[1], a[2], g[0], g[1], g[2])]
+
+    def _sample(self, ref: tuple, interp: Tuple[float, float, float]) -> ImuSample:
+        ts, seq, x, y, z = ref
+        if self.sync_mode == ImuSyncMethod.LINEAR_INTERPOLATE_ACCEL:
+            return ts, seq, interp[0], interp[1], interp[2], x, y, z
+        return ts, seq, x, y, z, interp[0], interp[1], interp[2]
+
+    def _flush(self) -> List[ImuSample]:
+        """
+        Emits pending reference samples that are bracketed by the two latest interpolated sensor samples.
+        """
+        samples = []
+        if not self._interp:
+            return samples
+
+        t1, x1, y1, z1 = self._interp[-1]
+        while self._pending and self._pending[0][0] <= t1:
+            ref = self._pending.popleft()
+            if len(self._interp) < 2 or ref[0] <= self._interp[0][0]:
+                continue  # No older sample to interpolate from, drop it
+
+            t0, x0, y0, z0 = self._interp[0]
+            alpha = (ref[0] - t0) / (t1 - t0) if t0 < t1 else 1.0
+            samples.append(self._sample(ref, (x0 + (x1 - x0) * alpha,
+                                              y0 + (y1 - y0) * alpha,
+                                              z0 + (z1 - z0) * alpha)))
+        return samples
+
+    def add_packet(self,
+                   imu_packet: dai.IMUPacket,
+                   sync_mode: ImuSyncMethod = None) -> List[ImuSample]:
+        """
+        Adds a single IMU packet and returns the interpolated samples that became available (can be none or more).
+        """
+        if sync_mode is not None:
+            self._set_sync_mode(sync_mode)
+
+        if self.sync_mode != ImuSyncMethod.COPY:
+            single = self._single_sensor(imu_packet)
+            if single is not None:
+                return single
+
+        accel, gyro = self._new_reports(imu_packet)
+
+        if self.sync_mode == ImuSyncMethod.COPY:
+            a = imu_packet.acceleroMeter
+            g = imu_packet.gyroscope
+            ref = accel or gyro or (a.getTimestampDevice().total_seconds(), a.sequence, a.x, a.y, a.z)
+            return [(ref[0], ref[1], a.x, a.y, a.z, g.x, g.y, g.z)]
+
+        if self.sync_mode == ImuSyncMethod.LINEAR_INTERPOLATE_ACCEL:
+            ref, interp = gyro, accel
+        else:
+            ref, interp = accel, gyro
+
+        if ref is not None:
+            self._pending.append(ref)
+        if interp is not None:
+            self._interp.append((interp[0], interp[2], interp[3], interp[4]))
+
+        return self._flush()
+
+    def add_imu_data(self,
+                     imu_data: Union[dai.IMUData, Iterable[dai.IMUPacket]],
+                     sync_mode: ImuSyncMethod = None) -> np.ndarray:
+        """
+        Batch mode: adds all packets of the IMUData at once and interpolates them with NumPy.
+
+        Returns:
+            Array of shape (N, 8) with interpolated samples; columns are (ts, seq, ax, ay, az, gx, gy, gz).
+        """
+        if sync_mode is not None:
+            self._set_sync_mode(sync_mode)
+
+        packets = imu_data.packets if isinstance(imu_data, dai.IMUData) else list(imu_data)
+        if self.sync_mode == ImuSyncMethod.COPY:
+            samples = [s for p in packets for s in self.add_packet(p)]
+            return np.array(samples, dtype=np.float64).reshape(-1, 8)
+
+        refs = list(self._pending)
+        interps = list(self._interp)
+        singles = []
+        for packet in packets:
+            single = self._single_sensor(packet)
+            if single is not None:
+                singles.extend(single)
+                continue
+            accel, gyro = self._new_reports(packet)
+            if self.sync_mode == ImuSyncMethod.LINEAR_INTERPOLATE_ACCEL:
+                ref, interp = gyro, accel
+            else:
+                ref, interp = accel, gyro
+            if ref is not None:
+                refs.append(ref)
+            if interp is not None:
+                interps.append((interp[0], interp[2], interp[3], interp[4]))
+
+        self._interp.clear()
+        self._interp.extend(interps[-2:])
+        self._pending.clear()
+
+        singles = np.array(singles, dtype=np.float64).reshape(-1, 8)
+        if len(refs) == 0 or len(interps) == 0:
+            self._pending.extend(refs)
+            return singles
+
+        ref_arr = np.array(refs, dtype=np.float64)  # (N, 5): ts, seq, x, y, z
+        interp_arr = np.array(interps, dtype=np.float64)  # (M, 4): ts, x, y, z
+
+        ref_ts = ref_arr[:, 0]
+        interp_ts = interp_arr[:, 0]
+        pending = ref_ts > interp_ts[-1]
+        emit = (ref_ts > interp_ts[0]) & ~pending  # Older refs have no sample to interpolate from, drop them
+
+        for ts, seq, x, y, z in ref_arr[pending].tolist():
+            self._pending.append((ts, int(seq), x, y, z))
+
+        ref_arr = ref_arr[emit]
+        samples = np.empty((len(ref_arr), 8), dtype=np.float64)
+        samples[:, TS] = ref_arr[:, 0]
+        samples[:, SEQ] = ref_arr[:, 1]
+
+        interp_cols = (AX, AY, AZ) if self.sync_mode == ImuSyncMethod.LINEAR_INTERPOLATE_ACCEL else (GX, GY, GZ)
+        ref_cols = (GX, GY, GZ) if self.sync_mode == ImuSyncMethod.LINEAR_INTERPOLATE_ACCEL else (AX, AY, AZ)
+        for i in range(3):
+            samples[:, interp_cols[i]] = np.interp(ref_arr[:, 0], interp_ts, interp_arr[:, i + 1])
+            samples[:, ref_cols[i]] = ref_arr[:, i + 2]
+
+        if len(singles) > 0:
+            samples = np.concatenate((samples, singles))
+            samples = samples[np.argsort(samples[:, TS], kind='stable')]
+        return samples
 
     def Imu(self, msg, imu_packet: dai.IMUPacket,
             sync_mode: ImuSyncMethod = ImuSyncMethod.LINEAR_INTERPOLATE_ACCEL,
-            linear_accel_cov: float = 0., angular_velocity_cov: float = 0.):
-        # TODO: rather pass classes (Imu, Quaternion, Vector3) and create object here?
+            linear_accel_cov: float = 0., angular_velocity_cov: float = 0.) -> ImuSample:
+        """
+        Fills the ROS Imu message with the latest interpolated sample (or raw values of the packet, if no
+        interpolated sample is available yet). The header isn't changed, set it from the timestamp and sequence of
+        the returned sample.
+        """
         # When passing ros_imu_msg make sure all attributes are already defined!
-
-        self.imu_packets.append(imu_packet)
-        if 20 < len(self.imu_packets):
-            self.imu_packets.pop(0)
-
-        if sync_mode != ImuSyncMethod.COPY:
-            interp_imu_packets = self.fillImuData_LinearInterpolation(sync_mode)
-            if 0 < len(interp_imu_packets):
-                imu_packet = interp_imu_packets[-1]
-
-        if imu_packet.acceleroMeter is not None:
-            msg.linear_acceleration.x = imu_packet.acceleroMeter.x
-            msg.linear_acceleration.y = imu_packet.acceleroMeter.y
-            msg.linear_acceleration.z = imu_packet.acceleroMeter.z
-
-        if imu_packet.gyroscope is not None:
-            msg.angular_velocity.x = imu_packet.gyroscope.x
-            msg.angular_velocity.y = imu_packet.gyroscope.y
-            msg.angular_velocity.z = imu_packet.gyroscope.z
+        samples = self.add_packet(imu_packet, sync_mode)
+        if samples:
+            sample = samples[-1]
+        else:
+            a = imu_packet.acceleroMeter
+            g = imu_packet.gyroscope
+            report = a if self._present(a) else g
+            sample = (report.getTimestampDevice().total_seconds(), report.sequence, a.x, a.y, a.z, g.x, g.y, g.z)
+        self.fill_msg(msg, sample, linear_accel_cov, angular_velocity_cov)
+        return sample
+
+    @staticmethod
+    def fill_msg(msg, sample: Union[ImuSample, np.ndarray],
+                 linear_accel_cov: float = 0., angular_velocity_cov: float = 0.) -> None:
+        """
+        Fills the ROS Imu message (header isn't changed) with the interpolated sample.
+        """
+        msg.linear_acceleration.x = float(sample[AX])
+        msg.linear_acceleration.y = float(sample[AY])
+        msg.linear_acceleration.z = float(sample[AZ])
+
+        msg.angular_velocity.x = float(sample[GX])
+        msg.angular_velocity.y = float(sample[GY])
+        msg.angular_velocity.z = float(sample[GZ])
 
         msg.linear_acceleration_covariance = np.array([linear_accel_cov, 0.0, 0.0, 0.0, linear_accel_cov, 0.0, 0.0, 0.0,
                                                        linear_accel_cov])
@@ -51,115 +282,3 @@ class ImuInterpolation:
         msg.orientation.w = 0.0
 
         msg.orientation_covariance = np.array([-1.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0])
-
-    def _lerp(self, a, b, t):
-        return a * (1.0 - t) + b * t
-
-    def _lerpImu(self, a, b, t):
-        res = a.__class__()
-        res.x = self._lerp(a.x, b.x, t)
-        res.y = self._lerp(a.y, b.y, t)
-        res.z = self._lerp(a.z, b.z, t)
-        return res
-
-    def fillImuData_LinearInterpolation(self, sync_mode: ImuSyncMethod):
-        accel_hist = []
-        gyro_hist = []
-        interp_imu_packets = []
-
-        for i in range(len(self.imu_packets)):
-            if len(accel_hist) == 0:
-                accel_hist.append(self.imu_packets[i].acceleroMeter)
-            elif accel_hist[-1].sequence != self.imu_packets[i].acceleroMeter.sequence:
-                accel_hist.append(self.imu_packets[i].acceleroMeter)
-
-            if len(gyro_hist) == 0:
-                gyro_hist.append(self.imu_packets[i].gyroscope)
-            elif gyro_hist[-1].sequence != self.imu_packets[i].gyroscope.sequence:
-                gyro_hist.append(self.imu_packets[i].gyroscope)
-
-            if sync_mode.value == ImuSyncMethod.LINEAR_INTERPOLATE_ACCEL:
-                if len(accel_hist) < 3:
-                    continue
-                else:
-                    accel0 = dai.IMUReportAccelerometer()
-                    accel0.sequence = -1
-
-                    while len(accel_hist) > 0:
-                        if accel0.sequence == -1:
-                            accel0 = accel_hist.pop(0)
-                        else:
-                            accel1 = accel_hist.pop(0)
-                            dt = (accel1.timestamp.get() - accel0.timestamp.get()).total_seconds() * 1000
-
-                            while len(gyro_hist) > 0:
-                                curr_gyro = gyro_hist[0]
-
-                                if curr_gyro.timestamp.get() > accel0.timestamp.get() and curr_gyro.timestamp.get() <= accel1.timestamp.get():
-                                    diff = (curr_gyro.timestamp.get() - accel0.timestamp.get()).total_seconds() * 1000
-                                    alpha = diff / dt
-                                    interp_accel = self._lerpImu(accel0, accel1, alpha)
-                                    imu_packet = dai.IMUPacket()
-                                    imu_packet.acceleroMeter = interp_accel
-                                    imu_packet.gyroscope = curr_gyro
-                                    interp_imu_packets.append(imu_packet)
-                                    gyro_hist.pop(0)
-
-                                elif curr_gyro.timestamp.get() > accel1.timestamp.get():
-                                    accel0 = accel1
-                                    if len(accel_hist) > 0:
-                                        accel1 = accel_hist.pop(0)
-                                        dt = (accel1.timestamp.get() - accel0.timestamp.get()).total_seconds() * 1000
-                                    else:
-                                        break
-                                else:
-                                    gyro_hist.pop(0)
-
-                            accel0 = accel1
-
-                    accel_hist.append(accel0)
-
-            elif sync_mode == ImuSyncMethod.LINEAR_INTERPOLATE_GYRO:
-                if len(gyro_hist) < 3:
-                    continue
-                else:
-                    gyro0 = dai.IMUReportGyroscope()
-                    gyro0.sequence = -1
-
-                    while len(gyro_hist) > 0:
-                        if gyro0.sequence == -1:
-                            gyro0 = gyro_hist.pop(0)
-                        else:
-                            gyro1 = gyro_hist.pop(0)
-                            dt = (gyro1.timestamp.get() - gyro0.timestamp.get()).total_seconds() * 1000
-
-                            while len(accel_hist) > 0:
-                                curr_accel = accel_hist[0]
-
-                                if curr_accel.timestamp.get() > gyro0.timestamp.get() and curr_accel.timestamp.get() <= gyro1.timestamp.get():
-                                    diff = (curr_accel.timestamp.get() - gyro0.timestamp.get()).total_seconds() * 1000
-                                    alpha = diff / dt
-                                    interp_gyro = self._lerpImu(gyro0, gyro1, alpha)
-                                    imu_packet = dai.IMUPacket()
-                                    imu_packet.acceleroMeter = curr_accel
-                                    imu_packet.gyroscope = interp_gyro
-                                    interp_imu_packets.append(imu_packet)
-                                    accel_hist.pop(0)
-
-                                elif curr_accel.timestamp.get() > gyro1.timestamp.get():
-                                    gyro0 = gyro1
-
-                                    if len(gyro_hist) > 0:
-                                        gyro1 = gyro_hist.pop(0)
-                                        dt = (gyro1.timestamp.get() - gyro0.timestamp.get()).total_seconds() * 1000
-                                    else:
-                                        break
-
-                                else:
-                                    accel_hist.pop(0)
-
-                            gyro0 = gyro1
-
-                    gyro_hist.append(gyro0)
-
-        return interp_imu_packets
@@ -1,6 +1,6 @@
 from queue import Queue
 from threading import Thread
-from typing import Dict, Any
+from typing import Dict, Any, List, Union
 
 import rclpy
 
@@ -14,12 +14,17 @@ def ros_thread(queue: Queue):
     publishers = dict()
 
     while rclpy.ok():
-        msgs: Dict[str, Any] = queue.get(block=True)
+        msgs: Dict[str, Union[Any, List]] = queue.get(block=True)
         for topic, msg in msgs.items():
+            batch = msg if isinstance(msg, list) else [msg]
+            if len(batch) == 0:
+                continue
             if topic not in publishers:
-                publishers[topic] = node.create_publisher(type(msg), topic, 10)
+                publishers[topic] = node.create_publisher(type(batch[0]), topic, 10)
                 LOGGER.info(f'SDK started publishing ROS messages to {topic}')
-            publishers[topic].publish(msg)
+            publisher = publishers[topic]
+            for m in batch:
+                publisher.publish(m)
         rclpy.spin_once(node, timeout_sec=0.001)  # 1ms timeout
 
 
@@ -37,3 +42,6 @@ class Ros2Streaming(RosBase):
 
     def new_ros_msg(self, topic: str, ros_msg):
         self.queue.put({topic: ros_msg})
+
+    def new_ros_msgs(self, topic: str, ros_msgs: List):
+        self.queue.put({topic: ros_msgs})
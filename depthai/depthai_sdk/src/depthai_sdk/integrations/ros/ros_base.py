@@ -19,6 +19,11 @@ class RosBase:
     """
     Base class that is used by ros streaming component and mcap recorder.
     """
+    # Number of ROS messages reused per topic by the bridge (see DepthAi2Ros2), 0 to create new ones for each frame.
+    # Subclasses that consume messages synchronously in new_ros_msg() can safely reuse a single message.
+    msg_pool_size: int = 0
+    # Publish NV12 color frames as-is, with the non-standard 'nv12' encoding, instead of converting them to bgr8.
+    publish_nv12: bool = False
 
     def __init__(self):
         self.streams: Dict[str, RosStream]  # key = xlink stream name
@@ -27,7 +32,7 @@ class RosBase:
         self.streams = dict()
 
     def update(self, device: dai.Device, xouts: List[XoutFrames]):
-        self.bridge = DepthAi2Ros2(device)
+        self.bridge = DepthAi2Ros2(device, self.msg_pool_size, self.publish_nv12)
 
         for xout in xouts:
             for stream in xout.xstreams():
@@ -57,6 +62,14 @@ class RosBase:
     def new_ros_msg(self, topic: str, ros_msg) -> None:
         raise NotImplementedError('Abstract function, override it!')
 
+    def new_ros_msgs(self, topic: str, ros_msgs: List) -> None:
+        """
+        Called with all messages created from a single depthai message (eg. IMU batch). Override it if
+        messages can be published/written at once.
+        """
+        for ros_msg in ros_msgs:
+            self.new_ros_msg(topic, ros_msg)
+
     def new_msg(self, name: str, dai_msg: dai.ADatatype):
         if name not in self.streams:  # Not relevant
             return
@@ -67,13 +80,14 @@ class RosBase:
         msg = None
         if stream.ros_type == CompressedImage:
             dai_msg: dai.ImgFrame
-            msg = self.bridge.CompressedImage(dai_msg)
+            msg = self.bridge.CompressedImage(dai_msg, stream.topic)
         # elif stream.ros_type == PointCloud2:
         #     msg = self.bridge.PointCloud2(dai_msg)
         elif stream.ros_type == Imu:
-            msg = self.bridge.Imu(dai_msg)
+            self.new_ros_msgs(stream.topic, self.bridge.Imu(dai_msg))
+            return
         elif stream.ros_type == Image:
             dai_msg: dai.ImgFrame
-            msg = self.bridge.Image(dai_msg)
+            msg = self.bridge.Image(dai_msg, stream.topic)
 
         self.new_ros_msg(stream.topic, msg)
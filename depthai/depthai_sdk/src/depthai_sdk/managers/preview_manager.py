@@ -5,6 +5,7 @@ from queue import Queue
 import cv2
 import depthai as dai
 
+from ..calibration import DeviceCalibration
 from ..previews import Previews, MouseClickTracker
 import numpy as np
 
@@ -53,13 +54,13 @@ class PreviewManager:
             device (depthai.Device): Running device instance
         """
 
-        calib = device.readCalibration()
-        eeprom = calib.getEepromData()
-        leftCam = calib.getStereoLeftCameraId()
+        calib = DeviceCalibration.of(device)
+        eeprom = calib.eeprom()
+        leftCam = calib.stereo_left()
         if leftCam != dai.CameraBoardSocket.AUTO and leftCam in eeprom.cameraData.keys():
             camInfo = eeprom.cameraData[leftCam]
             self.baseline = abs(camInfo.extrinsics.specTranslation.x * 10)  # cm -> mm
-            self.fov = calib.getFov(calib.getStereoLeftCameraId())
+            self.fov = calib.fov(leftCam)
             self.focal = (camInfo.width / 2) / (2. * math.tan(math.radians(self.fov / 2)))
         else:
             print("Warning: calibration data missing, using OAK-D defaults")
@@ -129,7 +130,8 @@ class PreviewManager:
         if name == Previews.depthRaw.name and Previews.depth.name in self._display:
             if self._fpsHandler is not None:
                 self._fpsHandler.tick(Previews.depth.name)
-            self._rawFrames[Previews.depth.name] = Previews.depth.value(frame, self)
+            # Raw frames are copied before they are drawn on or returned, the colorizer buffer can be stored
+            self._rawFrames[Previews.depth.name] = Previews.depth.value(frame, self, copy=False)
 
 
     def prepareFrames(self, blocking=False, callback=None):
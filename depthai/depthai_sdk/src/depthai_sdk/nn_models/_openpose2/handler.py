@@ -2,6 +2,7 @@ import cv2
 import numpy as np
 
 from depthai_sdk import toTensorResult, Previews
+from depthai_sdk.components.openpose_helper import OpenPoseDecoder
 
 keypointsMapping = ['Nose', 'Neck', 'R-Sho', 'R-Elb', 'R-Wr', 'L-Sho', 'L-Elb', 'L-Wr', 'R-Hip', 'R-Knee', 'R-Ank',
                     'L-Hip', 'L-Knee', 'L-Ank', 'R-Eye', 'L-Eye', 'R-Ear', 'L-Ear']
@@ -14,144 +15,19 @@ colors = [[0, 100, 255], [0, 100, 255], [0, 255, 255], [0, 100, 255], [0, 255, 2
           [200, 200, 0], [255, 0, 0], [200, 200, 0], [0, 0, 0]]
 
 
-def getKeypoints(probMap, threshold=0.2):
-    mapSmooth = cv2.GaussianBlur(probMap, (3, 3), 0, 0)
-    mapMask = np.uint8(mapSmooth > threshold)
-    keypoints = []
-    contours = None
-    try:
-        # OpenCV4.x
-        contours, _ = cv2.findContours(mapMask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
-    except:
-        # OpenCV3.x
-        _, contours, _ = cv2.findContours(mapMask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
-
-    for cnt in contours:
-        blobMask = np.zeros(mapMask.shape)
-        blobMask = cv2.fillConvexPoly(blobMask, cnt, 1)
-        maskedProbMap = mapSmooth * blobMask
-        _, maxVal, _, maxLoc = cv2.minMaxLoc(maskedProbMap)
-        keypoints.append(maxLoc + (probMap[maxLoc[1], maxLoc[0]],))
-
-    return keypoints
-
-
-def getValidPairs(outputs, w, h, detectedKeypoints):
-    validPairs = []
-    invalidPairs = []
-    nInterpSamples = 10
-    pafScoreTh = 0.2
-    confTh = 0.4
-    for k in range(len(mapIdx)):
-
-        pafA = outputs[0, mapIdx[k][0], :, :]
-        pafB = outputs[0, mapIdx[k][1], :, :]
-        pafA = cv2.resize(pafA, (w, h))
-        pafB = cv2.resize(pafB, (w, h))
-        candA = detectedKeypoints[POSE_PAIRS[k][0]]
-
-        candB = detectedKeypoints[POSE_PAIRS[k][1]]
-
-        nA = len(candA)
-        nB = len(candB)
-
-        if (nA != 0 and nB != 0):
-            validPair = np.zeros((0, 3))
-            for i in range(nA):
-                maxJ = -1
-                maxScore = -1
-                found = 0
-                for j in range(nB):
-                    d_ij = np.subtract(candB[j][:2], candA[i][:2])
-                    norm = np.linalg.norm(d_ij)
-                    if norm:
-                        d_ij = d_ij / norm
-                    else:
-                        continue
-                    interp_coord = list(zip(np.linspace(candA[i][0], candB[j][0], num=nInterpSamples),
-                                            np.linspace(candA[i][1], candB[j][1], num=nInterpSamples)))
-                    pafInterp = []
-                    for k in range(len(interp_coord)):
-                        pafInterp.append([pafA[int(round(interp_coord[k][1])), int(round(interp_coord[k][0]))],
-                                           pafB[int(round(interp_coord[k][1])), int(round(interp_coord[k][0]))]])
-                    pafScores = np.dot(pafInterp, d_ij)
-                    avgPafScore = sum(pafScores) / len(pafScores)
-
-                    if (len(np.where(pafScores > pafScoreTh)[0]) / nInterpSamples) > confTh:
-                        if avgPafScore > maxScore:
-                            maxJ = j
-                            maxScore = avgPafScore
-                            found = 1
-                if found:
-                    validPair = np.append(validPair, [[candA[i][3], candB[maxJ][3], maxScore]], axis=0)
-
-            validPairs.append(validPair)
-        else:
-            invalidPairs.append(k)
-            validPairs.append([])
-    return validPairs, invalidPairs
-
-
-def getPersonwiseKeypoints(validPairs, invalidPairs, keypointsList):
-    personwiseKeypoints = -1 * np.ones((0, 19))
-
-    for k in range(len(mapIdx)):
-        if k not in invalidPairs:
-            partAs = validPairs[k][:, 0]
-            partBs = validPairs[k][:, 1]
-            indexA, indexB = np.array(POSE_PAIRS[k])
-
-            for i in range(len(validPairs[k])):
-                found = 0
-                personIdx = -1
-                for j in range(len(personwiseKeypoints)):
-                    if personwiseKeypoints[j][indexA] == partAs[i]:
-                        personIdx = j
-                        found = 1
-                        break
-
-                if found:
-                    personwiseKeypoints[personIdx][indexB] = partBs[i]
-                    personwiseKeypoints[personIdx][-1] += keypointsList[partBs[i].astype(int), 2] + validPairs[k][i][
-                        2]
-
-                elif not found and k < 17:
-                    row = -1 * np.ones(19)
-                    row[indexA] = partAs[i]
-                    row[indexB] = partBs[i]
-                    row[-1] = sum(keypointsList[validPairs[k][i, :2].astype(int), 2]) + validPairs[k][i][2]
-                    personwiseKeypoints = np.vstack([personwiseKeypoints, row])
-    return personwiseKeypoints
-
-
 threshold = 0.3
 nPoints = 18
-detectedKeypoints = []
+decoders = {}  # (input size, output size) -> OpenPoseDecoder, precomputed once per size
 
 
 def decode(nnManager, packet):
     outputs = toTensorResult(packet)["Openpose/concat_stage7"].astype('float32')
     w, h = nnManager.inputSize
+    key = ((w, h), (outputs.shape[3], outputs.shape[2]))
+    if key not in decoders:
+        decoders[key] = OpenPoseDecoder(*key, threshold=threshold)
 
-    detectedKeypoints = []
-    keypointsList = np.zeros((0, 3))
-    keypointId = 0
-
-    for part in range(nPoints):
-        probMap = outputs[0, part, :, :]
-        probMap = cv2.resize(probMap, (w, h))  # (456, 256)
-        keypoints = getKeypoints(probMap, threshold)
-        keypointsWithId = []
-
-        for i in range(len(keypoints)):
-            keypointsWithId.append(keypoints[i] + (keypointId,))
-            keypointsList = np.vstack([keypointsList, keypoints[i]])
-            keypointId += 1
-
-        detectedKeypoints.append(keypointsWithId)
-
-    validPairs, invalidPairs = getValidPairs(outputs, w, h, detectedKeypoints)
-    personwiseKeypoints = getPersonwiseKeypoints(validPairs, invalidPairs, keypointsList)
+    detectedKeypoints, personwiseKeypoints, keypointsList = decoders[key].decode(outputs[0, :19], outputs[0, 19:])
     keypointsLimbs = [detectedKeypoints, personwiseKeypoints, keypointsList]
 
     return keypointsLimbs
@@ -3,16 +3,15 @@ import numpy as np
 
 from depthai_sdk import Previews, toTensorResult
 
+CLASS_COLORS = np.asarray([[0, 0, 0], [0, 255, 0], [255, 0, 0], [0, 0, 255]], dtype=np.uint8)
+
 
 def decode(nnManager, packet):
     # [print(f"Layer name: {l.name}, Type: {l.dataType}, Dimensions: {l.dims}") for l in packet.getAllLayers()]
     # after squeeze the data.shape is 4,512, 896
     data = np.squeeze(toTensorResult(packet)["L0317_ReWeight_SoftMax"])
-    classColors = [[0, 0, 0], [0, 255, 0], [255, 0, 0], [0, 0, 255]]
-    classColors = np.asarray(classColors, dtype=np.uint8)
-
     indices = np.argmax(data, axis=0)
-    outputColors = np.take(classColors, indices, axis=0)
+    outputColors = np.take(CLASS_COLORS, indices, axis=0)
     return outputColors
 
 
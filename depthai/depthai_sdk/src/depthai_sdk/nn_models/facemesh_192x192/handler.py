@@ -2,44 +2,57 @@ import numpy as np
 import depthai as dai
 from typing import Tuple
 from depthai_sdk.classes.nn_results import ImgLandmarks
+from depthai_sdk.components.nn_helper import DecodeHandler
 
 THRESHOLD = 0.5
+NUM_LANDMARKS = 468
+NN_SIZE = 192
 
-def decode(data: dai.NNData) -> ImgLandmarks:
-    # TODO: Use standarized recognition model
-    score = np.array(data.getLayerFp16('conv2d_31'))
-    score = 1 / (1 + np.exp(-score[0]))  # sigmoid on score
-    if score < THRESHOLD:
-        return ImgLandmarks(data)
 
-    ldms = np.array(data.getLayerFp16('conv2d_210')).reshape((468, 3))
-    landmarks = []
+class FacemeshHandler(DecodeHandler):
+    def setup(self, config):
+        # sigmoid(x) < thresh <=> x < logit(thresh), so the score is compared before applying the sigmoid
+        self.logit_thresh = np.log(THRESHOLD / (1 - THRESHOLD))
+        # Preallocated buffers, reused for every face
+        self.landmarks = np.empty((NUM_LANDMARKS, 2), dtype=np.float32)
+        self.colors = np.zeros((NUM_LANDMARKS, 3), dtype=np.int32)
 
-    all_colors = np.array([ldm[2] for ldm in ldms])
-    colors = generate_colors_from_z(all_colors)
+    def decode(self, data: dai.NNData) -> ImgLandmarks:
+        # TODO: Use standarized recognition model
+        score = data.getLayerFp16('conv2d_31')[0]
+        if score < self.logit_thresh:
+            return ImgLandmarks(data)
 
-    for ldm in ldms:
-        # colors.append(calculate_color(ldm[2], minz, maxz))
-        # colors.append((0, 0, int(ldm[2]) * 5 + 100))
-        landmarks.append((ldm[0] / 192, ldm[1] / 192))
-    return ImgLandmarks(data, landmarks=landmarks, colors=colors)
+        ldms = np.array(data.getLayerFp16('conv2d_210'), dtype=np.float32).reshape((NUM_LANDMARKS, 3))
+        np.multiply(ldms[:, :2], 1 / NN_SIZE, out=self.landmarks)
+        colors = generate_colors_from_z(ldms[:, 2], out=self.colors)
 
-def generate_colors_from_z(z_values):
+        landmarks = list(map(tuple, self.landmarks.tolist()))
+        return ImgLandmarks(data, landmarks=landmarks, colors=list(map(tuple, colors.tolist())))
+
+
+decode = FacemeshHandler()
+
+
+def generate_colors_from_z(z_values: np.ndarray, out: np.ndarray = None) -> np.ndarray:
     """
     Generates BGR colors based on normalized Z-values.
 
     Parameters:
     z_values (numpy.array): Array of Z-values.
+    out (numpy.array, optional): Preallocated (N, 3) int array for the colors.
 
     Returns:
-    List[Tuple]: List of BGR color tuples.
+    numpy.array: (N, 3) array of BGR colors.
     """
-    def normalize_z_values(z_values, minZ, maxZ):
-        return (z_values - minZ) / (maxZ - minZ)
-
-    def map_to_color(normalized_z_values):
-        return [(255 - int((1 - value) * 255), 0, 255 - int(value * 255)) for value in normalized_z_values]
-    minZ = min(z_values)
-    maxZ = max(z_values)
-    normalized_z_values = normalize_z_values(z_values, minZ, maxZ)
-    return map_to_color(normalized_z_values)
\ No newline at end of file
+    if out is None:
+        out = np.zeros((len(z_values), 3), dtype=np.int32)
+
+    min_z = z_values.min()
+    range_z = z_values.max() - min_z
+    normalized = (z_values - min_z) / range_z if range_z > 0 else np.zeros_like(z_values)
+
+    out[:, 0] = 255 - ((1 - normalized) * 255).astype(np.int32)
+    out[:, 1] = 0
+    out[:, 2] = 255 - (normalized * 255).astype(np.int32)
+    return out
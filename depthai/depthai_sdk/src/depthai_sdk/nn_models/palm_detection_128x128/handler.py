@@ -1,120 +1,81 @@
+from pathlib import Path
+
 import numpy as np
 
 from depthai_sdk.classes import Detections
+from depthai_sdk.components.nn_helper import DecodeHandler
 
+SHAPE = (128, 128)
+NUM_ANCHORS = 896
+MIN_SCORE_THRESH = 0.7
+ANCHORS_PATH = Path(__file__).parent / 'anchors_palm.npy'
 
-def decode(nn_data):
-    """
-    Each palm detection is a tensor consisting of 19 numbers:
-        - ymin, xmin, ymax, xmax
-        - x,y-coordinates for the 7 key_points
-        - confidence score
-    :return:
-    """
-    if nn_data is None:
-        return Detections(nn_data)
 
-    shape = (128, 128)
-    num_keypoints = 7
-    min_score_thresh = 0.7
-    anchors = np.load(__file__.replace("handler.py", "anchors_palm.npy"))
+class PalmDetectionHandler(DecodeHandler):
+    def setup(self, config):
+        anchors = np.load(str(ANCHORS_PATH))  # (896, 4): x_center, y_center, w, h
+        x_scale, y_scale = SHAPE
 
-    # Run the neural network
-    results = to_tensor_result(nn_data)
+        # Box columns of the regressors (x_center, y_center, w, h) are decoded as raw * scale + offset, where
+        # scale/offset only depend on the anchors. Keypoints (remaining 14 columns) aren't used
+        self.scale = np.stack([anchors[:, 2] / x_scale, anchors[:, 3] / y_scale,
+                               anchors[:, 2] / x_scale, anchors[:, 3] / y_scale], axis=-1).astype(np.float32)
+        self.offset = np.zeros_like(self.scale)
+        self.offset[:, :2] = anchors[:, :2]
 
-    raw_box_tensor = results.get("regressors").reshape(-1, 896, 18)  # regress
-    raw_score_tensor = results.get("classificators").reshape(-1, 896, 1)  # classification
+        # sigmoid(x) > thresh <=> x > logit(thresh), so scores are compared before applying the sigmoid
+        self.logit_thresh = np.log(MIN_SCORE_THRESH / (1 - MIN_SCORE_THRESH))
 
-    detections = raw_to_detections(raw_box_tensor, raw_score_tensor, anchors, shape, num_keypoints)
+    def decode(self, nn_data):
+        """
+        Each palm detection is a tensor consisting of 18 numbers:
+            - x, y-center, width and height of the box
+            - x,y-coordinates for the 7 key_points
+        and a separate confidence score. Only boxes of anchors above the score threshold are decoded.
+        """
+        if nn_data is None:
+            return Detections(nn_data)
 
-    palm_coords = [
-        obj[:4]
-        for det in detections
-        for obj in det
-        if obj[-1] > min_score_thresh
-    ]
-    palm_confs = [
-        obj[-1] for det in detections for obj in det if obj[-1] > min_score_thresh
-    ]
+        raw_scores = np.array(nn_data.getLayerFp16('classificators'), dtype=np.float32).reshape(NUM_ANCHORS)
+        candidates = np.flatnonzero(raw_scores > self.logit_thresh)
 
-    if len(palm_coords) == 0:
-        return Detections(nn_data)
+        detections = Detections(nn_data)
+        if len(candidates) == 0:
+            return detections
 
-    nms = non_max_suppression(
-        boxes=np.concatenate(palm_coords).reshape(-1, 4),
-        probs=palm_confs,
-        overlap_threshold=0.1
-    )
+        raw_boxes = np.array(nn_data.getLayerFp16('regressors'), dtype=np.float32).reshape(NUM_ANCHORS, -1)
+        boxes = decode_boxes(raw_boxes[candidates], self.scale[candidates], self.offset[candidates])
+        confs = sigmoid(raw_scores[candidates])
 
-    if nms is None:
-        return Detections(nn_data)
+        pick = non_max_suppression(boxes, confs, overlap_threshold=0.1)
+        for i in pick:
+            detections.add(0, confs[i], tuple(boxes[i]))
 
-    detections = Detections(nn_data)
-    for i, box in enumerate(nms):
-        detections.add(0, palm_confs[i], tuple(box))
+        return detections
 
-    return detections
+
+decode = PalmDetectionHandler()
 
 
 def sigmoid(x):
     return (1.0 + np.tanh(0.5 * x)) * 0.5
 
 
-def decode_boxes(raw_boxes, anchors, shape, num_keypoints):
+def decode_boxes(raw_boxes, scale, offset):
     """
-    Converts the predictions into actual coordinates using the anchor boxes.
-    Processes the entire batch at once.
+    Converts the predictions of the (selected) anchors into (xmin, ymin, xmax, ymax) boxes.
     """
-    boxes = np.zeros_like(raw_boxes)
-    x_scale, y_scale = shape
-
-    x_center = raw_boxes[..., 0] / x_scale * anchors[:, 2] + anchors[:, 0]
-    y_center = raw_boxes[..., 1] / y_scale * anchors[:, 3] + anchors[:, 1]
-
-    w = raw_boxes[..., 2] / x_scale * anchors[:, 2]
-    h = raw_boxes[..., 3] / y_scale * anchors[:, 3]
-
-    boxes[..., 1] = y_center - h / 2.0  # xmin
-    boxes[..., 0] = x_center - w / 2.0  # ymin
-    boxes[..., 3] = y_center + h / 2.0  # xmax
-    boxes[..., 2] = x_center + w / 2.0  # ymax
-
-    for k in range(num_keypoints):
-        offset = 4 + k * 2
-        keypoint_x = raw_boxes[..., offset] / x_scale * anchors[:, 2] + anchors[:, 0]
-        keypoint_y = (
-                raw_boxes[..., offset + 1] / y_scale * anchors[:, 3] + anchors[:, 1]
-        )
-        boxes[..., offset] = keypoint_x
-        boxes[..., offset + 1] = keypoint_y
+    decoded = raw_boxes[:, :4] * scale + offset
+    x_center, y_center, w, h = decoded.T
+    return np.stack([x_center - w / 2.0, y_center - h / 2.0, x_center + w / 2.0, y_center + h / 2.0], axis=-1)
 
-    return boxes
 
-
-def raw_to_detections(raw_box_tensor, raw_score_tensor, anchors_, shape, num_keypoints):
+def non_max_suppression(boxes, probs, overlap_threshold=0.3):
     """
-
-    This function converts these two "raw" tensors into proper detections.
-    Returns a list of (num_detections, 17) tensors, one for each image in
-    the batch.
-
-    This is based on the source code from:
-    mediapipe/calculators/tflite/tflite_tensors_to_detections_calculator.cc
-    mediapipe/calculators/tflite/tflite_tensors_to_detections_calculator.proto
+    Returns indices of the boxes that were kept, sorted by descending probability.
     """
-    detection_boxes = decode_boxes(raw_box_tensor, anchors_, shape, num_keypoints)
-    detection_scores = sigmoid(raw_score_tensor).squeeze(-1)
-    output_detections = []
-    for i in range(raw_box_tensor.shape[0]):
-        boxes = detection_boxes[i]
-        scores = np.expand_dims(detection_scores[i], -1)
-        output_detections.append(np.concatenate((boxes, scores), -1))
-    return output_detections
-
-
-def non_max_suppression(boxes, probs, overlap_threshold=0.3):
     if len(boxes) == 0:
-        return [], []
+        return []
 
     if boxes.dtype.kind == "i":
         boxes = boxes.astype("float")
@@ -152,11 +113,4 @@ def non_max_suppression(boxes, probs, overlap_threshold=0.3):
             idxs, np.concatenate(([last], np.where(overlap > overlap_threshold)[0]))
         )
 
-    return boxes[pick]
-
-
-def to_tensor_result(packet):
-    return {
-        name: np.array(packet.getLayerFp16(name))
-        for name in [tensor.name for tensor in packet.getRaw().tensors]
-    }
+    return pick
@@ -17,6 +17,7 @@ import depthai as dai
 
 from depthai_sdk.trigger_action.actions.abstract_action import Action
 from depthai_sdk.args_parser import ArgsParser
+from depthai_sdk.calibration import DeviceCalibration
 from depthai_sdk.classes.packet_handlers import (
     BasePacketHandler,
     QueuePacketHandler,
@@ -40,7 +41,7 @@ from depthai_sdk.components.parser import (
 )
 from depthai_sdk.components.stereo_component import StereoComponent
 from depthai_sdk.components.pointcloud_component import PointcloudComponent
-from depthai_sdk.record import RecordType, Record
+from depthai_sdk.record import RecordType, Record, QueuePolicy
 from depthai_sdk.replay import Replay
 from depthai_sdk.trigger_action.triggers.abstract_trigger import Trigger
 from depthai_sdk.utils import report_crash_dump
@@ -67,7 +68,8 @@ class OakCamera:
                  replay: Union[None, str, Path] = None,
                  rotation: int = 0,
                  config: dai.Device.Config = None,
-                 args: Union[bool, Dict] = True
+                 args: Union[bool, Dict] = True,
+                 persist_calibration: bool = False
                  ):
         """
         Initializes OakCamera
@@ -78,6 +80,8 @@ class OakCamera:
             replay (str, optional): Replay a depthai-recording - either local path, or from depthai-recordings repo
             rotation (int, optional): Rotate the camera output by this amount of degrees, 0 by default, 90, 180, 270 are supported.
             args (None, bool, Dict): Use user defined arguments when constructing the pipeline
+            persist_calibration (bool): Store the device calibration by MxId and load it on the next starts, instead
+                of reading the EEPROM. Defaults to False.
         """
 
         # User should be able to access these:
@@ -129,7 +133,7 @@ class OakCamera:
             self.replay = Replay(replay)
             self.replay.initPipeline(self.pipeline)
             LOGGER.info(f'Available streams from recording: {self.replay.getStreams()}')
-        self._calibration = self._init_calibration()
+        self.calibration = self._init_calibration(persist_calibration)
 
     def camera(self,
                source: Union[str, dai.CameraBoardSocket],
@@ -166,9 +170,9 @@ class OakCamera:
                     )
 
             if source == 'left':
-                source = self._calibration.getStereoLeftCameraId()
+                source = self.calibration.stereo_left()
             elif source == 'right':
-                source = self._calibration.getStereoRightCameraId()
+                source = self.calibration.stereo_right()
             elif source in ['color', 'rgb']:
                 source = get_first_color_cam(self.device)
             else:
@@ -477,6 +481,7 @@ class OakCamera:
         for handler in self._packet_handlers:
             handler.close()
 
+        DeviceCalibration.release(self.device)
         self.device.close()
 
     def _new_oak_msg(self, q_name: str, msg):
@@ -586,7 +591,9 @@ class OakCamera:
     def record(self,
                outputs: Union[ComponentOutput, List[ComponentOutput]],
                path: str,
-               record_type: RecordType = RecordType.VIDEO
+               record_type: RecordType = RecordType.VIDEO,
+               queue_size: int = 20,
+               queue_policy: QueuePolicy = QueuePolicy.BLOCK
                ) -> RecordPacketHandler:
         """
         Record component outputs. This handles syncing multiple streams (eg. left, right, color, depth) and saving
@@ -596,8 +603,10 @@ class OakCamera:
             outputs (Component/Component output): Component output(s) to be recorded.
             path: Folder path where to save these streams.
             record_type: Record type.
+            queue_size: Maximum number of frames queued per stream before queue_policy is applied.
+            queue_policy: Whether to block or drop frames when a stream can't be written fast enough.
         """
-        handler = RecordPacketHandler(outputs, Record(Path(path).resolve(), record_type))
+        handler = RecordPacketHandler(outputs, Record(Path(path).resolve(), record_type, queue_size, queue_policy))
         self._packet_handlers.append(handler)
         return handler
 
@@ -702,11 +711,13 @@ class OakCamera:
         """
         return self.device.getConnectedCameraFeatures()
 
-    def _init_calibration(self) -> dai.CalibrationHandler:
+    def _init_calibration(self, persist: bool) -> DeviceCalibration:
+        # Shared by all components and outputs of the device, EEPROM is read when the calibration is first needed
         if self.replay:
-            calibration = self.pipeline.getCalibrationData()
+            handler = self.pipeline.getCalibrationData()
+            if handler is None:
+                LOGGER.warning("No calibration data found in replay")
+            calibration = DeviceCalibration(self.device, calibration=handler)
         else:
-            calibration = self.device.readCalibration()
-        if calibration is None:
-            LOGGER.warning("No calibration data found on the device or in replay")
-        return calibration
+            calibration = DeviceCalibration(self.device, persist=persist)
+        return DeviceCalibration.register(self.device, calibration)
@@ -1,6 +1,8 @@
+import bisect
+import heapq
 import threading
 from datetime import timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 
 
 class SequenceNumSync:
@@ -9,83 +11,203 @@ class SequenceNumSync:
         Example:
 
         self.msgs = {
-            '1': {
+            1: {
                 'rgb': dai.Frame(),
                 'dets': dai.ImgDetections(),
             ],
-            '2': {
+            2: {
                 'rgb': dai.Frame(),
                 'dets': dai.ImgDetections(),
             }
         }
+
+        Sequence numbers of pending (partial) groups are also kept in a min-heap, so both the cleanup after a
+        successful sync and the eviction of stale groups (when more than `max_pending` groups are pending) only
+        touch the groups that get removed.
+        """
+
+    def __init__(self, stream_num: int, max_pending: int = 30):
         """
+        Args:
+            stream_num: Number of streams that need to be synced.
+            max_pending: Maximum number of partial groups kept. When exceeded, the oldest group is evicted.
+        """
+        if max_pending < 1:
+            raise ValueError('max_pending must be at least 1!')
 
-    def __init__(self, stream_num: int):
-        self.msgs: Dict[str, Dict[str, Any]] = dict()
+        self.msgs: Dict[int, Dict[str, Any]] = dict()
         self.stream_num: int = stream_num
+        self.max_pending = max_pending
         self.lock = threading.Lock()
 
+        self._seq_heap: List[int] = []
+        self.evicted_groups = 0  # Partial groups dropped because of the horizon or because a newer group synced
+
+    def _new_group(self) -> Dict[str, Any]:
+        """
+        Creates an empty group of messages for a new sequence number. Override for custom group structure.
+        """
+        return dict()
+
+    def _get_group(self, seq_num: int) -> Optional[Dict[str, Any]]:
+        """
+        Returns (and creates, if needed) the group of messages for the sequence number. Returns None if the
+        sequence number is older than all pending groups and there's no room for it.
+        """
+        group = self.msgs.get(seq_num)
+        if group is not None:
+            return group
+
+        group = self._new_group()
+        self.msgs[seq_num] = group
+        heapq.heappush(self._seq_heap, seq_num)
+
+        while len(self.msgs) > self.max_pending:
+            oldest = heapq.heappop(self._seq_heap)
+            del self.msgs[oldest]
+            self.evicted_groups += 1
+            if oldest == seq_num:
+                return None
+
+        return group
+
+    def _pop_synced(self, seq_num: int) -> Dict[str, Any]:
+        """
+        Removes and returns the synced group, together with all (older) groups that can't be synced anymore.
+        """
+        while self._seq_heap and self._seq_heap[0] < seq_num:
+            del self.msgs[heapq.heappop(self._seq_heap)]
+            self.evicted_groups += 1
+
+        heapq.heappop(self._seq_heap)
+        return self.msgs.pop(seq_num)
+
     def sync(self, seq_num: int, name: str, msg) -> Optional[Dict]:
-        seq_num = str(seq_num)
+        seq_num = int(seq_num)
 
         with self.lock:
-            if seq_num not in self.msgs:
-                self.msgs[seq_num] = dict()
+            group = self._get_group(seq_num)
+            if group is None:
+                return None
 
-            self.msgs[seq_num][name] = (msg)
+            group[name] = msg
 
-            if self.stream_num == len(self.msgs[seq_num]):
+            if self.stream_num == len(group):
                 # We have sequence num synced frames!
-                ret = self.msgs[seq_num]
-
-                # Remove previous msgs
-                new_msgs = {}
-                for name, msg in self.msgs.items():
-                    if int(name) > int(seq_num):
-                        new_msgs[name] = msg
-                self.msgs = new_msgs
-
-                return ret
+                return self._pop_synced(seq_num)
 
         return None
 
 
 class TimestampSync:
-    def __init__(self, stream_num: int, ms_threshold: int):
-        self.msgs: Dict[str, Any] = dict()
+    """
+    Timestamp syncing of multiple streams. Every stream keeps its messages in a time-ordered, bounded buffer,
+    so closest-message lookup is a bisect instead of a linear scan, and a stalled stream can't grow the
+    buffers of the other streams indefinitely.
+
+        self.timestamps = {name: [ts1, ts2, ...]}  # Sorted
+        self.msgs = {name: [msg1, msg2, ...]}  # Same order as timestamps
+
+    Messages get dropped either when the buffer of a stream is full (oldest message gets evicted), or when a
+    newer message of that stream got synced (older messages can't be synced anymore).
+    """
+
+    def __init__(self, stream_num: int, ms_threshold: int, max_queue_size: int = 30):
+        """
+        Args:
+            stream_num: Number of streams that need to be synced.
+            ms_threshold: Maximum time difference between synced messages, in milliseconds.
+            max_queue_size: Maximum number of messages stored per stream. When exceeded, the oldest message is evicted.
+        """
+        if max_queue_size < 1:
+            raise ValueError('max_queue_size must be at least 1!')
+
+        self.timestamps: Dict[str, List] = dict()
+        self.msgs: Dict[str, List[Any]] = dict()
         self.stream_num: int = stream_num
-        self.ms_threshold = ms_threshold
+        self.threshold = timedelta(milliseconds=ms_threshold)
+        self.max_queue_size = max_queue_size
+        self.lock = threading.Lock()
+
+        self.synced_count = 0
+        self.evicted: Dict[str, int] = dict()  # Dropped because the stream buffer was full
+        self.unmatched: Dict[str, int] = dict()  # Dropped because a newer message of the stream was synced
 
-    def sync(self, timestamp, name: str, msg):
+    def _add(self, timestamp, name: str, msg) -> None:
         if name not in self.msgs:
+            self.timestamps[name] = []
             self.msgs[name] = []
+            self.evicted[name] = 0
+            self.unmatched[name] = 0
+
+        timestamps = self.timestamps[name]
+        msgs = self.msgs[name]
+        if not timestamps or timestamps[-1] <= timestamp:
+            # Messages of a single stream usually arrive in order
+            timestamps.append(timestamp)
+            msgs.append(msg)
+        else:
+            i = bisect.bisect_right(timestamps, timestamp)
+            timestamps.insert(i, timestamp)
+            msgs.insert(i, msg)
+
+        if len(timestamps) > self.max_queue_size:
+            overflow = len(timestamps) - self.max_queue_size
+            del timestamps[:overflow]
+            del msgs[:overflow]
+            self.evicted[name] += overflow
+
+    def _closest(self, name: str, timestamp) -> Optional[int]:
+        """
+        Returns index of the message closest to the timestamp, or None if it isn't within the threshold.
+        """
+        timestamps = self.timestamps[name]
+        i = bisect.bisect_left(timestamps, timestamp)
+        best = None
+        best_diff = None
+        for j in (i - 1, i):
+            if 0 <= j < len(timestamps):
+                diff = abs(timestamps[j] - timestamp)
+                if best_diff is None or diff < best_diff:
+                    best, best_diff = j, diff
+
+        if best is None or self.threshold <= best_diff:
+            return None
+        return best
+
+    def sync(self, timestamp, name: str, msg) -> Optional[Dict]:
+        with self.lock:
+            self._add(timestamp, name, msg)
+
+            if len(self.msgs) < self.stream_num:
+                return None
+
+            synced = {}
+            for stream_name in self.msgs:
+                i = self._closest(stream_name, timestamp)
+                if i is None:
+                    return None
+                synced[stream_name] = i
 
-        self.msgs[name].append((timestamp, msg))
-
-        synced = {}
-        for name, arr in self.msgs.items():
-            # Go through all stored messages and calculate the time difference to the target msg.
-            # Then sort these self.msgs to find a msg that's closest to the target time, and check
-            # whether it's below 17ms which is considered in-sync.
-            diffs = []
-            for i, (msg_ts, msg) in enumerate(arr):
-                diffs.append(abs(msg_ts - timestamp))
-            if len(diffs) == 0:
-                break
-            diffs_sorted = diffs.copy()
-            diffs_sorted.sort()
-            dif = diffs_sorted[0]
-
-            if dif < timedelta(milliseconds=self.ms_threshold):
-                synced[name] = diffs.index(dif)
-
-        if len(synced) == self.stream_num:  # We have all synced streams
-            # Remove older self.msgs
-            for name, i in synced.items():
-                self.msgs[name] = self.msgs[name][i:]
+            # We have all synced streams. Remove synced and older msgs
             ret = {}
-            for name, arr in self.msgs.items():
-                ts, synced_msg = arr.pop(0)
-                ret[name] = synced_msg
+            for stream_name, i in synced.items():
+                ret[stream_name] = self.msgs[stream_name][i]
+                self.unmatched[stream_name] += i
+                del self.timestamps[stream_name][:i + 1]
+                del self.msgs[stream_name][:i + 1]
+
+            self.synced_count += 1
             return ret
-        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns syncing statistics: number of synced groups, and per-stream buffer size and dropped message counts.
+        """
+        with self.lock:
+            return {
+                'synced': self.synced_count,
+                'queued': {name: len(msgs) for name, msgs in self.msgs.items()},
+                'evicted': dict(self.evicted),
+                'unmatched': dict(self.unmatched),
+            }
@@ -40,5 +40,6 @@ class XoutDisparityDepth(XoutDisparity):
             colormap=self.colormap,
             aligned_frame=aligned_frame,
             disp_scale_factor=self.disp_scale_factor,
-            confidence_map=confidence_map
+            confidence_map=confidence_map,
+            colorizer=self.colorizer
         )
@@ -16,8 +16,10 @@ from depthai_sdk.visualize.configs import StereoColor
 
 try:
     import cv2
+    from depthai_sdk.visualize.depth_colorizer import DepthColorizer
 except ImportError:
     cv2 = None
+    DepthColorizer = None
 
 IR_FLOOD_LIMIT = 765
 IR_FLOOD_STEP = IR_FLOOD_LIMIT / 4
@@ -47,6 +49,8 @@ class XoutDisparity(XoutSeqSync, XoutFrames):
 
         self.colorize = colorize
         self.colormap = colormap
+        # Colorization lookup tables are shared by all packets of this output
+        self.colorizer = DepthColorizer(invalid_color=None, buffers=2) if DepthColorizer is not None else None
 
         self.ir_settings = ir_settings
         self._dot_projector_brightness = 0  # [0, 1200]
@@ -117,6 +121,7 @@ class XoutDisparity(XoutSeqSync, XoutFrames):
             colormap=self.colormap,
             confidence_map=confidence_map,
             aligned_frame=aligned_frame,
+            colorizer=self.colorizer
         )
         packet._get_codec = self.get_codec
 
@@ -1,4 +1,3 @@
-import threading
 from typing import List, Union, Dict, Any, Optional, Tuple
 
 import depthai as dai
@@ -168,8 +167,8 @@ class XoutTwoStage(XoutNnResults):
     inferencing.
 
     msgs = {
-        '1': TwoStageSyncPacket(),
-        '2': TwoStageSyncPacket(),
+        1: TwoStageSyncPacket(),
+        2: TwoStageSyncPacket(),
     }
     """
 
@@ -186,7 +185,6 @@ class XoutTwoStage(XoutNnResults):
         # Save StreamXout before initializing super()!
         super().__init__(det_nn, frames, det_out, bbox)
 
-        self.msgs: Dict[str, Dict[str, Any]] = dict()
         self.det_nn = det_nn
         self.second_nn = second_nn
         self.name = 'Two-stage detection'
@@ -199,8 +197,6 @@ class XoutTwoStage(XoutNnResults):
         self.input_queue = None
         self.input_cfg_queue = None
 
-        self.lock = threading.Lock()
-
     def xstreams(self) -> List[StreamXout]:
         return [self.frames, self.nn_results, self.second_nn_out]
 
@@ -211,26 +207,26 @@ class XoutTwoStage(XoutNnResults):
             return  # From Replay modules. TODO: better handling?
 
         # TODO: what if msg doesn't have sequence num?
-        seq = str(msg.getSequenceNum())
+        seq = msg.getSequenceNum()
 
-        if seq not in self.msgs:
-            self.msgs[seq] = dict()
-            self.msgs[seq][self.second_nn_out.name] = []
-            self.msgs[seq][self.nn_results.name] = None
+        with self.lock:
+            group = self._get_group(seq)
+        if group is None:
+            return  # Older than all pending groups, can't be synced anymore
 
         if name == self.second_nn_out.name:
             fn = self.second_nn._decode_fn
             if fn is not None:
-                self.msgs[seq][name].append(fn(msg))
+                group[name].append(fn(msg))
             else:
-                self.msgs[seq][name].append(msg)
+                group[name].append(msg)
 
         elif name == self.nn_results.name:
             fn = self.det_nn._decode_fn
             if fn is not None:
                 msg = fn(msg)
 
-            self.add_detections(seq, msg)
+            self.add_detections(group, msg)
 
             if self.input_queue_name:
                 # We cannot create them in __init__ as device is not initialized yet
@@ -269,7 +265,7 @@ class XoutTwoStage(XoutNnResults):
 
                     if i == 0:
                         try:
-                            frame = self.msgs[seq][self.frames.name]
+                            frame = group[self.frames.name]
                         except KeyError:
                             continue
 
@@ -279,34 +275,38 @@ class XoutTwoStage(XoutNnResults):
                     self.input_cfg_queue.send(cfg)
 
         elif name in self.frames.name:
-            self.msgs[seq][name] = msg
+            group[name] = msg
         else:
             raise ValueError('Message from unknown stream name received by TwoStageSeqSync!')
 
-        if self.synced(seq):
+        if self.synced(group):
             # Frames synced!
-            dets = self.msgs[seq][self.nn_results.name]
+            with self.lock:
+                if seq not in self.msgs:
+                    return  # Already synced (or evicted) by another thread
+                self._pop_synced(seq)
+
+            dets = group[self.nn_results.name]
             packet = TwoStagePacket(
                 self.get_packet_name(),
-                self.msgs[seq][self.frames.name],
+                group[self.frames.name],
                 dets,
-                self.msgs[seq][self.second_nn_out.name],
+                group[self.second_nn_out.name],
                 self.whitelist_labels,
                 self.bbox
             )
 
-            with self.lock:
-                new_msgs = {}
-                for name, msg in self.msgs.items():
-                    if int(name) > int(seq):
-                        new_msgs[name] = msg
-                self.msgs = new_msgs
-
             return self._add_detections_to_packet(packet, dets)
 
-    def add_detections(self, seq: str, dets: dai.ImgDetections):
+    def _new_group(self) -> Dict[str, Any]:
+        return {
+            self.second_nn_out.name: [],
+            self.nn_results.name: None
+        }
+
+    def add_detections(self, group: Dict[str, Any], dets: dai.ImgDetections):
         # Used to match the scaled bounding boxes by the 2-stage NN script node
-        self.msgs[seq][self.nn_results.name] = dets
+        group[self.nn_results.name] = dets
 
         if isinstance(dets, dai.ImgDetections):
             if self.scale_bb is None:
@@ -320,32 +320,30 @@ class XoutTwoStage(XoutNnResults):
                 det.xmax += self.scale_bb[0] / 100
                 det.ymax += self.scale_bb[1] / 100
 
-    def synced(self, seq: str) -> bool:
+    def synced(self, packet: Dict[str, Any]) -> bool:
         """
         Messages are in sync if:
             - dets is not None
             - We have at least one ImgFrame
             - number of recognition msgs is sufficient
         """
-        packet = self.msgs[seq]
-
         if self.frames.name not in packet:
             return False  # We don't have required ImgFrames
 
         if not packet[self.nn_results.name]:
             return False  # We don't have dai.ImgDetections
 
-        if len(packet[self.second_nn_out.name]) < self.required_recognitions(seq):
+        if len(packet[self.second_nn_out.name]) < self.required_recognitions(packet):
             return False  # We don't have enough 2nd stage NN results
 
         # print('Synced!')
         return True
 
-    def required_recognitions(self, seq: str) -> int:
+    def required_recognitions(self, packet: Dict[str, Any]) -> int:
         """
         Required recognition results for this packet, which depends on number of detections (and white-list labels)
         """
-        dets: List[dai.ImgDetection] = self.msgs[seq][self.nn_results.name].detections
+        dets: List[dai.ImgDetection] = packet[self.nn_results.name].detections
         if self.whitelist_labels:
             return len([det for det in dets if det.label in self.whitelist_labels])
         else:
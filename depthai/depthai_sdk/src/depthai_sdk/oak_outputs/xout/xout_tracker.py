@@ -1,27 +1,31 @@
 import math
+from collections import deque
 from datetime import timedelta
-from typing import Dict, Optional, List, Union, Tuple
+from typing import Dict, Optional, List, Tuple, Deque
 
 import depthai as dai
 import numpy as np
 
+from depthai_sdk.calibration import DeviceCalibration
 from depthai_sdk.classes import TrackerPacket
 from depthai_sdk.classes.packets import TrackingDetection
 from depthai_sdk.logger import LOGGER
 from depthai_sdk.oak_outputs.xout.xout_base import StreamXout
 from depthai_sdk.oak_outputs.xout.xout_nn import XoutNnResults
-from depthai_sdk.tracking import KalmanFilter
+from depthai_sdk.tracking import BatchKalmanFilter, TrackletHistory
 from depthai_sdk.visualize.bbox import BoundingBox
 
 
 class TrackedObject:
-    def __init__(self, baseline: float, focal: float, apply_kalman: bool, calculate_speed: bool):
-        # Point
-        self.kalman_3d: Optional[KalmanFilter] = None
-        # BBox
-        self.kalman_2d: Optional[KalmanFilter] = None
-
-        self.previous_detections: List[TrackingDetection] = []
+    def __init__(self,
+                 baseline: float,
+                 focal: float,
+                 apply_kalman: bool,
+                 calculate_speed: bool,
+                 history_size: int = 128):
+        # Last `history_size` detections (eg. for drawing tails), and their 3D positions for speed estimation
+        self.previous_detections: Deque[TrackingDetection] = deque(maxlen=history_size)
+        self.history = TrackletHistory(capacity=history_size, window=1.0)
         self.blacklist = False
         self.lost_counter = 0
 
@@ -30,8 +34,17 @@ class TrackedObject:
         self.apply_kalman = apply_kalman
         self.calculate_speed = calculate_speed
 
-    def new_tracklet(self, tracklet: dai.Tracklet, ts: timedelta, color: Tuple, label: str):
-        is_3d = self._is_3d(tracklet)
+    def new_tracklet(self,
+                     tracklet: dai.Tracklet,
+                     ts: timedelta,
+                     color: Tuple,
+                     label: str,
+                     filtered_2d: Optional[BoundingBox] = None,
+                     filtered_3d: Optional[dai.Point3f] = None):
+        """
+        Kalman filtering is done by XoutTracker for all tracked objects at once, filtered results are passed here.
+        """
+        is_3d = self.is_3d(tracklet)
         tracking_det = TrackingDetection(
             img_detection=tracklet.srcImgDetection,
             label_str=label,
@@ -41,94 +54,28 @@ class TrackedObject:
             angle=None,
             tracklet=tracklet,
             ts=ts,
-            filtered_2d=self._calc_kalman_2d(tracklet, ts) if self.apply_kalman else None,
-            filtered_3d=self._calc_kalman_3d(tracklet, ts) if self.apply_kalman and is_3d else None,
+            filtered_2d=filtered_2d if self.apply_kalman else None,
+            filtered_3d=filtered_3d if self.apply_kalman and is_3d else None,
             speed=None,
         )
         self.previous_detections.append(tracking_det)
-        # Calc speed should be called after adding new TrackingDetection to self.previous_detections
-        tracking_det.speed = self.calc_speed(ts) if (self.calculate_speed and is_3d) else None
+        if self.calculate_speed and is_3d:
+            coords = tracking_det.filtered_3d or tracklet.spatialCoordinates
+            self.history.add(ts.total_seconds(), coords.x, coords.y, coords.z)
+            tracking_det.speed = self.calc_speed(ts)
 
-    def calc_speed(self, ts: timedelta) -> Union[float, np.ndarray]:
+    def calc_speed(self, ts: timedelta) -> float:
         """
-        Should be called after adding new TrackingDetection to self.previous_detections
+        Average speed (m/s) of the object over the last second.
         """
+        return self.history.speed(ts.total_seconds())
 
-        def get_coords(det) -> dai.Point3f:
-            return det.filtered_3d or det.tracklet.spatialCoordinates
-
-        def get_dist(p1: dai.Point3f, p2: dai.Point3f) -> float:
-            return np.sqrt((p2.x - p1.x) ** 2 + (p2.y - p1.y) ** 2 + (p2.z - p1.z) ** 2) / 1000
-
-        speeds = []
-        for i in range(len(self.previous_detections) - 1):
-            d1 = self.previous_detections[i]
-            # if d1 timestamp is older than 1 second, skip
-            if (ts - d1.ts).total_seconds() > 1:
-                continue
-            d2 = self.previous_detections[i + 1]
-            distance = get_dist(get_coords(d1), get_coords(d2))
-            time = (d2.ts - d1.ts).total_seconds()
-            speeds.append(distance / time)
-
-        if len(speeds) == 0:
-            return 0.0
-
-        window_size = 3
-        window = np.hanning(window_size)
-        window /= window.sum()
-
-        smoothed = np.convolve(speeds, window, mode='same')
-        return np.mean(smoothed)
-
-    def _is_3d(self, tracklet: dai.Tracklet) -> bool:
+    @staticmethod
+    def is_3d(tracklet: dai.Tracklet) -> bool:
         return (tracklet.spatialCoordinates.x != 0.0 or
                 tracklet.spatialCoordinates.y != 0.0 or
                 tracklet.spatialCoordinates.z != 0.0)
 
-    def _calc_kalman_3d(self, tracklet: dai.Tracklet, ts: timedelta) -> Union[None, dai.Point3f]:
-        x_space = tracklet.spatialCoordinates.x
-        y_space = tracklet.spatialCoordinates.y
-        z_space = tracklet.spatialCoordinates.z
-        meas_vec_space = np.array([[x_space], [y_space], [z_space]])
-        meas_std_space = z_space ** 2 / (self.baseline * self.focal)
-
-        if self.kalman_3d is None:
-            self.kalman_3d = KalmanFilter(10, 0.1, meas_vec_space, ts)
-            return None
-
-        dt = (ts - self.kalman_3d.time).total_seconds()
-        self.kalman_3d.predict(dt)
-        self.kalman_3d.update(meas_vec_space)
-        self.kalman_3d.time = ts
-        self.kalman_3d.meas_std = meas_std_space
-        vec_space = self.kalman_3d.x
-        return dai.Point3f(vec_space[0], vec_space[1], vec_space[2])
-
-    def _calc_kalman_2d(self, tracklet: dai.Tracklet, ts: timedelta) -> Union[None, BoundingBox]:
-        bb = BoundingBox(tracklet.srcImgDetection)
-        x_mid, y_mid = bb.get_centroid().to_tuple()
-
-        meas_vec_bbox = np.array([[x_mid], [y_mid], [bb.width], [bb.height]])
-
-        if self.kalman_2d is None:
-            self.kalman_2d = KalmanFilter(10, 0.1, meas_vec_bbox, ts)
-            return None
-
-        dt = (ts - self.kalman_2d.time).total_seconds()
-
-        self.kalman_2d.predict(dt)
-        self.kalman_2d.update(meas_vec_bbox)
-        self.kalman_2d.time = ts
-        vec_bbox = self.kalman_2d.x
-
-        return BoundingBox([
-            vec_bbox[0][0] - vec_bbox[2][0] / 2,
-            vec_bbox[1][0] - vec_bbox[3][0] / 2,
-            vec_bbox[0][0] + vec_bbox[2][0] / 2,
-            vec_bbox[1][0] + vec_bbox[3][0] / 2,
-        ])
-
 
 class XoutTracker(XoutNnResults):
     def __init__(self,
@@ -156,10 +103,57 @@ class XoutTracker(XoutNnResults):
         self.forget_after_n_frames = forget_after_n_frames
         self.calculate_speed = calculate_speed
 
+        # Kalman filters of all tracked objects; bbox (x, y, w, h) and spatial point (x, y, z)
+        self._kalman_2d = BatchKalmanFilter(dim_z=4, acc_std=10, meas_std=0.1)
+        self._kalman_3d = BatchKalmanFilter(dim_z=3, acc_std=10, meas_std=0.1)
+
+    def _apply_kalman(self, tracklets: List[dai.Tracklet], ts: timedelta) -> Tuple[List, List]:
+        """
+        Filters bounding boxes and spatial coordinates of all tracklets at once.
+
+        Returns:
+            Filtered 2D bounding boxes and filtered 3D points, None for tracklets that were just initialized.
+        """
+        time = ts.total_seconds()
+        ids = [t.id for t in tracklets]
+        filtered_2d = [None] * len(tracklets)
+        filtered_3d = [None] * len(tracklets)
+
+        meas_bbox = []
+        for t in tracklets:
+            bb = BoundingBox(t.srcImgDetection)
+            x_mid, y_mid = bb.get_centroid().to_tuple()
+            meas_bbox.append((x_mid, y_mid, bb.width, bb.height))
+
+        states, filtered = self._kalman_2d.step(ids, np.array(meas_bbox), time)
+        for i, (x, y, w, h) in enumerate(states.tolist()):
+            if filtered[i]:
+                filtered_2d[i] = BoundingBox([x - w / 2, y - h / 2, x + w / 2, y + h / 2])
+
+        idx_3d = [i for i, t in enumerate(tracklets) if TrackedObject.is_3d(t)]
+        if idx_3d:
+            meas_space = np.array([(tracklets[i].spatialCoordinates.x,
+                                    tracklets[i].spatialCoordinates.y,
+                                    tracklets[i].spatialCoordinates.z) for i in idx_3d])
+            meas_std_space = meas_space[:, 2] ** 2 / (self.baseline * self.focal)
+            states, filtered = self._kalman_3d.step([ids[i] for i in idx_3d], meas_space, time, meas_std_space)
+            for k, i in enumerate(idx_3d):
+                if filtered[k]:
+                    filtered_3d[i] = dai.Point3f(*states[k].tolist())
+
+        return filtered_2d, filtered_3d
+
     def package(self, msgs: Dict) -> TrackerPacket:
         tracklets: dai.Tracklets = msgs[self.nn_results.name]
+        ts = tracklets.getTimestamp()
+
+        all_tracklets = tracklets.tracklets
+        if self.apply_kalman and len(all_tracklets):
+            filtered_2d, filtered_3d = self._apply_kalman(all_tracklets, ts)
+        else:
+            filtered_2d = filtered_3d = [None] * len(all_tracklets)
 
-        for tracklet in tracklets.tracklets:
+        for i, tracklet in enumerate(all_tracklets):
             # If there is no id in self.tracked_objects, create new TrackedObject. This could happen if
             # TrackingStatus.NEW, or we removed it (too many lost frames)
             if tracklet.id not in self.tracked_objects:
@@ -178,15 +172,19 @@ class XoutTracker(XoutNnResults):
             # and speed estimation
             self.tracked_objects[tracklet.id] \
                 .new_tracklet(tracklet,
-                              tracklets.getTimestamp(),
+                              ts,
                               self.labels[img_d.label][1] if self.labels else (255, 255, 255),
-                              self.labels[img_d.label][0] if self.labels else str(img_d.label)
+                              self.labels[img_d.label][0] if self.labels else str(img_d.label),
+                              filtered_2d[i],
+                              filtered_3d[i]
                               )
             if tracklet.status == dai.Tracklet.TrackingStatus.REMOVED or \
                     (self.forget_after_n_frames is not None and \
                      self.forget_after_n_frames <= self.tracked_objects[tracklet.id].lost_counter):
                 # Remove TrackedObject
                 self.tracked_objects.pop(tracklet.id)
+                self._kalman_2d.remove(tracklet.id)
+                self._kalman_3d.remove(tracklet.id)
 
         packet = TrackerPacket(
             self.get_packet_name(),
@@ -196,21 +194,18 @@ class XoutTracker(XoutNnResults):
         )
 
         for obj_id, tracked_obj in self.tracked_objects.items():
-            if obj_id not in packet.tracklets:
-                packet.tracklets[obj_id] = []
-            for tracking_det in tracked_obj.previous_detections:
-                packet.tracklets[obj_id].append(tracking_det)
+            packet.tracklets[obj_id] = list(tracked_obj.previous_detections)
 
         return packet
 
     def __read_device_calibration(self, device: dai.Device):
-        calib = device.readCalibration()
-        eeprom = calib.getEepromData()
-        left_cam = calib.getStereoLeftCameraId()
+        calib = DeviceCalibration.of(device)
+        eeprom = calib.eeprom()
+        left_cam = calib.stereo_left()
         if left_cam != dai.CameraBoardSocket.AUTO and left_cam in eeprom.cameraData.keys():
             cam_info = eeprom.cameraData[left_cam]
             self.baseline = abs(cam_info.extrinsics.specTranslation.x * 10)  # cm -> mm
-            fov = calib.getFov(calib.getStereoLeftCameraId())
+            fov = calib.fov(left_cam)
             self.focal = (cam_info.width / 2) / (2. * math.tan(math.radians(fov / 2)))
         else:
             LOGGER.warning("Calibration data missing, using OAK-D defaults")
@@ -6,6 +6,7 @@ import numpy as np
 
 try:
     import cv2
+    from depthai_sdk.visualize.depth_colorizer import DepthColorizer
 except ImportError:
     cv2 = None
 
@@ -159,13 +160,15 @@ class PreviewDecoder:
             return packet.getFrame()
 
     @staticmethod
-    def depth(depthRaw, manager=None):
+    def depth(depthRaw, manager=None, copy=True):
         """
         Produces depth frame from raw depth frame (converts to disparity and applies color map)
 
         Args:
             depthRaw (numpy.ndarray): OpenCV frame containing raw depth frame
             manager (depthai_sdk.managers.PreviewManager, optional): PreviewManager instance
+            copy (bool, optional): If False, the colorizer's reused output buffer is returned, which is overwritten by
+                later depth frames (for callers that copy or display the frame right away)
 
         Returns:
             numpy.ndarray: Ready to use OpenCV frame
@@ -185,12 +188,22 @@ class PreviewDecoder:
             dispScaleFactor = baseline * focal
             if manager is not None:
                 setattr(manager, "dispScaleFactor", dispScaleFactor)
-        with np.errstate(divide='ignore'):
-            dispFrame = dispScaleFactor / depthRaw
-
-        dispFrame = (dispFrame * 255. / dispIntegerLevels).astype(np.uint8)
-
-        return PreviewDecoder.disparityColor(dispFrame, manager)
+        # Depth -> disparity -> color is precomputed for all uint16 depth values, tables are cached on the manager
+        colorizer = getattr(manager, "_depthColorizer", None)
+        if colorizer is None:
+            colorizer = DepthColorizer(invalid_color=None, buffers=2)
+            manager._depthColorizer = colorizer
+
+        def depthToIndex(depth):
+            with np.errstate(divide='ignore'):
+                index = dispScaleFactor / depth * 255. / dispIntegerLevels
+            index[0] = 0
+            return index
+
+        colorizer.set_colormap(manager.colorMap)
+        colorizer.set_lut(depthToIndex, key=(dispScaleFactor, dispIntegerLevels))
+        frame = colorizer.colorize(depthRaw)
+        return frame.copy() if copy else frame
 
     @staticmethod
     def disparity(packet, manager=None):
@@ -1,12 +1,17 @@
 import os
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
 
 import numpy as np
 
 
 class AbstractReader(ABC):
+    # Whether streams can be read independently with read_stream() (eg. decoded on separate threads)
+    supports_stream_reads = False
+    # Whether seek() is supported
+    supports_seek = False
+
     @abstractmethod
     def read(self) -> Dict[str, np.ndarray]:
         """
@@ -15,6 +20,55 @@ class AbstractReader(ABC):
         """
         pass
 
+    def read_stream(self, name: str) -> Optional[np.ndarray]:
+        """
+        Read the next frame of a single stream, only if supports_stream_reads is True. Different streams can be read
+        from different threads.
+        @return: Frame, or None if there are no more frames.
+        """
+        raise NotImplementedError(f'{type(self).__name__} can only read all streams at once')
+
+    def get_timestamp(self, name: str = None) -> Optional[float]:
+        """
+        Recorded timestamp (in seconds) of the last frame that was read (of the stream, if specified).
+        @return: Timestamp, or None if the recording doesn't contain timestamps.
+        """
+        return None
+
+    def seek(self, timestamp: Optional[float] = None, frame_index: Optional[int] = None) -> None:
+        """
+        Sets the position of all streams, only if supports_seek is True. The next read() returns the frame at the
+        position.
+        @param timestamp: Seconds from the start of the recording, each stream is set to its last frame at or before
+        the timestamp.
+        @param frame_index: Index of the frame (of each stream).
+        """
+        raise NotImplementedError(f"{type(self).__name__} doesn't support seeking")
+
+    def get_frame_index(self, name: str = None) -> Optional[int]:
+        """
+        Index of the last frame that was read (of the stream, if specified), -1 before the first read.
+        @return: Frame index, or None if the reader doesn't track positions.
+        """
+        return None
+
+    def get_frame_count(self, name: str = None) -> Optional[int]:
+        """
+        @return: Number of frames (of the stream, if specified, otherwise of the shortest stream), or None if unknown.
+        """
+        return None
+
+    def get_duration(self) -> Optional[float]:
+        """
+        @return: Duration of the recording in seconds, or None if unknown.
+        """
+        return None
+
+    @staticmethod
+    def _check_seek(timestamp: Optional[float], frame_index: Optional[int]) -> None:
+        if (timestamp is None) == (frame_index is None):
+            raise ValueError('Either timestamp or frame_index has to be specified')
+
     @abstractmethod
     def getStreams(self) -> List[str]:
         pass
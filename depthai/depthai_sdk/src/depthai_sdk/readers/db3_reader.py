@@ -8,12 +8,18 @@ from rosbags.serde import deserialize_cdr
 
 from depthai_sdk.previews import PreviewDecoder
 from depthai_sdk.readers.abstract_reader import AbstractReader
+from depthai_sdk.readers.recording_index import RecordingIndex
 
 
 class Db3Reader(AbstractReader):
+    """
+    Reads ROS2 bags (.db3). Seeking uses the bag's timestamp index, with a RecordingIndex of the message timestamps
+    of each stream (built on the first seek).
+    """
     STREAMS = ['left', 'right', 'rgb', 'depth']
     generators: Dict[str, Generator] = {}
     frames = None  # For shapes
+    supports_seek = True
 
     def __init__(self, folder: Path) -> None:
         self.reader = Reader(str(folder))
@@ -21,33 +27,89 @@ class Db3Reader(AbstractReader):
         self.generators: Dict[str, Generator] = {}
         self.frames = None  # For shapes
 
+        self._connections = dict()
         for con in self.reader.connections:
             for stream in self.STREAMS:
                 if stream.lower() in con.topic.lower():
-                    self.generators[stream.lower()] = self.reader.messages([con])
+                    self._connections[stream.lower()] = con
+
+        self._source = folder / self._fileWithExt(folder, '.db3')
+        self._index_path = RecordingIndex.path_for(folder)
+        self._index: Optional[RecordingIndex] = None
+        self._timestamp: Optional[float] = None
+        self._frame_index = -1
 
         # For shapes
+        self._open_generators()
         self.frames = self.read()
+        self._open_generators()
 
-        for con in self.reader.connections:
-            for stream in self.STREAMS:
-                if stream.lower() in con.topic.lower():
-                    self.generators[stream.lower()] = self.reader.messages([con])
+    def _open_generators(self, start: Dict[str, Optional[int]] = None) -> None:
+        for name, con in self._connections.items():
+            self.generators[name] = self.reader.messages([con], start=start.get(name) if start else None)
+        self._timestamp = None
+        self._frame_index = -1
 
     def read(self) -> Optional[Dict[str, np.ndarray]]:
         ros_msgs: Dict[str, np.ndarray] = dict()
 
         try:
+            timestamp = None
             for name, gen in self.generators.items():
                 con, ts, raw = next(gen)
                 ros_msgs[name] = self._getCvFrame(deserialize_cdr(raw, con.msgtype), name)
+                if timestamp is None:
+                    timestamp = ts
+            if timestamp is not None:
+                self._timestamp = (timestamp - self.reader.start_time) / 1e9
+            self._frame_index += 1
             return ros_msgs
         except:
             return None
 
+    def seek(self, timestamp: Optional[float] = None, frame_index: Optional[int] = None) -> None:
+        self._check_seek(timestamp, frame_index)
+        index = self._get_index()
+        start = dict()
+        first = None
+        for name in self.generators:
+            i = index.frame_at(name, timestamp) if frame_index is None else frame_index
+            if i < index.frame_count(name):
+                start[name] = self.reader.start_time + int(round(index.timestamp(name, i) * 1e9))
+            else:  # Past the end
+                start[name] = self.reader.end_time + 1
+            if first is None:
+                first = i
+        self._open_generators(start)
+        self._frame_index = (first or 0) - 1
+
+    def _get_index(self) -> RecordingIndex:
+        if self._index is None:
+            self._index = RecordingIndex(self._index_path)
+        return self._index.update({name: self._source for name in self.generators}, self._index_stream)
+
+    def _index_stream(self, name: str, source: Path) -> Tuple[np.ndarray, np.ndarray]:
+        # Only message timestamps, messages aren't deserialized. All frames are keyframes (images)
+        timestamps = np.array([ts for _, ts, _ in self.reader.messages([self._connections[name]])], dtype=np.int64)
+        return (timestamps - self.reader.start_time) / 1e9, np.arange(len(timestamps))
+
+    def get_timestamp(self, name: str = None) -> Optional[float]:
+        return self._timestamp
+
+    def get_frame_index(self, name: str = None) -> Optional[int]:
+        return self._frame_index
+
+    def get_frame_count(self, name: str = None) -> Optional[int]:
+        index = self._get_index()
+        return index.frame_count(name) if name else min((index.frame_count(n) for n in self.generators), default=0)
+
+    def get_duration(self) -> Optional[float]:
+        return self.reader.duration / 1e9
+
     def disableStream(self, name: str):
         if name in self.generators:
             del self.generators[name]
+            del self._connections[name]
 
     def _getCvFrame(self, msg, name: str):
         """
@@ -1,17 +1,24 @@
+import json
 import os
 import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Tuple, Dict
+from threading import Lock
+from typing import List, Tuple, Dict, Optional
 
 import cv2
 import numpy as np
 
+from depthai_sdk.logger import LOGGER
 from depthai_sdk.readers.abstract_reader import AbstractReader
 
 # Supported image formats:
 _imageExt = ['.bmp', '.dib', '.jpeg', '.jpg', '.jpe', '.jp2', '.png', '.webp', '.pbm', '.pgm', '.ppm', '.pxm',
              '.pnm', '.pfm', '.sr', '.ras', '.tiff', '.tif', '.exr', '.hdr', '.pic']
 
+_STORE_VERSION = 1
+
 
 def get_name_flag(name: str) -> Tuple:
     stream = 'color'
@@ -27,36 +34,64 @@ class ImageReader(AbstractReader):
     Reads image(s) in the file. If file name is 'left'/'right', it will take those as the stereo camera pair, otherwise
     it will send them as color frames. If it has multiple frames of the same stream it will cycle them with 1.5 sec
     delay.
-    """
 
-    def __init__(self, path: Path) -> None:
-        self.frames: Dict[str, List] = {
+    Only file names are listed up front, images are decoded when they are read, into an LRU cache, and the next
+    images are decoded ahead of time on a background thread. Folders that are replayed repeatedly can be decoded once
+    into a memory-mapped frame store (build_store()), which is used instead of the image files while it's up to date.
+    """
+    supports_seek = True
+
+    def __init__(self, path: Path, cache_size: int = 16, prefetch: int = 4, use_store: bool = True) -> None:
+        """
+        Args:
+            path: Image file, or folder of images.
+            cache_size: Max number of decoded images that are kept in memory.
+            prefetch: Number of following images (of each stream) that are decoded ahead of time.
+            use_store: Use the frame store of the folder if it was built and is up to date.
+        """
+        self.files: Dict[str, List[Path]] = {
             'color': [],
             'left': [],
             'right': [],
         }
+        self.flags: Dict[str, int] = dict()
         self.cntr: Dict[str, int] = dict()
 
         if path.is_file():
             stream, flag = get_name_flag(path.stem)
-            self.frames[stream].append(cv2.imread(str(path), flag))
+            self.files[stream].append(path)
+            self.flags[stream] = flag
+            first = (path, flag)
         else:
-            shape = None
+            first = None
             for fileName in sorted(os.listdir(str(path))):
                 f_name, ext = os.path.splitext(fileName)
                 if ext not in _imageExt: continue
                 stream, flag = get_name_flag(f_name)
+                self.files[stream].append(path / fileName)
+                self.flags[stream] = flag
+                if first is None:
+                    first = (path / fileName, flag)
 
-                frame = cv2.imread(str(path / fileName), flag)
-                if shape is None:
-                    shape = (frame.shape[1], frame.shape[0])
-                # Resize, so all images are the same size
-                frame = cv2.resize(frame, shape)
+        for name, arr in self.files.items():
+            self.cntr[name] = 0
 
-                self.frames[stream].append(frame)
+        # All images are resized to the size of the first one
+        self.shape: Optional[Tuple[int, int]] = None
+        if first is not None:
+            frame = cv2.imread(str(first[0]), first[1])
+            self.shape = (frame.shape[1], frame.shape[0])
 
-        for name, arr in self.frames.items():
-            self.cntr[name] = 0
+        self.prefetch = max(0, int(prefetch))
+        self._cache_size = max(1, int(cache_size), self.prefetch * len(self.getStreams()) + 1)
+        self._cache: 'OrderedDict[Tuple[str, int], np.ndarray]' = OrderedDict()
+        self._pending: Dict[Tuple[str, int], Future] = dict()
+        self._lock = Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1) if 0 < self.prefetch else None
+
+        self._store: Dict[str, np.ndarray] = dict()
+        if use_store and path.is_dir():
+            self._store = self._open_store(path)
 
         self.last_cycle_time = time.time()
         self.cycle_sec = 3.0  # Images get cycled every 3 seconds by default
@@ -70,35 +105,146 @@ class ImageReader(AbstractReader):
             self.last_cycle_time = time.time()
             for name in self.cntr:
                 self.cntr[name] += 1
-                if len(self.frames[name]) <= self.cntr[name]:
+                if len(self.files[name]) <= self.cntr[name]:
                     self.cntr[name] = 0
 
         msgs: Dict[str, np.ndarray] = dict()
-        for name, arr in self.frames.items():
+        for name, arr in self.files.items():
             if 0 < len(arr):
-                msgs[name] = arr[self.cntr[name]]
+                msgs[name] = self._get(name, self.cntr[name])
+                self._prefetch(name, self.cntr[name])
         return msgs
 
+    def _get(self, name: str, i: int) -> np.ndarray:
+        if name in self._store:
+            return self._store[name][i]
+
+        key = (name, i)
+        with self._lock:
+            frame = self._cache.get(key)
+            if frame is not None:
+                self._cache.move_to_end(key)
+                return frame
+            future = self._pending.get(key)
+        if future is not None:
+            return future.result()
+        return self._load(name, i)
+
+    def _load(self, name: str, i: int) -> np.ndarray:
+        frame = self._decode(self.files[name][i], self.flags[name], self.shape)
+        with self._lock:
+            self._cache[(name, i)] = frame
+            self._cache.move_to_end((name, i))
+            while self._cache_size < len(self._cache):
+                self._cache.popitem(last=False)
+            self._pending.pop((name, i), None)
+        return frame
+
+    @staticmethod
+    def _decode(file: Path, flag: int, shape: Tuple[int, int]) -> np.ndarray:
+        frame = cv2.imread(str(file), flag)
+        if frame is None:
+            raise RuntimeError(f"Couldn't read image '{file}'")
+        if (frame.shape[1], frame.shape[0]) != shape:
+            frame = cv2.resize(frame, shape)
+        return frame
+
+    def _prefetch(self, name: str, i: int) -> None:
+        if self._executor is None or name in self._store:
+            return
+        count = len(self.files[name])
+        for j in range(i + 1, i + 1 + min(self.prefetch, count - 1)):
+            key = (name, j % count)
+            with self._lock:
+                if key in self._cache or key in self._pending:
+                    continue
+                self._pending[key] = self._executor.submit(self._load, *key)
+
+    @staticmethod
+    def _store_paths(folder: Path) -> Tuple[Path, Dict[str, Path]]:
+        # Metadata (source files and shape), and frames of each stream
+        streams = ['color', 'left', 'right']
+        return folder / 'frame_store.json', {name: folder / f'frame_store_{name}.npy' for name in streams}
+
+    def _store_signature(self) -> Dict:
+        streams = dict()
+        for name, files in self.files.items():
+            if files:
+                streams[name] = [[f.name, f.stat().st_size, f.stat().st_mtime_ns] for f in files]
+        return {'version': _STORE_VERSION, 'shape': list(self.shape) if self.shape else None, 'streams': streams}
+
+    def _open_store(self, folder: Path) -> Dict[str, np.ndarray]:
+        meta_path, paths = self._store_paths(folder)
+        if not meta_path.exists():
+            return dict()
+        try:
+            with open(meta_path) as f:
+                if json.load(f) != self._store_signature():
+                    LOGGER.info(f'Frame store of {folder} is outdated, reading the images')
+                    return dict()
+            return {name: np.load(str(paths[name]), mmap_mode='r') for name in self.getStreams()}
+        except (OSError, ValueError) as e:
+            LOGGER.warning(f"Couldn't open the frame store of {folder}: {e}")
+            return dict()
+
+    @classmethod
+    def build_store(cls, folder: Path) -> None:
+        """
+        Decodes all images of the folder into memory-mapped .npy files (one per stream) in the folder, so the images
+        don't have to be decoded on each replay. The store is used while the images don't change.
+        """
+        reader = cls(folder, prefetch=0, use_store=False)
+        meta_path, paths = cls._store_paths(folder)
+        if meta_path.exists():
+            meta_path.unlink()  # Invalidate the old store first
+        for name in reader.getStreams():
+            w, h = reader.shape
+            shape = (len(reader.files[name]), h, w, 3) if reader.flags[name] == cv2.IMREAD_COLOR else \
+                (len(reader.files[name]), h, w)
+            store = np.lib.format.open_memmap(str(paths[name]), mode='w+', dtype=np.uint8, shape=shape)
+            for i, file in enumerate(reader.files[name]):
+                store[i] = cls._decode(file, reader.flags[name], reader.shape)
+            store.flush()
+            del store
+        with open(meta_path, 'w') as f:
+            json.dump(reader._store_signature(), f)
+        reader.close()
+
+    def seek(self, timestamp: Optional[float] = None, frame_index: Optional[int] = None) -> None:
+        """
+        Shows the image at the index, or the image that would be shown at the timestamp when cycling.
+        """
+        self._check_seek(timestamp, frame_index)
+        if frame_index is None:
+            frame_index = int(timestamp / self.cycle_sec)
+        for name, arr in self.files.items():
+            self.cntr[name] = frame_index % len(arr) if 0 < len(arr) else 0
+        self.last_cycle_time = time.time()
+
+    def get_frame_index(self, name: str = None) -> Optional[int]:
+        return self.cntr[name] if name else next((self.cntr[n] for n in self.getStreams()), None)
+
+    def get_frame_count(self, name: str = None) -> Optional[int]:
+        return len(self.files[name]) if name else min((len(self.files[n]) for n in self.getStreams()), default=0)
+
     def getStreams(self) -> List[str]:
         streams = []
-        for name, arr in self.frames.items():
+        for name, arr in self.files.items():
             if 0 < len(arr):
                 streams.append(name)
         return streams
 
     def getShape(self, name: str) -> Tuple[int, int]:
-        shape = self.frames[name][0].shape
-        return (shape[1], shape[0])
+        return self.shape
 
     def get_message_size(self, name: str) -> int:
-        size = 1
-        for shape in self.frames[name][0].shape:
-            size *= shape
-        return size
+        return self.shape[0] * self.shape[1] * (3 if self.flags[name] == cv2.IMREAD_COLOR else 1)
 
     def close(self):
-        pass
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
 
     def disableStream(self, name: str):
-        if name in self.frames:
-            self.frames[name] = []
+        if name in self.files:
+            self.files[name] = []
+            self._store.pop(name, None)
@@ -1,58 +1,138 @@
 from pathlib import Path
-from typing import List, Tuple, Dict
+from typing import Any, Dict, IO, Iterator, List, Optional, Tuple
 
 import cv2
 import numpy as np
-from mcap.mcap0.reader import make_reader
-from mcap.mcap0.stream_reader import StreamReader
-from mcap_ros1.decoder import Decoder
+
+try:
+    from mcap.reader import make_reader
+except ImportError:  # mcap < 0.0.15
+    from mcap.mcap0.reader import make_reader
+try:
+    from mcap_ros1._vendor.genpy import dynamic
+except ImportError:  # mcap-ros1-support < 0.1 uses ROS genpy
+    from genpy import dynamic
 
 from depthai_sdk.previews import PreviewDecoder
 from depthai_sdk.readers.abstract_reader import AbstractReader
+from depthai_sdk.readers.recording_index import RecordingIndex
 
 
 class McapReader(AbstractReader):
     """
     Reads all saved streams from .mcap recording.
     Supported ROS messages: Image (depth), CompressedImage (left, right, color, disparity)
-    """
-
-    def __init__(self, folder: Path) -> None:
-        # Get available topics
-        with open(folder, "rb") as file:
-            reader = make_reader(file)
-            channels = reader.get_summary().channels
-            self._topics = [c.topic.split('/')[0] for _, c in channels.items()]
-
-        self._readFrames = dict()
-
-        # Init msg array
-        for topic in self._topics:
-            self._readFrames[topic] = []
-
-        # Create MCAP decoder
-        decoder = Decoder(StreamReader(str(folder)))
-        self.msgs = decoder.messages
-        # Prepare initial frames so we can get frame size
 
-        self._prepareFrames()
-
-    def read(self) -> Dict[str, np.ndarray]:
+    Each stream is iterated separately, through the chunk index of the file (only chunks with messages of the stream
+    are read), with a one message lookahead. read() returns a frame of each stream, aligned by log time: the latest
+    next message of all streams is the anchor, other streams skip messages that are further from it than the
+    following ones. Only returned messages are deserialized and decoded. Duration and message counts come from the
+    summary section of the file.
+    """
+    supports_seek = True
+
+    def __init__(self, path: Path) -> None:
+        self.path = path / self._fileWithExt(path, '.mcap') if path.is_dir() else path
+
+        with open(self.path, "rb") as file:
+            summary = make_reader(file).get_summary()
+        self._indexed = summary is not None
+        self._statistics = summary.statistics if summary is not None else None
+        channels = summary.channels.values() if summary is not None else self._scan_channels()
+
+        # Stream name (eg. 'color' for 'color/compressed' topic) -> topics and channels
+        self._topics: Dict[str, List[str]] = dict()
+        self._channel_ids: Dict[str, List[int]] = dict()
+        for channel in channels:
+            name = channel.topic.split('/')[0]
+            self._topics.setdefault(name, []).append(channel.topic)
+            self._channel_ids.setdefault(name, []).append(channel.id)
+
+        self._start_time = self._statistics.message_start_time if self._statistics else None
+        self._msg_types: Dict[int, Any] = dict()  # Schema ID -> ROS message class
+        self._files: Dict[str, IO[bytes]] = dict()
+        self._iterators: Dict[str, Iterator] = dict()
+        self._next: Dict[str, Optional[Tuple[Any, Any]]] = dict()  # Lookahead (schema, message) of each stream
+        self._timestamp: Optional[float] = None
+        self._frame_index = -1
+        self._index: Optional[RecordingIndex] = None
+
+        # Decode first frames for the shapes
+        self._shapes: Dict[str, Tuple[int, ...]] = dict()
+        self._open_iterators()
+        first_times = []
+        for name in list(self._topics):
+            msg = self._peek(name)
+            if msg is None:
+                self.disableStream(name)
+                continue
+            self._shapes[name] = self._decode(name, *msg).shape
+            first_times.append(msg[1].log_time)
+        if self._start_time is None:
+            self._start_time = min(first_times, default=0)
+
+    def _scan_channels(self) -> List[Any]:
+        # Recordings without a summary (eg. not closed properly), channels are read from the whole file
+        channels = dict()
+        with open(self.path, "rb") as file:
+            for _, channel, _ in make_reader(file).iter_messages(log_time_order=False):
+                channels[channel.id] = channel
+        return list(channels.values())
+
+    def _open_iterators(self, start: Dict[str, Optional[int]] = None) -> None:
+        for name, topics in self._topics.items():
+            if name not in self._files:
+                self._files[name] = open(self.path, "rb")
+            self._files[name].seek(0)
+            reader = make_reader(self._files[name])
+            self._iterators[name] = reader.iter_messages(topics=topics,
+                                                         start_time=start.get(name) if start else None,
+                                                         log_time_order=self._indexed)
+            self._next[name] = None
+        self._timestamp = None
+        self._frame_index = -1
+
+    def _peek(self, name: str) -> Optional[Tuple[Any, Any]]:
+        if self._next[name] is None:
+            schema, _, message = next(self._iterators[name], (None, None, None))
+            if message is not None:
+                self._next[name] = (schema, message)
+        return self._next[name]
+
+    def _pop(self, name: str) -> Optional[Tuple[Any, Any]]:
+        msg = self._peek(name)
+        self._next[name] = None
+        return msg
+
+    def read(self) -> Optional[Dict[str, np.ndarray]]:
         """
         Read and return one frame from each available stream.
         """
-        self._prepareFrames()
-        return self._returnFrames()
-
-    def _prepareFrames(self):
-        """
-        Read frames until one of each is buffered. Afterwards, call self._returnFrames()
-        to get one of each buffered frame.
-        """
-        while not self._framesReady():
-            topic, _, msg = next(self.msgs)
-            name = topic.split('/')[0]
-            self._readFrames[name].append(self._getCvFrame(msg, name))
+        peeked = [self._peek(name) for name in self._topics]
+        if not peeked or any(msg is None for msg in peeked):
+            return None  # End of the recording
+        anchor = max(msg[1].log_time for msg in peeked)
+
+        frames = dict()
+        for name in self._topics:
+            current = self._pop(name)
+            while True:
+                following = self._peek(name)
+                if following is None or abs(current[1].log_time - anchor) < abs(following[1].log_time - anchor):
+                    break
+                current = self._pop(name)  # Skipped without decoding
+            frames[name] = self._decode(name, *current)
+
+        self._timestamp = (anchor - self._start_time) / 1e9
+        self._frame_index += 1
+        return frames
+
+    def _decode(self, name: str, schema, message) -> np.ndarray:
+        msg_type = self._msg_types.get(schema.id)
+        if msg_type is None:
+            msg_type = dynamic.generate_dynamic(schema.name, schema.data.decode())[schema.name]
+            self._msg_types[schema.id] = msg_type
+        return self._getCvFrame(msg_type().deserialize(message.data), name)
 
     def _getCvFrame(self, msg, name: str):
         """
@@ -73,22 +153,65 @@ class McapReader(AbstractReader):
         else:
             raise Exception('Only CompressedImage and Image ROS messages are currently supported.')
 
-    def _framesReady(self):
+    def seek(self, timestamp: Optional[float] = None, frame_index: Optional[int] = None) -> None:
         """
-        Check if there is at least one frame from each available stream.
+        Frame indices are of the stream with the fewest messages, as read() returns a frame of each stream.
         """
-        for _, arr in self._readFrames.items():
-            if len(arr) < 1: return False
-        return True
-
-    def _returnFrames(self) -> Dict[str, np.ndarray]:
+        self._check_seek(timestamp, frame_index)
+        index = self._get_index()
+        sparsest = min(self._topics, key=index.frame_count)
+        if frame_index is None:
+            frame_index = index.frame_at(sparsest, timestamp)
+        if frame_index < index.frame_count(sparsest):
+            # All streams start at or before the target frame of the sparsest stream, so it is the anchor of the
+            # next read(), as it would be when reading sequentially
+            timestamp = index.timestamp(sparsest, frame_index)
+        else:  # Past the end
+            timestamp = index.duration() + 1
+
+        start = dict()
+        for name in self._topics:
+            if timestamp <= index.duration():
+                start_time = index.timestamp(name, index.frame_at(name, timestamp))
+            else:
+                start_time = timestamp
+            start[name] = self._start_time + int(round(start_time * 1e9))
+        self._open_iterators(start)
+        self._frame_index = frame_index - 1
+
+    def _get_index(self) -> RecordingIndex:
+        if self._index is None:
+            self._index = RecordingIndex(RecordingIndex.path_for(self.path))
+        return self._index.update({name: self.path for name in self._topics}, self._index_stream)
+
+    def _index_stream(self, name: str, source: Path) -> Tuple[np.ndarray, np.ndarray]:
+        # Only log times, messages aren't deserialized. All frames are keyframes (images)
+        with open(source, "rb") as file:
+            messages = make_reader(file).iter_messages(topics=self._topics[name], log_time_order=self._indexed)
+            timestamps = np.array([message.log_time for _, _, message in messages], dtype=np.int64)
+        return (timestamps - self._start_time) / 1e9, np.arange(len(timestamps))
+
+    def get_timestamp(self, name: str = None) -> Optional[float]:
+        return self._timestamp
+
+    def get_frame_index(self, name: str = None) -> Optional[int]:
+        return self._frame_index
+
+    def get_frame_count(self, name: str = None) -> Optional[int]:
         """
-        Return synced frames (one of each available).
+        Number of messages of the stream (of the stream with the fewest messages, if not specified).
         """
-        ret = dict()
-        for name, arr in self._readFrames.items():
-            ret[name] = arr.pop(0)
-        return ret
+        names = [name] if name else list(self._topics)
+        if self._statistics is not None:
+            counts = self._statistics.channel_message_counts
+            return min((sum(counts.get(i, 0) for i in self._channel_ids[n]) for n in names), default=0)
+        index = self._get_index()
+        return min((index.frame_count(n) for n in names), default=0)
+
+    def get_duration(self) -> Optional[float]:
+        if self._statistics is not None:
+            return (self._statistics.message_end_time - self._statistics.message_start_time) / 1e9
+        return self._get_index().duration()
 
     def getStreams(self) -> List[str]:
         """
@@ -97,14 +220,23 @@ class McapReader(AbstractReader):
         return [name for name in self._topics]
 
     def getShape(self, name: str) -> Tuple[int, int]:
-        frame = self._readFrames[name][0]
-        return (frame.shape[1], frame.shape[0])
+        shape = self._shapes[name]
+        return (shape[1], shape[0])
 
     def get_message_size(self, name: str) -> int:
         size = 1
-        for shape in self._readFrames[name][0].shape:
+        for shape in self._shapes[name]:
             size *= shape
         return size
 
     def close(self):
-        pass
+        for file in self._files.values():
+            file.close()
+        self._files.clear()
+
+    def disableStream(self, name: str):
+        if name in self._topics:
+            del self._topics[name]
+            del self._iterators[name]
+            del self._next[name]
+            self._files.pop(name).close()
@@ -0,0 +1,127 @@
+import json
+import os
+import zipfile
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from depthai_sdk.logger import LOGGER
+
+__all__ = ['RecordingIndex']
+
+INDEX_VERSION = 1
+
+
+def _signature(source: Path) -> str:
+    stat = source.stat()
+    return f'{stat.st_size}:{stat.st_mtime_ns}'
+
+
+class RecordingIndex:
+    """
+    Persistent frame index of a recording: recorded timestamp (seconds from the start of the recording) of every
+    frame, and keyframes (frames that can be decoded without the previous ones) of each stream.
+
+    The index is built once and stored next to the recording. Each stream is tied to the size and modification time
+    of its source file, so only new or changed streams are (re)built.
+    """
+
+    def __init__(self, path: Optional[Path]):
+        """
+        Args:
+            path: Index file, None to keep the index in memory only.
+        """
+        self.path = path
+        self._timestamps: Dict[str, np.ndarray] = {}
+        self._keyframes: Dict[str, np.ndarray] = {}
+        self._sources: Dict[str, str] = {}
+        if path is not None and path.exists():
+            self._load()
+
+    @staticmethod
+    def path_for(recording: Path) -> Path:
+        """
+        Index file of the recording (folder or a single file).
+        """
+        if recording.is_dir():
+            return recording / 'recording_index.npz'
+        return recording.with_name(recording.name + '.index.npz')
+
+    def update(self,
+               sources: Dict[str, Path],
+               build: Callable[[str, Path], Tuple[np.ndarray, np.ndarray]]) -> 'RecordingIndex':
+        """
+        Builds missing or outdated streams and saves the index.
+
+        Args:
+            sources: Source file of each stream.
+            build: Function that returns (timestamps, keyframe indices) of a stream, from its name and source file.
+        """
+        stale = {name: source for name, source in sources.items() if self._sources.get(name) != _signature(source)}
+        for name, source in stale.items():
+            LOGGER.info(f"Indexing stream '{name}' of the recording ({source.name})")
+            timestamps, keyframes = build(name, source)
+            self._timestamps[name] = np.asarray(timestamps, dtype=np.float64)
+            self._keyframes[name] = np.asarray(keyframes, dtype=np.int64)
+            self._sources[name] = _signature(source)
+        if stale:
+            self.save()
+        return self
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        meta = json.dumps({'version': INDEX_VERSION, 'sources': self._sources})
+        arrays = {'meta': np.array(meta)}
+        for i, name in enumerate(self._sources):
+            arrays[f'timestamps_{i}'] = self._timestamps[name]
+            arrays[f'keyframes_{i}'] = self._keyframes[name]
+
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        try:
+            with open(tmp, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(str(tmp), str(self.path))
+        except OSError as e:  # Eg. read-only media, the index is still used from memory
+            LOGGER.warning(f"Couldn't save the recording index to {self.path}: {e}")
+
+    def _load(self) -> None:
+        try:
+            with np.load(str(self.path), allow_pickle=False) as data:
+                meta = json.loads(str(data['meta']))
+                if meta['version'] != INDEX_VERSION:
+                    return
+                for i, (name, signature) in enumerate(meta['sources'].items()):
+                    self._timestamps[name] = data[f'timestamps_{i}']
+                    self._keyframes[name] = data[f'keyframes_{i}']
+                    self._sources[name] = signature
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+            LOGGER.debug(f'Ignoring invalid recording index {self.path}: {e}')
+            self._timestamps, self._keyframes, self._sources = {}, {}, {}
+
+    def frame_count(self, name: str) -> int:
+        return len(self._timestamps[name])
+
+    def duration(self) -> float:
+        """
+        Timestamp of the last frame of the recording, in seconds.
+        """
+        return max((float(ts[-1]) for ts in self._timestamps.values() if len(ts)), default=0.0)
+
+    def timestamp(self, name: str, frame_index: int) -> float:
+        return float(self._timestamps[name][frame_index])
+
+    def frame_at(self, name: str, timestamp: float) -> int:
+        """
+        Index of the last frame of the stream at or before the timestamp, 0 if the timestamp is before the first frame.
+        """
+        return max(0, int(np.searchsorted(self._timestamps[name], timestamp, side='right')) - 1)
+
+    def keyframe_before(self, name: str, frame_index: int) -> int:
+        """
+        Index of the last keyframe at or before the frame, where decoding has to start to get the frame.
+        """
+        keyframes = self._keyframes[name]
+        i = int(np.searchsorted(keyframes, frame_index, side='right')) - 1
+        return int(keyframes[i]) if 0 <= i else 0
@@ -3,6 +3,7 @@ from pathlib import Path
 from typing import List, Tuple, Dict, Any, Optional
 
 import depthai as dai
+import numpy as np
 
 try:
     import cv2
@@ -10,19 +11,30 @@ except ImportError:
     cv2 = None
 
 from depthai_sdk.readers.abstract_reader import AbstractReader
+from depthai_sdk.readers.recording_index import RecordingIndex
 from depthai_sdk.components.parser import parse_camera_socket
 
 _videoExt = ['.mjpeg', '.avi', '.mp4', '.h265', '.h264']
+# Raw (elementary) streams don't have timestamps, OpenCV derives them from an assumed frame rate
+_rawStreamExt = ['.mjpeg', '.h265', '.h264']
 
 
 class VideoCapReader(AbstractReader):
     """
-    Reads stream from mp4, mjpeg, h264, h265
+    Reads stream from mp4, mjpeg, h264, h265. Each stream has its own cv2.VideoCapture, so streams can be decoded
+    on separate threads (read_stream()).
+
+    Seeking uses a RecordingIndex (frame timestamps and keyframes), built on the first seek by demuxing the videos
+    without decoding them.
     """
+    supports_stream_reads = True
+    supports_seek = True
 
     def __init__(self, path: Path, loop: bool = False) -> None:
         self.videos: Dict[str, Any] = {}
         self._closed = False
+        self._index_path = RecordingIndex.path_for(path)
+        self._index: Optional[RecordingIndex] = None
 
         # self.initialFrames: Dict[str, Any] = dict()
         # self.shapes: Dict[str, Tuple[int, int]] = dict()
@@ -33,7 +45,9 @@ class VideoCapReader(AbstractReader):
             stream_name = path.stem if (path.stem in ['left', 'right']) else 'color'
             self.videos[stream_name] = {
                 'reader': cv2.VideoCapture(str(path)),
-                'socket': dai.CameraBoardSocket.CAM_A
+                'path': path,
+                'socket': dai.CameraBoardSocket.CAM_A,
+                'timestamps': path.suffix not in _rawStreamExt
             }
         else:
             for fileName in os.listdir(str(path)):
@@ -63,7 +77,9 @@ class VideoCapReader(AbstractReader):
                 #     stream = 'right'
                 self.videos[f_name.lower()] = {
                     'reader': cv2.VideoCapture(str(path / fileName)),
-                    'socket': socket
+                    'path': path / fileName,
+                    'socket': socket,
+                    'timestamps': ext not in _rawStreamExt
                 }
 
         for name, video in self.videos.items():
@@ -74,29 +90,117 @@ class VideoCapReader(AbstractReader):
             )
             video['is_color'] = len(f.shape) == 3
             video['initialFrame'] = f
+            video['timestamp'] = None
+            video['index'] = -1  # Last read frame
 
     def read(self):
         if self._closed:
             return False
         frames = dict()
-        for name, video in self.videos.items():
-            if video['initialFrame'] is not None:
-                frames[name] = video['initialFrame'].copy()
-                video['initialFrame'] = None
-
-            if not video['reader'].isOpened():
+        for name in self.videos:
+            frame = self.read_stream(name)
+            if frame is None:
                 return False
+            frames[name] = frame
 
+        return frames
+
+    def read_stream(self, name: str) -> Optional[np.ndarray]:
+        video = self.videos.get(name.lower())
+        if self._closed or video is None or not video['reader'].isOpened():
+            return None
+
+        if video['initialFrame'] is not None:
+            frame = video['initialFrame']
+            video['initialFrame'] = None
+        else:
             ok, frame = video['reader'].read()
             if not ok and self._is_looped:
-                video['reader'].set(cv2.CAP_PROP_POS_FRAMES, 0)
+                self._seek_video(name.lower(), 0)
                 ok, frame = video['reader'].read()
-            elif not ok:
-                return False
-
-            frames[name] = frame
-
-        return frames
+            if not ok:
+                return None
+
+        video['index'] += 1
+        if video['timestamps']:
+            video['timestamp'] = video['reader'].get(cv2.CAP_PROP_POS_MSEC) / 1000
+        return frame
+
+    def get_timestamp(self, name: str = None) -> Optional[float]:
+        video = self.videos[name.lower()] if name else next(iter(self.videos.values()), None)
+        return video['timestamp'] if video is not None else None
+
+    def seek(self, timestamp: Optional[float] = None, frame_index: Optional[int] = None) -> None:
+        self._check_seek(timestamp, frame_index)
+        index = self._get_index()
+        # Timestamps of raw streams are only estimated from the frame rate, so they follow the first recorded stream
+        recorded = [name for name, video in self.videos.items() if video['timestamps']]
+        raw_index = index.frame_at(recorded[0], timestamp) if recorded and frame_index is None else None
+        for name, video in self.videos.items():
+            if frame_index is not None:
+                i = frame_index
+            elif raw_index is not None and not video['timestamps']:
+                i = raw_index
+            else:
+                i = index.frame_at(name, timestamp)
+            self._seek_video(name, max(0, min(i, index.frame_count(name) - 1)))
+
+    def _seek_video(self, name: str, frame_index: int) -> None:
+        video = self.videos[name]
+        cap = video['reader']
+        if video['timestamps']:
+            # Containers have a seek index: seek to the preceding keyframe (from the recording index), and decode
+            # (grab) the frames up to the target frame
+            keyframe = self._get_index().keyframe_before(name, frame_index) if 0 < frame_index else 0
+            cap.set(cv2.CAP_PROP_POS_FRAMES, keyframe)
+            for _ in range(frame_index - keyframe):
+                cap.grab()
+        else:
+            # Raw streams can't be seeked, frames are grabbed (decoded, but not converted) from the start
+            grabbed = 1 if video['initialFrame'] is not None else video['index'] + 1
+            if frame_index < grabbed:
+                cap.release()
+                cap = video['reader'] = cv2.VideoCapture(str(video['path']))
+                grabbed = 0
+            for _ in range(frame_index - grabbed):
+                cap.grab()
+
+        video['initialFrame'] = None
+        video['timestamp'] = None
+        video['index'] = frame_index - 1
+
+    def _get_index(self) -> RecordingIndex:
+        if self._index is None:
+            self._index = RecordingIndex(self._index_path)
+        return self._index.update({name: video['path'] for name, video in self.videos.items()}, self._index_video)
+
+    @staticmethod
+    def _index_video(name: str, path: Path) -> Tuple[np.ndarray, np.ndarray]:
+        # Demux only (raw packets), frames aren't decoded
+        cap = cv2.VideoCapture(str(path), cv2.CAP_FFMPEG, [cv2.CAP_PROP_FORMAT, -1])
+        timestamps, keyframes = [], []
+        while cap.grab():
+            if cap.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME):
+                keyframes.append(len(timestamps))
+            timestamps.append(cap.get(cv2.CAP_PROP_POS_MSEC) / 1000)
+        cap.release()
+        return np.array(timestamps), np.array(keyframes)
+
+    def get_frame_index(self, name: str = None) -> Optional[int]:
+        video = self.videos[name.lower()] if name else next(iter(self.videos.values()), None)
+        return video['index'] if video is not None else None
+
+    def get_frame_count(self, name: str = None) -> Optional[int]:
+        index = self._get_index()
+        names = [name.lower()] if name else list(self.videos)
+        return min((index.frame_count(n) for n in names), default=0)
+
+    def get_duration(self) -> Optional[float]:
+        index = self._get_index()
+        recorded = [name for name, video in self.videos.items() if video['timestamps'] and index.frame_count(name)]
+        if not recorded:
+            return index.duration()
+        return max(index.timestamp(name, -1) for name in recorded)
 
     def set_loop(self, loop: bool):
         self._is_looped = loop
@@ -1,35 +1,118 @@
 #!/usr/bin/env python3
+import time
 from enum import IntEnum
 from pathlib import Path
-from queue import Queue
-from threading import Thread
-from typing import List
+from queue import Queue, Full, Empty
+from threading import Thread, Lock
+from typing import List, Dict, Optional
 
 import depthai as dai
 
+from depthai_sdk.calibration import DeviceCalibration
 from depthai_sdk.classes.packets import FramePacket, IMUPacket
 from depthai_sdk.logger import LOGGER
 from depthai_sdk.oak_outputs.xout.xout_frames import XoutFrames
 from depthai_sdk.recorders.abstract_recorder import Recorder
 
-def _run(recorder: Recorder, frame_queue: Queue):
+
+class QueuePolicy(IntEnum):
+    BLOCK = 1  # Block the caller (XLink callback thread) until there's space in the stream queue
+    DROP_NEWEST = 2  # Drop the incoming frame if the stream queue is full
+    DROP_OLDEST = 3  # Drop the oldest queued frame if the stream queue is full
+
+
+class _StreamWorker:
     """
-    Start recording infinite loop
+    Writes frames of a single stream on its own thread, so a slow encoder of one stream doesn't stall the others.
+    Failed writes are logged and counted, the worker keeps draining its queue, so a blocked caller is never stuck.
     """
-    while True:
+
+    def __init__(self,
+                 name: str,
+                 recorder: Recorder,
+                 queue_size: int,
+                 policy: QueuePolicy,
+                 write_lock: Optional[Lock] = None):
+        self.name = name
+        self.recorder = recorder
+        self.policy = policy
+        self.write_lock = write_lock  # Used when recorder doesn't support parallel writes
+        self.queue = Queue(maxsize=queue_size)
+
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+        self._stopped = False
+        self.last_write_time = 0.0
+        self.max_write_time = 0.0
+        self._total_write_time = 0.0
+
+        self.thread = Thread(target=self._run, name=f'Record-{name}')
+        self.thread.start()
+
+    def put(self, msg) -> None:
+        if self._stopped:
+            return
+
+        if self.policy == QueuePolicy.BLOCK:
+            self.queue.put(msg)
+            return
+
         try:
-            frames = frame_queue.get()
-            if frames is None:  # Terminate app
+            self.queue.put_nowait(msg)
+            return
+        except Full:
+            pass
+
+        if self.policy == QueuePolicy.DROP_OLDEST:
+            try:
+                self.queue.get_nowait()
+                self.queue.put_nowait(msg)
+            except (Empty, Full):
+                pass
+        self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            msg = self.queue.get()
+            if msg is None:  # Terminate the worker
                 break
 
-            for name in frames:
-                # Save all synced frames into files
-                recorder.write(name, frames[name])
-        except KeyboardInterrupt:
-            break
-    # Close all recorders - Can't use ExitStack with VideoWriter
-    recorder.close()
-    LOGGER.info('Exiting store frame thread')
+            start = time.perf_counter()
+            try:
+                if self.write_lock is not None:
+                    with self.write_lock:
+                        self.recorder.write(self.name, msg)
+                else:
+                    self.recorder.write(self.name, msg)
+            except Exception as e:
+                self.errors += 1
+                if self.errors == 1:  # Don't flood the log, all errors are reported on close
+                    LOGGER.exception(f"Recording stream '{self.name}' failed to write a frame: {e}")
+                continue
+            write_time = time.perf_counter() - start
+
+            self.written += 1
+            self.last_write_time = write_time
+            self.max_write_time = max(self.max_write_time, write_time)
+            self._total_write_time += write_time
+
+    def stop(self) -> None:
+        # Terminate message is always queued (blocking), so already queued frames get written
+        self._stopped = True
+        self.queue.put(None)
+        self.thread.join()
+
+    def get_stats(self) -> Dict[str, float]:
+        return {
+            'queue_size': self.queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'last_write_ms': self.last_write_time * 1000,
+            'avg_write_ms': self._total_write_time / self.written * 1000 if self.written else 0.0,
+            'max_write_ms': self.max_write_time * 1000,
+        }
 
 
 class RecordType(IntEnum):
@@ -44,23 +127,37 @@ class Record:
     """
     This class records depthai streams from OAK cameras into different formats.
     It will also save calibration .json, so depth reconstruction will be possible.
+
+    Each stream is written by its own worker thread with its own bounded queue, so a slow stream
+    (eg. lossless depth encoding) doesn't stall the other streams.
     """
 
-    def __init__(self, path: Path, record_type: RecordType):
+    def __init__(self,
+                 path: Path,
+                 record_type: RecordType,
+                 queue_size: int = 20,
+                 queue_policy: QueuePolicy = QueuePolicy.BLOCK):
         """
         Args:
             path (Path): Path to the recording folder
             record_type (RecordType): Recording type
+            queue_size (int): Maximum number of frames queued per stream
+            queue_policy (QueuePolicy): What to do when a stream queue is full - block or drop frames
         """
         self.folder = path
         self.record_type = record_type
-        self.frame_q = None
+        self.queue_size = queue_size
+        self.queue_policy = queue_policy
         self.name_mapping = None  # XLinkOut stream name -> Friendly name mapping
 
         self.stream_num = None
         self.mxid = None
         self.path = None
-        self.process = None
+
+        self._workers: Dict[str, _StreamWorker] = dict()
+        self._workers_lock = Lock()
+        self._write_lock = None
+        self._started = False
 
         if self.record_type == RecordType.MCAP:
             from .recorders.mcap_recorder import McapRecorder
@@ -81,6 +178,9 @@ class Record:
             raise ValueError(f"Recording type '{self.record_type}' isn't supported!")
 
     def write(self, packets):
+        if not self._started:
+            return
+
         if not isinstance(packets, dict):
             packets = {packets.name: packets}
 
@@ -90,7 +190,34 @@ class Record:
                 msgs[name] = packet.msg
             elif isinstance(packet, IMUPacket):
                 msgs[name] = packet.packet
-        self.frame_q.put(msgs)
+
+        for name, msg in msgs.items():
+            worker = self._get_worker(name)
+            if worker is None:
+                return  # Closed meanwhile, frames are dropped
+            worker.put(msg)
+
+    def _get_worker(self, name: str) -> Optional[_StreamWorker]:
+        """
+        Returns the worker of the stream, started on the first frame. None once the recording is closed.
+        """
+        worker = self._workers.get(name)
+        if worker is None:
+            with self._workers_lock:
+                if not self._started:
+                    return None  # Checked under the lock close() takes, so no worker is started after close()
+                worker = self._workers.get(name)
+                if worker is None:
+                    worker = _StreamWorker(name, self.recorder, self.queue_size, self.queue_policy, self._write_lock)
+                    self._workers[name] = worker
+        return worker
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns per-stream recording statistics: queue size, written and dropped frames, and write latency (ms).
+        """
+        with self._workers_lock:
+            return {name: worker.get_stats() for name, worker in self._workers.items()}
 
     def start(self, device: dai.Device, xouts: List[XoutFrames]):
         """
@@ -99,14 +226,14 @@ class Record:
         """
         self.mxid = device.getMxId()
         self.path = self._create_folder(self.folder, self.mxid)
-        calib_data = device.readCalibration()
+        calib_data = DeviceCalibration.of(device).handler
         calib_data.eepromToJsonFile(str(self.path / "calib.json"))
 
         self.recorder.update(self.path, device, xouts)
 
-        self.frame_q = Queue(maxsize=20)
-        self.process = Thread(target=_run, args=(self.recorder, self.frame_q))
-        self.process.start()
+        # Recorders that write all streams into a single file need their writes serialized
+        self._write_lock = None if self.recorder.supports_parallel_writes else Lock()
+        self._started = True
 
     # TODO: support pointclouds in MCAP
     def config_mcap(self, pointcloud: bool):
@@ -134,5 +261,19 @@ class Record:
                 return recordings_path
 
     def close(self):
-        if self.frame_q:
-            self.frame_q.put(None)  # Close recorder and stop the thread
+        # Write all queued frames and stop the workers
+        with self._workers_lock:
+            if not self._started:
+                return
+            self._started = False
+            for name, worker in self._workers.items():
+                worker.stop()
+                stats = worker.get_stats()
+                if stats['dropped']:
+                    LOGGER.warning(f"Recording dropped {stats['dropped']} frame(s) of stream '{name}'")
+                if stats['errors']:
+                    LOGGER.warning(f"Recording failed to write {stats['errors']} frame(s) of stream '{name}'")
+
+        # Close all recorders - Can't use ExitStack with VideoWriter
+        self.recorder.close()
+        LOGGER.info('Exiting store frame threads')
@@ -9,6 +9,9 @@ import depthai_sdk.oak_outputs.xout as outputs
 
 
 class Recorder(ABC):
+    # Whether write() can be called concurrently for different streams (eg. each stream has its own file)
+    supports_parallel_writes = False
+
     @abstractmethod
     def write(self, name: str, frame: dai.ImgFrame):
         raise NotImplementedError()
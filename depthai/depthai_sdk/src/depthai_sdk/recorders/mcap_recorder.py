@@ -15,6 +15,7 @@ class McapRecorder(Recorder, RosBase):
     """
     This is a helper class that lets you save frames into mcap (.mcap), which can be replayed using Foxglove studio app.
     """
+    msg_pool_size = 1  # Messages are serialized in new_ros_msg(), so they can be reused right away
 
     def __init__(self):
         self.path = None
@@ -31,7 +31,7 @@ from rosbags.typesys.types import sensor_msgs__msg__Imu as Imu
 from rosbags.typesys.types import diagnostic_msgs__msg__KeyValue as KeyValue
 
 from depthai_sdk.logger import LOGGER
-from depthai_sdk.integrations.ros.imu_interpolation import ImuInterpolation, ImuSyncMethod
+from depthai_sdk.integrations.ros.imu_interpolation import ImuInterpolation, ImuSyncMethod, TS, SEQ
 from depthai_sdk.recorders.abstract_recorder import Recorder
 
 CAMERA_INFO = """
@@ -358,9 +358,8 @@ class _RosbagBaseRecorder(Recorder):
             raise Exception('PointCloud2 not yet implemented')
         elif stream.ros_type == Imu:
             packet: dai.IMUPacket = dai_msg
-            report = packet.acceleroMeter or packet.gyroscope or packet.magneticField or packet.rotationVector
             msg = Imu(
-                header=self.get_header(report.getTimestampDevice(), report.sequence),
+                header=self.get_header(datetime.timedelta(0), 0),  # Set from the sample below
                 orientation=Quaternion(x=0.0, y=0.0, z=0.0, w=1.0),
                 orientation_covariance=np.array([-1.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]),
                 angular_velocity=Vector3(0.0, 0.0, 0.0),
@@ -368,7 +367,9 @@ class _RosbagBaseRecorder(Recorder):
                 linear_acceleration=Vector3(0.0, 0.0, 0.0),
                 linear_acceleration_covariance=np.array([])
             )
-            self.imu_interpolation.Imu(msg, packet)
+            # Header of the (interpolated) sample the values are from
+            sample = self.imu_interpolation.Imu(msg, packet)
+            msg.header = self.get_header(datetime.timedelta(seconds=sample[TS]), int(sample[SEQ]))
             self.write_to_rosbag(name, stream.ros_type.__msgtype__, msg)
         elif stream.ros_type == Image:
             # msg = self.bridge.Image(dai_msg)
@@ -10,6 +10,7 @@ class VideoRecorder(Recorder):
     """
     Writes video streams (.mjpeg/.h264/.hevc) or directly to mp4/avi container.
     """
+    supports_parallel_writes = True
 
     def __init__(self, lossless: bool = False):
         self.path = None
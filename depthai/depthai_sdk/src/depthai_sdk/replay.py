@@ -1,7 +1,7 @@
 import os
-import os
+import queue
 import time
-from threading import Thread
+from threading import Event, Lock, Thread
 from time import monotonic
 from typing import Callable
 
@@ -17,13 +17,157 @@ _videoExt = ['.mjpeg', '.avi', '.mp4', '.h265', '.h264', '.webm']
 _imageExt = ['.bmp', '.dib', '.jpeg', '.jpg', '.jpe', '.jp2', '.png', '.webp', '.pbm', '.pgm', '.ppm', '.pxm',
              '.pnm', '.pfm', '.sr', '.ras', '.tiff', '.tif', '.exr', '.hdr', '.pic']
 
+# Frame and ImgFrame of each stream, the recorded timestamp and the frame index of the set (None if not available)
+FrameSet = Tuple[Dict[str, Tuple[np.ndarray, dai.ImgFrame]], Optional[float], Optional[int]]
+
+
+class _DeadlinePacer:
+    """
+    Paces frames by deadlines relative to the first frame, either from recorded timestamps or from a fixed period.
+    Sleeping until the deadline (instead of a fixed delay after each frame) doesn't accumulate the time spent reading
+    and sending frames.
+    """
+    MAX_LAG = 0.5  # If we fall further behind (seconds), the deadlines are rebased instead of catching up
+
+    def __init__(self, period: float, stop: Event):
+        self.period = period
+        self._stop = stop
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Next frame is sent immediately, and is the new reference for the deadlines (eg. after pausing).
+        """
+        self._start: Optional[float] = None
+        self._origin: Optional[float] = None
+        self._offset = 0.0
+
+    def wait(self, timestamp: Optional[float] = None) -> None:
+        """
+        Sleeps until the deadline of the next frame.
+
+        Args:
+            timestamp: Recorded timestamp of the frame in seconds, None to use the fixed period.
+        """
+        now = monotonic()
+        if self._start is None:
+            self._start, self._origin, self._offset = now, timestamp, 0.0
+            return
+
+        if timestamp is None or self._origin is None:
+            offset = self._offset + self.period
+        else:
+            offset = timestamp - self._origin
+            if offset < self._offset:  # Looped recording, continue one period after the last frame
+                offset = self._offset + self.period
+                self._origin = timestamp - offset
+        self._offset = offset
+
+        delay = self._start + offset - now
+        if delay < -self.MAX_LAG:
+            self._start = now - offset
+        elif 0 < delay:
+            self._stop.wait(delay)
+
+
+class _Prefetcher:
+    """
+    Reads and converts recorded frames to ImgFrames ahead of time, into bounded queues. Readers that support per-stream
+    reads are decoded on a thread per stream, others on a single reader thread.
+    """
+
+    def __init__(self, replay: 'Replay', streams: List[str], capacity: int):
+        self.replay = replay
+        self.reader = replay.reader
+        self.streams = streams
+        self.capacity = capacity
+        self._stop = Event()
+        self._threads: List[Thread] = []
+
+        if self.reader.supports_stream_reads:
+            self._queues = {name: queue.Queue(maxsize=capacity) for name in streams}
+            for name in streams:
+                self._threads.append(Thread(target=self._stream_worker, args=(name,), daemon=True))
+        else:
+            self._queues = {None: queue.Queue(maxsize=capacity)}
+            self._threads.append(Thread(target=self._set_worker, daemon=True))
 
-def _run(delay: float, sendFrames: Callable):
-    while True:
-        if not sendFrames():
-            break
-        time.sleep(delay)
-    LOGGER.info('Replay `run` thread stopped')
+    def start(self) -> None:
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+    def get(self) -> Optional[FrameSet]:
+        """
+        Returns the next set of frames, or None at the end of the recording.
+        """
+        if None in self._queues:
+            return self._get(self._queues[None])
+
+        frames = dict()
+        timestamp = frame_index = None
+        for name, q in self._queues.items():
+            item = self._get(q)
+            if item is None:
+                return None
+            frame, img_frame, ts, i = item
+            frames[name] = (frame, img_frame)
+            if timestamp is None:
+                timestamp = ts
+            if frame_index is None:
+                frame_index = i
+        return frames, timestamp, frame_index
+
+    def _get(self, q: queue.Queue):
+        while not self._stop.is_set():
+            try:
+                item = q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is None:
+                q.put(None)  # End of the recording, for the following get() calls as well
+            return item
+        return None
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _convert(self, name: str, frame: np.ndarray) -> Tuple[np.ndarray, dai.ImgFrame]:
+        return frame, self.replay._createImgFrame(self.replay.streams[name], frame)
+
+    def _stream_worker(self, name: str) -> None:
+        q = self._queues[name]
+        while not self._stop.is_set():
+            frame = self.reader.read_stream(name)
+            if frame is None:
+                break
+            frame, img_frame = self._convert(name, frame)
+            item = (frame, img_frame, self.reader.get_timestamp(name), self.reader.get_frame_index(name))
+            if not self._put(q, item):
+                return
+        self._put(q, None)
+
+    def _set_worker(self) -> None:
+        q = self._queues[None]
+        while not self._stop.is_set():
+            frames = self.reader.read()
+            if not frames:
+                break
+            converted = {name.lower(): self._convert(name.lower(), frame) for name, frame in frames.items()
+                         if name.lower() in self.replay.streams}
+            if not self._put(q, (converted, self.reader.get_timestamp(), self.reader.get_frame_index())):
+                return
+        self._put(q, None)
 
 
 class ReplayStream:
@@ -43,8 +187,8 @@ class ReplayStream:
         self._shape: Tuple[int, int] = None
         self.callbacks: List[Callable] = []
 
-        self.frame: np.ndarray  # Last read frame from Reader (ndarray)
-        self.imgFrame: dai.ImgFrame  # Last read ImgFrame from Reader (dai.ImgFrame)
+        self.frame: Optional[np.ndarray] = None  # Last read frame from Reader (ndarray)
+        self.imgFrame: Optional[dai.ImgFrame] = None  # Last read ImgFrame from Reader (dai.ImgFrame)
         self.size_bytes: int  # bytes
 
     def get_socket(self) -> dai.CameraBoardSocket:
@@ -83,8 +227,20 @@ class Replay:
         self._calibData = None
 
         self.fps: float = 30.0
+        self._fixed_fps = False  # Pace by self.fps instead of the recorded timestamps
+        self._realtime = True
+        self._prefetch_frames = 8
+        self._prefetch_memory = 256 * 1024 * 1024  # bytes
+        self._prefetcher: Optional[_Prefetcher] = None
+        self._lock = Lock()  # Reading frames and seeking
+        self._step = False  # Send the next frame even if paused
+        self._reset_pacing = False
+        self._loop = False
+        self._range: Tuple[Optional[float], Optional[float]] = (None, None)
+        self._frame_index: Optional[int] = None  # Of the last sent frames
         self.thread: Optional[Thread] = None
         self._stop: bool = False  # Stop the thread that's sending frames to the OAK camera
+        self._stop_event = Event()
 
         self.xins: List[str] = []  # Name of XLinkIn streams
 
@@ -188,12 +344,36 @@ class Replay:
 
     def set_fps(self, fps: float):
         """
-        Sets frequency at which Replay module will send frames to the camera. Default 30FPS.
+        Sets frequency at which Replay module will send frames to the camera. By default, frames are sent at the
+        recorded timestamps, or at 30FPS if the recording doesn't have timestamps.
         """
         if type(self.reader).__name__ == 'ImageReader':
             self.reader.set_cycle_fps(fps)
         else:
             self.fps = fps
+            self._fixed_fps = True
+
+    def set_realtime(self, realtime: bool):
+        """
+        Sets whether to replay frames in real time (default), or as fast as possible, eg. for offline batch
+        processing. Without real time pacing, frames are sent as fast as the device consumes them.
+
+        Args:
+            realtime (bool): Whether to pace the frames by the recorded timestamps (or FPS).
+        """
+        self._realtime = realtime
+
+    def set_prefetch(self, frames: int = 8, max_memory_mb: float = 256):
+        """
+        Sets how many frames are read and converted to ImgFrames ahead of time, on background threads (a thread per
+        stream if the reader supports it). Should be called before the replay is started.
+
+        Args:
+            frames (int): Max number of prefetched frames per stream, 0 disables prefetching.
+            max_memory_mb (float): Memory limit of all prefetched frames, in MB. At least one frame is prefetched.
+        """
+        self._prefetch_frames = max(0, int(frames))
+        self._prefetch_memory = int(max_memory_mb * 1024 * 1024)
 
     def set_loop(self, flag: bool):
         """
@@ -205,6 +385,7 @@ class Replay:
         from .readers.videocap_reader import VideoCapReader
         if isinstance(self.reader, VideoCapReader):
             self.reader.set_loop(flag)
+            self._loop = flag
         else:
             raise RuntimeError('Looping is only supported for video files.')
 
@@ -306,9 +487,135 @@ class Replay:
         """
         Start sending frames to the OAK device on a new thread
         """
-        self.thread = Thread(target=_run, args=(1.0 / self.fps, self.sendFrames,))
+        if self._range[0] is not None:
+            self.seek(timestamp=self._range[0])
+        if 0 < self._prefetch_frames:
+            streams = [name.lower() for name in self.reader.getStreams() if name.lower() in self.streams]
+            set_bytes = 2 * sum(self._frame_size(self.streams[name]) for name in streams)  # Frame + ImgFrame
+            capacity = max(1, min(self._prefetch_frames, self._prefetch_memory // max(set_bytes, 1)))
+            self._prefetcher = _Prefetcher(self, streams, capacity)
+            self._prefetcher.start()
+
+        self.thread = Thread(target=self._run)
         self.thread.start()
 
+    def _run(self):
+        pacer = _DeadlinePacer(1.0 / self.fps, self._stop_event)
+        last: Optional[FrameSet] = None
+        while not self._stop:
+            if self._pause and not self._step:  # Keep sending the last frames
+                if last is not None:
+                    self._send(last[0])
+                self._stop_event.wait(pacer.period)
+                pacer.reset()
+                continue
+
+            with self._lock:
+                last = self._nextFrames()
+                if last is not None and self._pastRange(last):
+                    if self._loop:
+                        self._seek(self._range[0], None if self._range[0] is not None else 0)
+                        last = self._nextFrames()
+                    else:
+                        last = None
+            if last is None:
+                break  # End of the recording
+
+            if self._reset_pacing:
+                self._reset_pacing = False
+                pacer.reset()
+            if self._step:
+                self._step = False
+            elif self._realtime:
+                pacer.wait(None if self._fixed_fps else last[1])
+            self._send(last[0])
+            self._frame_index = last[2]
+
+        self._stop = True
+        LOGGER.info('Replay `run` thread stopped')
+
+    def _nextFrames(self) -> Optional[FrameSet]:
+        if self._prefetcher is not None:
+            return self._prefetcher.get()
+        if not self._readFrames():
+            return None
+        frames = {name: (stream.frame, self._createImgFrame(stream))
+                  for name, stream in self.streams.items() if stream.frame is not None}
+        return frames, self.reader.get_timestamp(), self.reader.get_frame_index()
+
+    def _pastRange(self, frames: FrameSet) -> bool:
+        end = self._range[1]
+        if end is None:
+            return False
+        _, timestamp, frame_index = frames
+        if timestamp is None:  # Estimate from the frame index
+            timestamp = (frame_index or 0) / self.fps
+        return end < timestamp
+
+    def seek(self, timestamp: Optional[float] = None, frame_index: Optional[int] = None):
+        """
+        Continues the replay from the timestamp or frame. If the replay is paused, frames at the new position are sent
+        once.
+
+        Args:
+            timestamp (float, Optional): Seconds from the start of the recording.
+            frame_index (int, Optional): Index of the frame.
+        """
+        if not self.reader.supports_seek:
+            raise RuntimeError(f'Seeking is not supported for {type(self.reader).__name__} recordings.')
+        with self._lock:
+            self._seek(timestamp, frame_index)
+        if self._pause:
+            self._step = True
+
+    def _seek(self, timestamp: Optional[float], frame_index: Optional[int]):
+        # Prefetched frames are dropped, prefetching restarts from the new position
+        prefetcher = self._prefetcher
+        if prefetcher is not None:
+            prefetcher.stop()
+        self.reader.seek(timestamp=timestamp, frame_index=frame_index)
+        if prefetcher is not None:
+            self._prefetcher = _Prefetcher(self, prefetcher.streams, prefetcher.capacity)
+            self._prefetcher.start()
+        self._reset_pacing = True
+
+    def step(self, frames: int = 1):
+        """
+        Pauses the replay and sends a single set of frames.
+
+        Args:
+            frames (int): Number of frames to step from the last sent frames, negative steps back. Steps other than 1
+                require a seekable recording.
+        """
+        self._pause = True
+        if frames != 1:
+            self.seek(frame_index=max(0, (self._frame_index or 0) + frames))
+        self._step = True
+
+    def set_range(self, start: Optional[float] = None, end: Optional[float] = None):
+        """
+        Replays only the part of the recording between the timestamps. With set_loop(True), the range is looped.
+
+        Args:
+            start (float, Optional): Seconds from the start of the recording, requires a seekable recording.
+            end (float, Optional): Seconds from the start of the recording.
+        """
+        self._range = (start, end)
+        if start is not None and self.thread is not None:
+            self.seek(timestamp=start)
+
+    def get_frame_index(self) -> Optional[int]:
+        """
+        Index of the last frames sent to the device, None if unknown.
+        """
+        return self._frame_index
+
+    def get_duration(self) -> Optional[float]:
+        """
+        Duration of the recording in seconds, None if unknown.
+        """
+        return self.reader.get_duration()
+
     def sendFrames(self) -> bool:
         """
         Reads and sends recorded frames from all enabled streams to the OAK camera.
@@ -321,22 +628,30 @@ class Replay:
                 self._stop = True
                 return False  # End of the recording
 
+        self._send({name: (stream.frame, self._createImgFrame(stream))
+                    for name, stream in self.streams.items() if stream.frame is not None})
+        return True
+
+    def _send(self, frames: Dict[str, Tuple[np.ndarray, dai.ImgFrame]]):
         self._now = monotonic()
-        for stream_name, stream in self.streams.items():
-            stream.imgFrame = self._createImgFrame(stream)
+        for stream_name, (frame, imgFrame) in frames.items():
+            stream = self.streams[stream_name]
+            stream.frame = frame
+            stream.imgFrame = imgFrame
+            imgFrame.setTimestamp(self._now)
+            imgFrame.setSequenceNum(self._seqNum)
             # Save the imgFrame
             for cb in stream.callbacks:  # callback
-                cb(stream_name.lower(), stream.imgFrame)
+                cb(stream_name, imgFrame)
 
             # Don't send these frames to the OAK camera
             if stream.disabled:
                 continue
 
             # Send an imgFrame to the OAK camera
-            stream.queue.send(stream.imgFrame)
+            stream.queue.send(imgFrame)
 
         self._seqNum += 1
-        return True
 
     def createQueues(self, device: dai.Device):
         """
@@ -367,18 +682,23 @@ class Replay:
             start_h = int((h - size[1]) / 2)
             return frame[start_h:h - start_h, start_w:w - start_w]
 
+    def _frame_size(self, stream: ReplayStream) -> int:
+        if not stream.resize:
+            return stream.size_bytes
+        # Same bytes per pixel, at the resized shape
+        return int(stream.size_bytes * stream.resize[0] * stream.resize[1] / (stream._shape[0] * stream._shape[1]))
+
     def _createNewFrame(self, cvFrame) -> dai.ImgFrame:
+        # Timestamp and sequence number are set when the frame is sent
         imgFrame = dai.ImgFrame()
         imgFrame.setData(cvFrame)
-        imgFrame.setTimestamp(self._now)
-        imgFrame.setSequenceNum(self._seqNum)
         shape = cvFrame.shape[::-1]
         imgFrame.setWidth(shape[0])
         imgFrame.setHeight(shape[1])
         return imgFrame
 
-    def _createImgFrame(self, stream: ReplayStream) -> dai.ImgFrame:
-        cvFrame: np.ndarray = stream.frame
+    def _createImgFrame(self, stream: ReplayStream, frame: Optional[np.ndarray] = None) -> dai.ImgFrame:
+        cvFrame: np.ndarray = stream.frame if frame is None else frame
         if stream.resize:
             cvFrame = self._resize_frame(cvFrame, stream.resize, stream.resize_mode)
 
@@ -432,6 +752,9 @@ class Replay:
         Closes all video readers.
         """
         self._stop = True
-        self.reader.close()
+        self._stop_event.set()
         if self.thread:
             self.thread.join()
+        if self._prefetcher:
+            self._prefetcher.stop()
+        self.reader.close()
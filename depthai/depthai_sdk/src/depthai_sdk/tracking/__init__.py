@@ -1 +1,3 @@
+from .batch_kalman import BatchKalmanFilter
+from .history import TrackletHistory
 from .kalman import KalmanFilter
@@ -0,0 +1,176 @@
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+__all__ = ['BatchKalmanFilter']
+
+
+class BatchKalmanFilter:
+    """
+    Constant-acceleration Kalman filter (same model as KalmanFilter) for many objects at once. States and
+    covariances of all objects are stored in stacked arrays, and predict/update run for all objects in a
+    single vectorized call. Transition and process noise matrices are cached per dt.
+    """
+
+    _MAX_CACHED_DT = 256
+
+    def __init__(self, dim_z: int, acc_std: float, meas_std: float, capacity: int = 16):
+        """
+        Args:
+            dim_z: Measurement dimension, eg. 4 for a 2D bbox (x, y, w, h) or 3 for a 3D point.
+            acc_std: Acceleration standard deviation (process noise).
+            meas_std: Initial measurement standard deviation.
+            capacity: Initial number of objects the arrays are allocated for. Grows automatically.
+        """
+        self.dim_z = dim_z
+        self.dim_x = 3 * dim_z
+        self.acc_std = acc_std
+        self.init_meas_std = meas_std
+
+        self._rows: Dict[Hashable, int] = dict()  # Object id -> row in stacked arrays
+        self._ids: List[Hashable] = []  # Row -> object id
+        self._allocate(capacity)
+
+        self._I = np.eye(self.dim_x)
+        self._P0 = np.zeros((self.dim_x, self.dim_x))
+        i, j = np.indices((self.dim_x, self.dim_x))
+        self._P0[(i - j) % self.dim_z == 0] = 1e5  # initial vector is a guess -> high estimate uncertainty
+
+        # A matrix of the process noise, only acceleration terms
+        self._A = np.zeros((self.dim_x, self.dim_x))
+        np.fill_diagonal(self._A[2 * self.dim_z:, 2 * self.dim_z:], 1)
+        self._cache: Dict[float, Tuple[np.ndarray, np.ndarray]] = dict()
+
+    def _allocate(self, capacity: int) -> None:
+        x = np.zeros((capacity, self.dim_x, 1))
+        P = np.zeros((capacity, self.dim_x, self.dim_x))
+        time = np.zeros(capacity)
+        meas_std = np.zeros(capacity)
+
+        n = len(self._ids)
+        if n:
+            x[:n] = self.x[:n]
+            P[:n] = self.P[:n]
+            time[:n] = self.time[:n]
+            meas_std[:n] = self.meas_std[:n]
+
+        self.x, self.P, self.time, self.meas_std = x, P, time, meas_std
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, obj_id: Hashable) -> bool:
+        return obj_id in self._rows
+
+    def _transition(self, dt: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (cached) state transition matrix F and process noise matrix Q for the dt.
+        """
+        key = round(dt, 6)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        F = np.eye(self.dim_x)
+        np.fill_diagonal(F[:2 * self.dim_z, self.dim_z:], dt)
+        np.fill_diagonal(F[:self.dim_z, 2 * self.dim_z:], dt ** 2 / 2)
+        Q = self.acc_std ** 2 * F @ self._A @ F.T
+
+        if len(self._cache) >= self._MAX_CACHED_DT:
+            self._cache.clear()
+        self._cache[key] = (F, Q)
+        return F, Q
+
+    def _add(self, obj_id: Hashable, z: np.ndarray, time: float) -> None:
+        row = len(self._ids)
+        if row == len(self.time):
+            self._allocate(2 * row)
+
+        self._rows[obj_id] = row
+        self._ids.append(obj_id)
+        self.x[row] = 0
+        self.x[row, :self.dim_z, 0] = z
+        self.P[row] = self._P0
+        self.time[row] = time
+        self.meas_std[row] = self.init_meas_std
+
+    def remove(self, obj_id: Hashable) -> None:
+        """
+        Removes the object; its row is replaced by the last row.
+        """
+        row = self._rows.pop(obj_id, None)
+        if row is None:
+            return
+
+        last = len(self._ids) - 1
+        last_id = self._ids.pop()
+        if row != last:
+            self.x[row] = self.x[last]
+            self.P[row] = self.P[last]
+            self.time[row] = self.time[last]
+            self.meas_std[row] = self.meas_std[last]
+            self._ids[row] = last_id
+            self._rows[last_id] = row
+
+    def predict(self, rows: np.ndarray, dt: np.ndarray) -> None:
+        uniq, inverse = np.unique(np.round(dt, 6), return_inverse=True)
+        transitions = [self._transition(d) for d in uniq]
+        F = np.stack([t[0] for t in transitions])[inverse]
+        Q = np.stack([t[1] for t in transitions])[inverse]
+
+        self.x[rows] = F @ self.x[rows]
+        self.P[rows] = F @ self.P[rows] @ F.transpose(0, 2, 1) + Q
+
+    def update(self, rows: np.ndarray, z: np.ndarray) -> None:
+        d = self.dim_z
+        x = self.x[rows]
+        P = self.P[rows]
+        r = self.meas_std[rows] ** 2  # Measurement uncertainty R = r * I
+
+        S = P[:, :d, :d] + r[:, None, None] * np.eye(d)
+        # K = P H^T S^-1, and both P and S are symmetric
+        K = np.linalg.solve(S, P[:, :d, :]).transpose(0, 2, 1)
+
+        self.x[rows] = x + K @ (z[:, :, None] - x[:, :d])
+
+        IKH = np.broadcast_to(self._I, P.shape).copy()
+        IKH[:, :, :d] -= K
+        self.P[rows] = IKH @ P @ IKH.transpose(0, 2, 1) + r[:, None, None] * (K @ K.transpose(0, 2, 1))
+
+    def step(self,
+             obj_ids: List[Hashable],
+             z: np.ndarray,
+             time: float,
+             meas_std: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Predicts and updates all objects with their new measurements. Objects that aren't tracked yet are
+        initialized with the measurement.
+
+        Args:
+            obj_ids: Object ids, one per measurement.
+            z: Measurements, shape (N, dim_z).
+            time: Timestamp of the measurements, in seconds.
+            meas_std: Optional measurement standard deviations (N,), used from the next update on.
+
+        Returns:
+            Filtered measurement-space states (N, dim_z), and a boolean mask (N,) of objects that were filtered
+            (False for newly initialized objects - their filtered state isn't available yet).
+        """
+        z = np.asarray(z, dtype=np.float64).reshape(len(obj_ids), self.dim_z)
+        filtered = np.zeros(len(obj_ids), dtype=bool)
+        for i, obj_id in enumerate(obj_ids):
+            if obj_id in self._rows:
+                filtered[i] = True
+            else:
+                self._add(obj_id, z[i], time)
+
+        rows = np.array([self._rows[obj_id] for obj_id in obj_ids], dtype=np.int64)
+        upd_rows = rows[filtered]
+        if len(upd_rows):
+            self.predict(upd_rows, time - self.time[upd_rows])
+            self.update(upd_rows, z[filtered])
+            self.time[upd_rows] = time
+            if meas_std is not None:
+                self.meas_std[upd_rows] = np.asarray(meas_std, dtype=np.float64)[filtered]
+
+        return self.x[rows, :self.dim_z, 0], filtered
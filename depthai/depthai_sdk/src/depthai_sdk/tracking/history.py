@@ -0,0 +1,69 @@
+import numpy as np
+
+__all__ = ['TrackletHistory']
+
+
+class TrackletHistory:
+    """
+    Fixed-capacity, time-windowed history of a tracked object. Timestamps (seconds) and 3D coordinates (mm) are
+    stored in preallocated ring arrays, so memory and per-frame cost don't grow with the tracking duration.
+    """
+
+    def __init__(self, capacity: int = 128, window: float = 1.0):
+        """
+        Args:
+            capacity: Maximum number of stored samples. Should be larger than FPS * window.
+            window: Time window (in seconds) used for speed estimation.
+        """
+        self.capacity = capacity
+        self.window = window
+
+        self._ts = np.zeros(capacity, dtype=np.float64)
+        self._coords = np.zeros((capacity, 3), dtype=np.float64)
+        self._head = 0  # Index of the next sample
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, ts: float, x: float, y: float, z: float) -> None:
+        self._ts[self._head] = ts
+        self._coords[self._head] = (x, y, z)
+        self._head = (self._head + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def _ordered_indices(self, n: int) -> np.ndarray:
+        """
+        Ring indices of the last n samples, oldest first.
+        """
+        return (self._head - n + np.arange(n)) % self.capacity
+
+    def speed(self, ts: float) -> float:
+        """
+        Estimates speed (m/s) from consecutive samples whose first sample is within the time window before ts.
+        Speeds are smoothed with a Hanning window and averaged.
+        """
+        if self._count < 2:
+            return 0.0
+
+        idx = self._ordered_indices(self._count)
+        timestamps = self._ts[idx]
+        # Timestamps are ordered, so samples within the window are at the end
+        start = np.searchsorted(timestamps, ts - self.window, side='left')
+        if self._count - start < 2:
+            return 0.0
+
+        timestamps = timestamps[start:]
+        coords = self._coords[idx[start:]]
+
+        dt = np.diff(timestamps)
+        distances = np.linalg.norm(np.diff(coords, axis=0), axis=1) / 1000  # mm -> m
+        valid = dt > 0
+        if not np.any(valid):
+            return 0.0
+        speeds = distances[valid] / dt[valid]
+
+        window = np.hanning(3)
+        window /= window.sum()
+        smoothed = np.convolve(speeds, window, mode='same')
+        return float(np.mean(smoothed))
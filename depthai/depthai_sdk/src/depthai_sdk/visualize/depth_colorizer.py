@@ -0,0 +1,209 @@
+from typing import Callable, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+__all__ = ['DepthColorizer']
+
+N_VALUES = 1 << 16  # All uint16 depth/disparity values
+
+
+class DepthColorizer:
+    """
+    Colorizes uint8/uint16 depth or disparity frames in two steps, without per-frame allocations:
+
+    - value -> palette index. Linear ranges use saturating OpenCV arithmetic, other mappings (:meth:`set_scale`,
+      :meth:`set_lut`) a precomputed 65536-entry table,
+    - palette index -> BGR, with cv2.applyColorMap and a 256-entry palette.
+
+    By default the range is the (1, 99) percentiles of the valid (non-zero) values. The percentiles are taken from a
+    16-bit histogram of a subsampled frame, which is smoothed across frames (exponential decay), so there's no sorting
+    and the range doesn't flicker. Value 0 is invalid and gets palette entry 0 (``invalid_color``).
+
+    Output frames are reused: the returned array is overwritten by the ``buffers``-th next call, copy it if it has to
+    be kept longer. Not thread-safe, use one instance per stream.
+    """
+
+    def __init__(self,
+                 colormap: Union[int, np.ndarray] = cv2.COLORMAP_JET,
+                 percentiles: Tuple[float, float] = (1.0, 99.0),
+                 smoothing: float = 0.8,
+                 subsample: int = 4,
+                 invalid_color: Optional[Tuple[int, int, int]] = (0, 0, 0),
+                 update_tolerance: float = 0.01,
+                 buffers: int = 1):
+        """
+        Args:
+            colormap: OpenCV colormap (eg. cv2.COLORMAP_JET) or palette of shape (256, 1, 3).
+            percentiles: Lower and upper percentile of the valid values that are mapped to the palette ends.
+            smoothing: Weight of the previous frames' histogram, 0 disables smoothing.
+            subsample: Stride (in both axes) of the pixels that are counted in the histogram.
+            invalid_color: BGR color of invalid (0) values. None keeps palette entry 0 of the colormap.
+            update_tolerance: Lookup table is rebuilt when the range moves by more than this fraction of its size.
+            buffers: Number of output frames that are used in rotation.
+        """
+        self.percentiles = percentiles
+        self.smoothing = smoothing
+        self.subsample = max(1, int(subsample))
+        self.invalid_color = invalid_color
+        self.update_tolerance = update_tolerance
+
+        self.range: Optional[Tuple[int, int]] = None  # Currently mapped (min, max) value
+        self._auto = True
+        self._lut_key = None
+        self._lut = np.zeros(N_VALUES, dtype=np.uint8)
+        self._values = np.arange(N_VALUES, dtype=np.float32)
+        self._hist = np.zeros(N_VALUES, dtype=np.float64)
+        self._cdf = np.empty_like(self._hist)
+
+        self._colormap = None
+        self._palette = None
+        self.set_colormap(colormap)
+
+        self._index = None  # Palette index frame
+        self._shifted = None
+        self._valid = None
+        self._out = [None] * max(1, int(buffers))
+        self._next = 0
+
+    def set_colormap(self, colormap: Union[int, np.ndarray]) -> None:
+        """
+        Sets the colormap, cheap to call on every frame with the same colormap.
+        """
+        if self._colormap is not None and (colormap is self._colormap or np.array_equal(colormap, self._colormap)):
+            return
+
+        if isinstance(colormap, np.ndarray):
+            palette = np.array(colormap, dtype=np.uint8).reshape(256, 1, 3)
+        else:
+            palette = cv2.applyColorMap(np.arange(256, dtype=np.uint8).reshape(256, 1), colormap)
+        if self.invalid_color is not None:
+            palette[0] = self.invalid_color
+
+        self._colormap = colormap.copy() if isinstance(colormap, np.ndarray) else colormap
+        self._palette = palette
+
+    def set_auto_range(self, percentiles: Tuple[float, float] = None) -> None:
+        """
+        Maps the percentiles of the valid values (default mode).
+        """
+        if percentiles is not None:
+            self.percentiles = percentiles
+        if not self._auto:
+            self._auto = True
+            self.range = None
+            self._lut_key = None
+            self._hist.fill(0)
+
+    def set_range(self, min_value: float, max_value: float) -> None:
+        """
+        Maps [min_value, max_value] linearly to the palette, values outside are clipped.
+        """
+        self._auto = False
+        self._build_range(min_value, max_value)
+
+    def set_scale(self, multiplier: float) -> None:
+        """
+        Maps value to palette index ``value * multiplier`` (clipped to 255), like disparity frames are colorized.
+        """
+        self._auto = False
+        key = ('scale', multiplier)
+        if key != self._lut_key:
+            self._set_lut(self._values * multiplier, key)
+
+    def set_lut(self, lut: Union[np.ndarray, Callable[[np.ndarray], np.ndarray]], key=None) -> None:
+        """
+        Sets a custom value -> palette index mapping.
+
+        Args:
+            lut: Palette index (0..255) of every uint16 value, shape (65536,), or a function that maps an array of all
+                uint16 values (float32) to palette indices.
+            key: Optional hashable key of the mapping, the table isn't rebuilt while the key is the same.
+        """
+        self._auto = False
+        if key is None or key != self._lut_key:
+            self._set_lut(lut(self._values.copy()) if callable(lut) else lut, key)
+
+    def colorize(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            frame: Depth or disparity frame (uint8 or uint16).
+
+        Returns:
+            Colorized BGR frame.
+        """
+        if frame.dtype != np.uint16 and frame.dtype != np.uint8:
+            raise ValueError(f'DepthColorizer supports uint8 and uint16 frames, got {frame.dtype}')
+
+        if self._auto:
+            self._update_range(frame)
+
+        h, w = frame.shape[:2]
+        if self._index is None or self._index.shape != (h, w):
+            self._index = np.empty((h, w), dtype=np.uint8)
+            self._valid = np.empty((h, w), dtype=np.uint8)
+            self._shifted = None
+            self._out = [None] * len(self._out)
+
+        if self._lut_key is not None and self._lut_key[0] == 'range' and frame.dtype == np.uint16:
+            self._map_linear(frame)
+        elif frame.dtype == np.uint8:
+            cv2.LUT(frame, self._lut[:256], dst=self._index)
+        else:
+            np.take(self._lut, frame, out=self._index)
+
+        out = self._out[self._next]
+        if out is None:
+            out = self._out[self._next] = np.empty((h, w, 3), dtype=np.uint8)
+        self._next = (self._next + 1) % len(self._out)
+        return cv2.applyColorMap(self._index, self._palette, dst=out)
+
+    __call__ = colorize
+
+    def _map_linear(self, frame: np.ndarray) -> None:
+        # Same mapping as the range lookup table: 1 + (value - min) * scale saturated to [1, 255], 0 for invalid
+        if self._shifted is None:
+            self._shifted = np.empty_like(frame)
+        min_value, max_value = self.range
+        cv2.subtract(frame, min_value, dst=self._shifted)
+        cv2.convertScaleAbs(self._shifted, dst=self._index, alpha=254 / max(max_value - min_value, 1e-6), beta=1)
+        cv2.compare(frame, 0, cv2.CMP_NE, dst=self._valid)
+        cv2.bitwise_and(self._index, self._valid, dst=self._index)
+
+    def _update_range(self, frame: np.ndarray) -> None:
+        s = self.subsample
+        counts = np.bincount(frame[::s, ::s].ravel(), minlength=N_VALUES)
+        counts[0] = 0  # Invalid
+
+        # Exponentially decayed histogram, percentiles don't depend on its scale so it isn't normalized
+        self._hist *= self.smoothing
+        self._hist += counts
+        cdf = np.cumsum(self._hist, out=self._cdf)
+        total = cdf[-1]
+        if total <= 0:
+            return
+
+        low, high = np.searchsorted(cdf, [total * self.percentiles[0] / 100, total * self.percentiles[1] / 100])
+        high = max(int(high), int(low) + 1)
+        if self.range is not None:
+            tolerance = self.update_tolerance * (self.range[1] - self.range[0])
+            if abs(low - self.range[0]) <= tolerance and abs(high - self.range[1]) <= tolerance:
+                return
+        self._build_range(int(low), high)
+
+    def _build_range(self, min_value: float, max_value: float) -> None:
+        key = ('range', min_value, max_value)
+        if key == self._lut_key:
+            return
+        self.range = (min_value, max_value)
+        # Valid values use palette entries 1..255, entry 0 is reserved for invalid values
+        scale = 254 / max(max_value - min_value, 1e-6)
+        index = np.subtract(self._values, min_value)
+        index *= scale
+        index += 1.5  # +0.5 for rounding
+        self._set_lut(np.clip(index, 1, 255, out=index), key)
+        self._lut[0] = 0
+
+    def _set_lut(self, index: np.ndarray, key) -> None:
+        np.clip(index, 0, 255, out=self._lut, casting='unsafe')
+        self._lut_key = key
@@ -1,6 +1,7 @@
 from enum import IntEnum
-from typing import Tuple, Union, List, Any, Dict
+from typing import Tuple, Union, List, Any, Dict, Callable, Optional
 
+from depthai_sdk.calibration import DeviceCalibration
 from depthai_sdk.classes.nn_results import TrackingDetection, TwoStageDetection
 from depthai_sdk.visualize.configs import BboxStyle
 from depthai_sdk.visualize.objects import VisBoundingBox
@@ -362,17 +363,17 @@ def depth_to_disp_factor(device: dai.Device, stereo: dai.node.StereoDepth) -> fl
     `disparity[0..95] = disparity_factor / depth`. We can then multiply disparity by 255/95 to get 0..255 range.
     @param device: OAK device
     """
-    calib = device.readCalibration()
-    cam1 = calib.getStereoLeftCameraId()
-    cam2 = calib.getStereoRightCameraId()
-    baseline = calib.getBaselineDistance(cam1=cam1, cam2=cam2, useSpecTranslation=True) * 10  # cm to mm
+    calib = DeviceCalibration.of(device)
+    cam1 = calib.stereo_left()
+    cam2 = calib.stereo_right()
+    baseline = calib.baseline(cam1, cam2, use_spec_translation=True) * 10  # cm to mm
     raw_conf = stereo.initialConfig.get()
 
     align: dai.CameraBoardSocket = stereo.properties.depthAlignCamera
     if align == dai.CameraBoardSocket.AUTO:
         align = cam2
 
-    intrinsics = calib.getCameraIntrinsics(align)
+    intrinsics = calib.intrinsics(align)
     focal_length = intrinsics[0][0]
 
     factor = baseline * focal_length
@@ -382,6 +383,128 @@ def depth_to_disp_factor(device: dai.Device, stereo: dai.node.StereoDepth) -> fl
     return factor
 
 
+class OverlayCompositor:
+    """
+    Translucent fills of a frame (bounding box fills, masks). Fills are collected with add_*() and blended into the
+    frame with blend(), each one only inside its own region, so the cost depends on the filled area and not on the
+    number of fills times the frame size. Opaque drawings (eg. bounding box outlines) can be added too, so they are
+    drawn in order with the fills.
+    """
+
+    def __init__(self):
+        # ((x1, y1, x2, y2) region, overlay(patch, x1, y1) -> overlay of the region, alpha), or
+        # (None, draw(img), None) for opaque drawings
+        self._layers: List[Tuple[Optional[Tuple[int, int, int, int]], Callable, Optional[float]]] = []
+
+    def add_rounded_rect(self,
+                         pt1: Tuple[int, int],
+                         pt2: Tuple[int, int],
+                         color: Tuple[int, int, int],
+                         r: int,
+                         alpha: float
+                         ) -> None:
+        """
+        Add a filled rounded rectangle.
+
+        Args:
+            pt1: Top-left corner of the rectangle.
+            pt2: Bottom-right corner of the rectangle.
+            color: Fill color.
+            r: Radius of the rounded corners.
+            alpha: Opacity of the fill.
+        """
+        x1, y1 = int(pt1[0]), int(pt1[1])
+        x2, y2 = int(pt2[0]), int(pt2[1])
+
+        def overlay(patch: np.ndarray, ox: int, oy: int) -> np.ndarray:
+            overlay = patch.copy()
+            _fill_rounded_rect(overlay, (x1 - ox, y1 - oy), (x2 - ox, y2 - oy), color, r)
+            return overlay
+
+        region = (min(x1, x2), min(y1, y2), max(x1, x2) + 1, max(y1, y2) + 1)
+        self._layers.append((region, overlay, alpha))
+
+    def add_mask(self, mask: np.ndarray, alpha: float) -> None:
+        """
+        Add a mask of the size of the frame.
+
+        Args:
+            mask: Mask represented as uint8 numpy array.
+            alpha: Opacity of the mask.
+        """
+
+        def overlay(patch: np.ndarray, ox: int, oy: int) -> np.ndarray:
+            return mask[oy:oy + patch.shape[0], ox:ox + patch.shape[1]]
+
+        self._layers.append(((0, 0, mask.shape[1], mask.shape[0]), overlay, alpha))
+
+    def add_drawing(self, draw: Callable[[np.ndarray], None]) -> None:
+        """
+        Add an opaque drawing, drawn on the image (in-place) after the fills that were added before it.
+
+        Args:
+            draw: Function that draws on the image.
+        """
+        self._layers.append((None, draw, None))
+
+    def blend(self, img: np.ndarray) -> None:
+        """
+        Blend the added fills into the image (in-place), in the order they were added, and clear them.
+
+        Args:
+            img: Image to draw on.
+        """
+        h, w = img.shape[:2]
+        for region, draw, alpha in self._layers:
+            if region is None:
+                draw(img)
+                continue
+            x1, y1 = max(region[0], 0), max(region[1], 0)
+            x2, y2 = min(region[2], w), min(region[3], h)
+            if x2 <= x1 or y2 <= y1:
+                continue  # Outside of the image
+            patch = img[y1:y2, x1:x2]
+            cv2.addWeighted(draw(patch, x1, y1), alpha, patch, 1 - alpha, 0, patch)
+        self._layers.clear()
+
+
+def _fill_rounded_rect(img: np.ndarray,
+                       pt1: Tuple[int, int],
+                       pt2: Tuple[int, int],
+                       color: Tuple[int, int, int],
+                       r: int
+                       ) -> None:
+    thickness = -1
+    bbox = (pt1[0], pt1[1], pt2[0], pt2[1])
+
+    top_left = (bbox[0], bbox[1])
+    bottom_right = (bbox[2], bbox[3])
+    top_right = (bottom_right[0], top_left[1])
+    bottom_left = (top_left[0], bottom_right[1])
+
+    top_left_main_rect = (int(top_left[0] + r), int(top_left[1]))
+    bottom_right_main_rect = (int(bottom_right[0] - r), int(bottom_right[1]))
+
+    top_left_rect_left = (top_left[0], top_left[1] + r)
+    bottom_right_rect_left = (bottom_left[0] + r, bottom_left[1] - r)
+
+    top_left_rect_right = (top_right[0] - r, top_right[1] + r)
+    bottom_right_rect_right = (bottom_right[0], bottom_right[1] - r)
+
+    all_rects = [
+        [top_left_main_rect, bottom_right_main_rect],
+        [top_left_rect_left, bottom_right_rect_left],
+        [top_left_rect_right, bottom_right_rect_right]
+    ]
+
+    [cv2.rectangle(img, pt1=rect[0], pt2=rect[1], color=color, thickness=thickness) for rect in all_rects]
+
+    cv2.ellipse(img, (top_left[0] + r, top_left[1] + r), (r, r), 180.0, 0, 90, color, thickness)
+    cv2.ellipse(img, (top_right[0] - r, top_right[1] + r), (r, r), 270.0, 0, 90, color, thickness)
+    cv2.ellipse(img, (bottom_right[0] - r, bottom_right[1] - r), (r, r), 0.0, 0, 90, color, thickness)
+    cv2.ellipse(img, (bottom_left[0] + r, bottom_left[1] - r), (r, r), 90.0, 0, 90, color, thickness)
+
+
 def draw_bbox(img: np.ndarray,
               pt1: Tuple[int, int],
               pt2: Tuple[int, int],
@@ -390,7 +513,8 @@ def draw_bbox(img: np.ndarray,
               r: int,
               line_width: int,
               line_height: int,
-              alpha: float
+              alpha: float,
+              compositor: Optional[OverlayCompositor] = None
               ) -> None:
     """
     Draw a rounded rectangle on the image (in-place).
@@ -405,6 +529,8 @@ def draw_bbox(img: np.ndarray,
         line_width: Width of the rectangle line.
         line_height: Height of the rectangle line.
         alpha: Opacity of the rectangle.
+        compositor: Compositor that the rectangle is added to, drawn later together with other fills. If not
+            specified, the rectangle is drawn right away.
     """
     x1, y1 = pt1
     x2, y2 = pt2
@@ -417,70 +543,48 @@ def draw_bbox(img: np.ndarray,
         line_height = np.abs(y2 - y1)
         line_height -= 2 * r if r > 0 else 0  # Adjust for rounded corners
 
-    # Top left
-    cv2.line(img, (x1 + r, y1), (x1 + r + line_width, y1), color, thickness)
-    cv2.line(img, (x1, y1 + r), (x1, y1 + r + line_height), color, thickness)
-    cv2.ellipse(img, (x1 + r, y1 + r), (r, r), 180, 0, 90, color, thickness)
-
-    # Top right
-    cv2.line(img, (x2 - r, y1), (x2 - r - line_width, y1), color, thickness)
-    cv2.line(img, (x2, y1 + r), (x2, y1 + r + line_height), color, thickness)
-    cv2.ellipse(img, (x2 - r, y1 + r), (r, r), 270, 0, 90, color, thickness)
-
-    # Bottom left
-    cv2.line(img, (x1 + r, y2), (x1 + r + line_width, y2), color, thickness)
-    cv2.line(img, (x1, y2 - r), (x1, y2 - r - line_height), color, thickness)
-    cv2.ellipse(img, (x1 + r, y2 - r), (r, r), 90, 0, 90, color, thickness)
-
-    # Bottom right
-    cv2.line(img, (x2 - r, y2), (x2 - r - line_width, y2), color, thickness)
-    cv2.line(img, (x2, y2 - r), (x2, y2 - r - line_height), color, thickness)
-    cv2.ellipse(img, (x2 - r, y2 - r), (r, r), 0, 0, 90, color, thickness)
+    def draw_outline(img: np.ndarray) -> None:
+        # Top left
+        cv2.line(img, (x1 + r, y1), (x1 + r + line_width, y1), color, thickness)
+        cv2.line(img, (x1, y1 + r), (x1, y1 + r + line_height), color, thickness)
+        cv2.ellipse(img, (x1 + r, y1 + r), (r, r), 180, 0, 90, color, thickness)
 
-    # Fill the area
-    if 0 < alpha:
-        overlay = img.copy()
-
-        thickness = -1
-        bbox = (pt1[0], pt1[1], pt2[0], pt2[1])
-
-        top_left = (bbox[0], bbox[1])
-        bottom_right = (bbox[2], bbox[3])
-        top_right = (bottom_right[0], top_left[1])
-        bottom_left = (top_left[0], bottom_right[1])
+        # Top right
+        cv2.line(img, (x2 - r, y1), (x2 - r - line_width, y1), color, thickness)
+        cv2.line(img, (x2, y1 + r), (x2, y1 + r + line_height), color, thickness)
+        cv2.ellipse(img, (x2 - r, y1 + r), (r, r), 270, 0, 90, color, thickness)
 
-        top_left_main_rect = (int(top_left[0] + r), int(top_left[1]))
-        bottom_right_main_rect = (int(bottom_right[0] - r), int(bottom_right[1]))
+        # Bottom left
+        cv2.line(img, (x1 + r, y2), (x1 + r + line_width, y2), color, thickness)
+        cv2.line(img, (x1, y2 - r), (x1, y2 - r - line_height), color, thickness)
+        cv2.ellipse(img, (x1 + r, y2 - r), (r, r), 90, 0, 90, color, thickness)
 
-        top_left_rect_left = (top_left[0], top_left[1] + r)
-        bottom_right_rect_left = (bottom_left[0] + r, bottom_left[1] - r)
-
-        top_left_rect_right = (top_right[0] - r, top_right[1] + r)
-        bottom_right_rect_right = (bottom_right[0], bottom_right[1] - r)
-
-        all_rects = [
-            [top_left_main_rect, bottom_right_main_rect],
-            [top_left_rect_left, bottom_right_rect_left],
-            [top_left_rect_right, bottom_right_rect_right]
-        ]
+        # Bottom right
+        cv2.line(img, (x2 - r, y2), (x2 - r - line_width, y2), color, thickness)
+        cv2.line(img, (x2, y2 - r), (x2, y2 - r - line_height), color, thickness)
+        cv2.ellipse(img, (x2 - r, y2 - r), (r, r), 0, 0, 90, color, thickness)
 
-        [cv2.rectangle(overlay, pt1=rect[0], pt2=rect[1], color=color, thickness=thickness) for rect in all_rects]
+    blend = compositor is None
+    if blend:
+        compositor = OverlayCompositor()
 
-        cv2.ellipse(overlay, (top_left[0] + r, top_left[1] + r), (r, r), 180.0, 0, 90, color, thickness)
-        cv2.ellipse(overlay, (top_right[0] - r, top_right[1] + r), (r, r), 270.0, 0, 90, color, thickness)
-        cv2.ellipse(overlay, (bottom_right[0] - r, bottom_right[1] - r), (r, r), 0.0, 0, 90, color, thickness)
-        cv2.ellipse(overlay, (bottom_left[0] + r, bottom_left[1] - r), (r, r), 90.0, 0, 90, color, thickness)
+    # The fill goes below the outline (same result as blending it over the outline, as it's of the same color)
+    if 0 < alpha:
+        compositor.add_rounded_rect(pt1, pt2, color, r, alpha)
+    compositor.add_drawing(draw_outline)
 
-        cv2.addWeighted(overlay, alpha, img, 1 - alpha, 0, img)
+    if blend:
+        compositor.blend(img)
 
 
-def draw_stylized_bbox(img: np.ndarray, obj: VisBoundingBox) -> None:
+def draw_stylized_bbox(img: np.ndarray, obj: VisBoundingBox, compositor: Optional[OverlayCompositor] = None) -> None:
     """
     Draw a stylized bounding box. The style is either passed as an argument or defined in the config.
 
     Args:
         img: Image to draw on.
         obj: Bounding box to draw.
+        compositor: Compositor that the bounding box is added to. If not specified, it's drawn right away.
     """
     pt1, pt2 = obj.bbox.denormalize(img.shape)
 
@@ -496,16 +600,16 @@ def draw_stylized_bbox(img: np.ndarray, obj: VisBoundingBox) -> None:
     if bbox_style == BboxStyle.RECTANGLE:
         draw_bbox(img, pt1, pt2,
                   obj.color, obj.thickness, 0,
-                  line_width=0, line_height=0, alpha=alpha)
+                  line_width=0, line_height=0, alpha=alpha, compositor=compositor)
     elif bbox_style == BboxStyle.CORNERS:
         draw_bbox(img, pt1, pt2,
                   obj.color, obj.thickness, 0,
-                  line_width=line_width, line_height=line_height, alpha=alpha)
+                  line_width=line_width, line_height=line_height, alpha=alpha, compositor=compositor)
     elif bbox_style == BboxStyle.ROUNDED_RECTANGLE:
         draw_bbox(img, pt1, pt2,
                   obj.color, obj.thickness, roundness,
-                  line_width=0, line_height=0, alpha=alpha)
+                  line_width=0, line_height=0, alpha=alpha, compositor=compositor)
     elif bbox_style == BboxStyle.ROUNDED_CORNERS:
         draw_bbox(img, pt1, pt2,
                   obj.color, obj.thickness, roundness,
-                  line_width=line_width, line_height=line_height, alpha=alpha)
+                  line_width=line_width, line_height=line_height, alpha=alpha, compositor=compositor)
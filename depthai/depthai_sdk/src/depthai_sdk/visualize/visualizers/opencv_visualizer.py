@@ -16,7 +16,7 @@ from depthai_sdk.visualize.objects import (
     VisTrail,
 )
 from depthai_sdk.visualize.visualizer import Visualizer
-from depthai_sdk.visualize.visualizer_helper import draw_stylized_bbox, draw_bbox
+from depthai_sdk.visualize.visualizer_helper import OverlayCompositor, draw_stylized_bbox
 from depthai_sdk.visualize.visualizers.opencv_text import OpenCvTextVis
 
 
@@ -32,25 +32,26 @@ class OpenCvVisualizer(Visualizer):
         Returns:
             np.ndarray if the platform is PC, None otherwise.
         """
-        # Draw overlays
+        # Draw overlays. Translucent fills (bounding boxes, masks) are collected by the compositor and blended
+        # together, only inside their regions, before anything that should be drawn on top of them
+        compositor = OverlayCompositor()
         for obj in self.objects:
             if type(obj) == VisBoundingBox:
-                draw_stylized_bbox(frame, obj=obj)
+                draw_stylized_bbox(frame, obj=obj, compositor=compositor)
             elif type(obj) == VisDetections:
-                for bbox, _, color in obj.get_detections():
-                    tl, br = bbox.denormalize(frame.shape)
-                    draw_bbox(
-                        img=frame,
-                        pt1=tl,
-                        pt2=br,
-                        color=color,
-                        thickness=self.config.detection.thickness,
-                        r=self.config.detection.radius,
-                        line_width=self.config.detection.line_width,
-                        line_height=self.config.detection.line_height,
-                        alpha=self.config.detection.alpha,
-                    )
-            elif type(obj) == VisText:
+                for bbox, label, color in obj.get_detections():
+                    bbox_obj = VisBoundingBox(bbox=bbox,
+                                              label=label,
+                                              color=color,
+                                              thickness=self.config.detection.thickness,
+                                              bbox_style=None).set_config(self.config)
+                    draw_stylized_bbox(frame, obj=bbox_obj, compositor=compositor)
+            elif type(obj) == VisMask:
+                compositor.add_mask(obj.mask, obj.alpha)
+            else:
+                compositor.blend(frame)
+
+            if type(obj) == VisText:
                 OpenCvTextVis(obj, self.config).draw_text(frame)
             elif type(obj) == VisTrail:
                 obj = obj.prepare()
@@ -70,8 +71,7 @@ class OpenCvVisualizer(Visualizer):
                            obj.color or circle_config.color,
                            obj.thickness or circle_config.thickness,
                            circle_config.line_type)
-            elif type(obj) == VisMask:
-                cv2.addWeighted(frame, 1 - obj.alpha, obj.mask, obj.alpha, 0, frame)
+        compositor.blend(frame)
 
         self.reset()
         return frame
@@ -82,7 +82,7 @@ class OpenCvVisualizer(Visualizer):
             self.add_text(text=f'FPS: {fps:.1f}', position=TextPosition.TOP_LEFT)
 
         if isinstance(packet, DisparityPacket):
-            frame = packet.get_colorized_frame(self)
+            frame = packet.get_colorized_frame(self, copy=False)  # Drawn and shown right away
         elif isinstance(packet, FramePacket):
             frame = packet.decode()
         else:
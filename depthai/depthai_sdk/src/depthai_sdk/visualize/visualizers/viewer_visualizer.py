@@ -64,12 +64,13 @@ class DepthaiViewerVisualizer(Visualizer):
         if type(packet) == IMUPacket:
             viewer.log_imu(*packet.get_imu_vals())
         elif type(packet) == PointcloudPacket:
+            points = np.multiply(packet.points.reshape(-1, 3), np.float32(0.001))  # mm -> m
             if packet.colorize_frame is not None:
-                rgb_frame = packet.colorize_frame[..., ::-1]
-                viewer.log_image(f'color', rgb_frame)
-                viewer.log_points(packet.name, packet.points.reshape(-1, 3) / 1000, colors=rgb_frame.reshape(-1, 3))
+                viewer.log_image(f'color', packet.colorize_frame[..., ::-1])
+            if packet.colors is not None:
+                viewer.log_points(packet.name, points, colors=packet.colors.reshape(-1, 3))
             else:
-                viewer.log_points(packet.name, packet.points.reshape(-1, 3) / 1000)
+                viewer.log_points(packet.name, points)
 
         vis_bbs = []
         for i, obj in enumerate(self.objects):
@@ -0,0 +1,71 @@
+import unittest
+from datetime import timedelta
+
+from depthai_sdk.oak_outputs.syncing import SequenceNumSync, TimestampSync
+
+
+def ms(value):
+    return timedelta(milliseconds=value)
+
+
+class TestTimestampSync(unittest.TestCase):
+
+    def test_sync_closest(self):
+        sync = TimestampSync(2, ms_threshold=10)
+        self.assertIsNone(sync.sync(ms(0), 'a', 'a0'))
+        self.assertIsNone(sync.sync(ms(33), 'a', 'a1'))
+        synced = sync.sync(ms(31), 'b', 'b0')
+        self.assertEqual(synced, {'a': 'a1', 'b': 'b0'})
+
+        stats = sync.get_stats()
+        self.assertEqual(stats['synced'], 1)
+        self.assertEqual(stats['unmatched']['a'], 1)
+        self.assertEqual(stats['queued'], {'a': 0, 'b': 0})
+
+    def test_out_of_threshold(self):
+        sync = TimestampSync(2, ms_threshold=10)
+        sync.sync(ms(0), 'a', 'a0')
+        self.assertIsNone(sync.sync(ms(20), 'b', 'b0'))
+
+    def test_bounded_queue(self):
+        sync = TimestampSync(2, ms_threshold=10, max_queue_size=5)
+        for i in range(100):
+            sync.sync(ms(i * 33), 'a', i)
+
+        stats = sync.get_stats()
+        self.assertEqual(stats['queued']['a'], 5)
+        self.assertEqual(stats['evicted']['a'], 95)
+        # Laggy stream can still sync with the buffered messages
+        self.assertEqual(sync.sync(ms(97 * 33 + 2), 'b', 'b0'), {'a': 97, 'b': 'b0'})
+
+    def test_out_of_order(self):
+        sync = TimestampSync(2, ms_threshold=5)
+        sync.sync(ms(100), 'a', 'a1')
+        sync.sync(ms(50), 'a', 'a0')
+        self.assertEqual(sync.sync(ms(51), 'b', 'b0'), {'a': 'a0', 'b': 'b0'})
+        self.assertEqual(sync.get_stats()['queued']['a'], 1)
+
+
+class TestSequenceNumSync(unittest.TestCase):
+
+    def test_sync(self):
+        sync = SequenceNumSync(2)
+        self.assertIsNone(sync.sync(1, 'a', 'a1'))
+        self.assertIsNone(sync.sync(2, 'a', 'a2'))
+        self.assertEqual(sync.sync(2, 'b', 'b2'), {'a': 'a2', 'b': 'b2'})
+        # Older partial group can't be synced anymore, so it gets removed
+        self.assertEqual(sync.msgs, {})
+        self.assertEqual(sync.evicted_groups, 1)
+
+    def test_horizon(self):
+        sync = SequenceNumSync(2, max_pending=10)
+        for seq in range(1000):
+            sync.sync(seq, 'a', seq)
+
+        self.assertEqual(len(sync.msgs), 10)
+        self.assertEqual(min(sync.msgs), 990)
+        self.assertEqual(sync.evicted_groups, 990)
+        # Message older than the horizon gets dropped
+        self.assertIsNone(sync.sync(5, 'b', 'b5'))
+        self.assertEqual(len(sync.msgs), 10)
+        self.assertEqual(sync.sync(995, 'b', 'b995'), {'a': 995, 'b': 'b995'})
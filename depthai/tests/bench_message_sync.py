@@ -0,0 +1,75 @@
+"""
+Compares calibrate.MessageSync.get_synced with the previous exhaustive search over all queue index combinations, on
+2, 4 and 8 synthetic cameras (jittered frame timestamps). A device isn't required.
+"""
+import itertools
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from calibrate import MessageSync
+
+FPS = 30
+ITERATIONS = 20
+
+
+class SyntheticMsg:
+    def __init__(self, ts: float):
+        self.ts = timedelta(seconds=ts)
+
+    def getTimestampDevice(self):
+        return self.ts
+
+
+def exhaustive_error(queues) -> float:
+    # Minimal error (sum of absolute differences to the first camera) over all index combinations
+    best = None
+    for indices in itertools.product(*[range(len(q)) for q in queues.values()]):
+        msgs = [q[i] for q, i in zip(queues.values(), indices)]
+        anchor = msgs[0].getTimestampDevice().total_seconds()
+        acc_diff = sum(abs(anchor - msg.getTimestampDevice().total_seconds()) for msg in msgs)
+        best = acc_diff if best is None else min(best, acc_diff)
+    return best
+
+
+def fill(sync: MessageSync, num_cameras: int, rng) -> None:
+    offsets = rng.uniform(0, 1 / FPS, num_cameras)  # Unsynced cameras
+    for frame in range(sync.max_num_messages):
+        for cam in range(num_cameras):
+            ts = frame / FPS + offsets[cam] + rng.normal(0, 0.001)
+            sync.add_msg(f'CAM_{cam}', SyntheticMsg(ts))
+
+
+def bench(num_cameras: int) -> None:
+    rng = np.random.default_rng(num_cameras)
+    errors = []
+    sync_s = exhaustive_s = 0
+    for _ in range(ITERATIONS):
+        sync = MessageSync(num_cameras, min_diff_timestamp=float('inf'))
+        fill(sync, num_cameras, rng)
+
+        start = time.perf_counter()
+        expected = exhaustive_error(sync.queues)
+        exhaustive_s += time.perf_counter() - start
+
+        anchors = {name: list(q) for name, q in sync.queues.items()}
+        start = time.perf_counter()
+        synced = sync.get_synced()
+        sync_s += time.perf_counter() - start
+
+        anchor = next(iter(synced.values())).getTimestampDevice().total_seconds()
+        error = sum(abs(anchor - msg.getTimestampDevice().total_seconds()) for msg in synced.values())
+        errors.append(abs(error - expected))
+        assert all(msg in anchors[name] for name, msg in synced.items())
+
+    print(f'{num_cameras} cameras: get_synced {sync_s / ITERATIONS * 1000:8.3f} ms, '
+          f'exhaustive {exhaustive_s / ITERATIONS * 1000:8.3f} ms, max error difference {max(errors):.2e} s')
+
+
+if __name__ == '__main__':
+    for num_cameras in [2, 4, 8]:
+        bench(num_cameras)
@@ -8,7 +8,265 @@ import depthai as dai
 import numpy as np
 import time
 import threading
-from datetime import datetime
+import queue
+import json
+from collections import deque
+from datetime import datetime, timedelta
+
+try:
+    # 基于直方图和查找表的深度伪彩色 (depthai_sdk)，不可用时退回逐帧计算百分位
+    from depthai_sdk.visualize.depth_colorizer import DepthColorizer
+except ImportError:
+    DepthColorizer = None
+
+STREAMS = ["rgb", "depth", "left", "right"]
+
+
+class StreamStats:
+    """单路流的帧率和端到端延迟（设备采集时刻 -> 主机处理完成）统计"""
+    def __init__(self, window=1.0):
+        self.window = window
+        self.count = 0
+        self.start = time.monotonic()
+        self.fps = 0.0
+        self.latency_ms = None
+
+    def new_frame(self):
+        """帧到达时调用，按时间窗口计算帧率"""
+        self.count += 1
+        now = time.monotonic()
+        if now - self.start >= self.window:
+            self.fps = self.count / (now - self.start)
+            self.count = 0
+            self.start = now
+
+    def new_latency(self, msg):
+        """帧处理完成时调用，延迟做指数平滑"""
+        latency = (dai.Clock.now() - msg.getTimestamp()).total_seconds() * 1000
+        self.latency_ms = latency if self.latency_ms is None else 0.9 * self.latency_ms + 0.1 * latency
+
+
+class FrameSetSync:
+    """
+    按设备时间戳把 RGB/深度/左/右 帧分组为同一采集时刻的一组帧。
+    消息由队列回调送入，不需要轮询；每组凑齐后调用 callback(frame_set)。
+    """
+    def __init__(self, streams, threshold_ms, max_pending=8, callback=None):
+        self.streams = list(streams)
+        self.threshold = timedelta(milliseconds=threshold_ms)
+        self.buffers = {name: deque(maxlen=max_pending) for name in self.streams}
+        self.callback = callback
+        self.stats = {name: StreamStats() for name in self.streams}
+        self.lock = threading.Lock()
+        self.synced = 0
+        self.dropped = 0
+
+    def add(self, name, msg):
+        """队列回调: (流名称, 消息)"""
+        if name not in self.buffers:
+            return
+        with self.lock:
+            self.stats[name].new_frame()
+            self.buffers[name].append(msg)
+            frame_set = self._match()
+        if frame_set is not None and self.callback is not None:
+            self.callback(frame_set)
+
+    def _match(self):
+        # 所有流都至少有一帧时才可能配对
+        while all(self.buffers[name] for name in self.streams):
+            heads = {name: self.buffers[name][0].getTimestamp() for name in self.streams}
+            newest = max(heads.values())
+            # 比最新队首还早超过阈值的帧不可能再配对，丢弃
+            stale = [name for name, ts in heads.items() if newest - ts > self.threshold]
+            if not stale:
+                self.synced += 1
+                return {name: self.buffers[name].popleft() for name in self.streams}
+            for name in stale:
+                self.buffers[name].popleft()
+                self.dropped += 1
+        return None
+
+
+class StreamCodec:
+    """
+    单路流的保存格式:
+      png    - PNG, compression 为压缩等级 0-9（越小越快）
+      webp   - 无损 WebP，仅支持 8 位图像
+      npy    - 每帧一个 .npy 原始数据文件
+      memmap - 按块写入内存映射 .npy 文件（每块 chunk_size 帧），适合深度图全帧率采集
+    """
+    FORMATS = ("png", "webp", "npy", "memmap")
+    EXTENSIONS = {"png": ".png", "webp": ".webp", "npy": ".npy", "memmap": ".npy"}
+
+    def __init__(self, fmt="png", compression=1, chunk_size=300):
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unknown codec '{fmt}', supported: {self.FORMATS}")
+        self.fmt = fmt
+        self.compression = compression
+        self.chunk_size = chunk_size
+
+    @property
+    def ext(self):
+        return self.EXTENSIONS[self.fmt]
+
+    def write(self, path, image):
+        if self.fmt == "png":
+            ok = cv2.imwrite(path, image, [cv2.IMWRITE_PNG_COMPRESSION, self.compression])
+        elif self.fmt == "webp":
+            if image.dtype != np.uint8:
+                raise ValueError("WebP supports only 8-bit images")
+            ok = cv2.imwrite(path, image, [cv2.IMWRITE_WEBP_QUALITY, 101])  # 质量 > 100 为无损
+        else:
+            np.save(path, image)
+            ok = True
+        if not ok:
+            raise IOError(f"Failed to write {path}")
+
+
+# 各路流的默认保存格式
+SAVE_CODECS = {
+    "rgb": StreamCodec("png", compression=1),
+    "depth": StreamCodec("png", compression=1),
+    "depth_color": StreamCodec("png", compression=1),
+    "left": StreamCodec("png", compression=1),
+    "right": StreamCodec("png", compression=1),
+}
+
+
+class ChunkStore:
+    """
+    把同尺寸的帧按块写入内存映射 .npy 文件。槽位在提交时按顺序分配，
+    因此多个工作线程可以并行写入同一块中的不同槽位。
+    """
+    def __init__(self, folder, prefix, chunk_size):
+        self.folder = folder
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+        self.lock = threading.Lock()
+        self.chunk = None
+        self.chunk_name = None
+        self.chunk_index = 0
+        self.slot = 0
+
+    def allocate(self, image):
+        """返回 (块文件名, 槽位, 内存映射数组)"""
+        with self.lock:
+            if self.chunk is None or self.slot >= self.chunk_size or \
+                    self.chunk.shape[1:] != image.shape or self.chunk.dtype != image.dtype:
+                self.chunk_name = f"{self.prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{self.chunk_index:04d}.npy"
+                self.chunk = np.lib.format.open_memmap(os.path.join(self.folder, self.chunk_name), mode="w+",
+                                                       dtype=image.dtype, shape=(self.chunk_size,) + image.shape)
+                self.chunk_index += 1
+                self.slot = 0
+            slot = self.slot
+            self.slot += 1
+            return self.chunk_name, slot, self.chunk
+
+    def close(self):
+        with self.lock:
+            if self.chunk is not None:
+                self.chunk.flush()
+            self.chunk = None
+
+
+class DatasetWriter:
+    """
+    后台数据集写入: 帧组放入有界队列，由工作线程池编码写盘，不阻塞采集线程。
+    队列满时丢弃整组帧并计数；每写完一组，在 index.jsonl 中追加一行，
+    记录每路流的文件、块内槽位、设备时间戳和序列号。
+    """
+    def __init__(self, root, folders, codecs, workers=4, queue_size=32):
+        self.root = root
+        self.folders = folders
+        self.codecs = codecs
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stats = {"submitted": 0, "written": 0, "dropped": 0, "errors": 0}
+        self.last_error = None
+        self.stats_lock = threading.Lock()
+        self.index_lock = threading.Lock()
+        self.index_file = open(os.path.join(root, "index.jsonl"), "a")
+        self.chunks = {name: ChunkStore(folders[name], name, codec.chunk_size)
+                       for name, codec in codecs.items() if codec.fmt == "memmap"}
+
+        self.workers = [threading.Thread(target=self._worker, daemon=True) for _ in range(workers)]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, set_id, frames):
+        """
+        提交一组帧: frames 为 {流名称: (图像, 设备时间戳[s], 序列号)}。
+        内存映射槽位在这里按顺序分配。返回 False 表示队列已满、该组被丢弃。
+        """
+        if self.queue.full():
+            with self.stats_lock:
+                self.stats["dropped"] += 1
+            return False
+
+        jobs = []
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]  # 精确到毫秒
+        for name, (image, ts_device, seq) in frames.items():
+            codec = self.codecs[name]
+            if codec.fmt == "memmap":
+                target = self.chunks[name].allocate(image)
+            else:
+                target = os.path.join(self.folders[name], f"{name}_{timestamp}_{set_id:06d}{codec.ext}")
+            jobs.append((name, image, ts_device, seq, target))
+
+        self.queue.put((set_id, time.time(), jobs))
+        with self.stats_lock:
+            self.stats["submitted"] += 1
+        return True
+
+    def _worker(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            set_id, host_time, jobs = item
+            entry = {"set": set_id, "host_time": host_time, "frames": {}}
+            try:
+                for name, image, ts_device, seq, target in jobs:
+                    frame = {"timestamp_device": ts_device, "sequence": seq}
+                    if isinstance(target, tuple):
+                        chunk_name, slot, chunk = target
+                        chunk[slot] = image
+                        frame["file"] = os.path.relpath(os.path.join(self.folders[name], chunk_name), self.root)
+                        frame["slot"] = slot
+                    else:
+                        self.codecs[name].write(target, image)
+                        frame["file"] = os.path.relpath(target, self.root)
+                    entry["frames"][name] = frame
+
+                with self.index_lock:
+                    self.index_file.write(json.dumps(entry) + "\n")
+                with self.stats_lock:
+                    self.stats["written"] += 1
+            except Exception as e:
+                self.last_error = e
+                with self.stats_lock:
+                    self.stats["errors"] += 1
+                print(f"Error saving images: {str(e)}")
+
+    def get_stats(self):
+        with self.stats_lock:
+            stats = dict(self.stats)
+        stats["queued"] = self.queue.qsize()
+        return stats
+
+    def close(self):
+        """写完队列中剩余的帧组后关闭"""
+        for _ in self.workers:
+            self.queue.put(None)
+        for worker in self.workers:
+            worker.join()
+        for chunk in self.chunks.values():
+            chunk.close()
+        self.index_file.close()
+        stats = self.get_stats()
+        print(f"Dataset writer: {stats['written']} sets written, {stats['dropped']} dropped, "
+              f"{stats['errors']} errors")
+
 
 class OAKCameraApp:
     def __init__(self):
@@ -23,15 +281,32 @@ class OAKCameraApp:
         self.rgb_image = None
         self.depth_image = None
         self.depth_colormap = None
+        self.depth_colorizer = DepthColorizer(buffers=3) if DepthColorizer is not None else None
         self.left_image = None
         self.right_image = None
         self.quit_flag = False
+        self.image_lock = threading.Lock()
+        
+        # 同步采集: 队列回调 -> 帧组同步 -> 处理线程（阻塞等待帧组，不轮询）
+        self.fps = 30
+        self.syncer = None
+        self.set_queue = queue.Queue(maxsize=2)
+        self.ui_fps = 30  # UI 刷新频率，与采集无关
         
         # 保存标志
         self.save_rgb_continuous = False
         self.save_depth_continuous = False
         self.save_lr_continuous = False
         
+        # 后台数据集写入（每组同步帧都保存，全帧率）
+        self.save_codecs = SAVE_CODECS
+        self.save_workers = 4
+        self.save_queue_size = 32
+        self.writer = None
+        self.writer_lock = threading.Lock()  # 写入器的创建、提交与关闭互斥
+        self.writer_closed = False
+        self.set_id = 0
+        
         # 按钮区域定义 - 英文文字
         self.buttons = {
             "start": {"x1": 20, "y1": 20, "x2": 120, "y2": 60, "text": "Start", "color": (100, 200, 100)},
@@ -163,36 +438,54 @@ class OAKCameraApp:
         cv2.putText(ui, "Left Camera", (300, 440), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
         cv2.putText(ui, "Right Camera", (900, 440), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
         
+        # 每路流的帧率和延迟
+        if self.running and self.syncer is not None:
+            for name, (x, y) in {"rgb": (20, 125), "depth": (660, 125),
+                                 "left": (20, 435), "right": (660, 435)}.items():
+                stats = self.syncer.stats[name]
+                latency = f"{stats.latency_ms:.0f} ms" if stats.latency_ms is not None else "-"
+                cv2.putText(ui, f"{stats.fps:.1f} FPS  {latency}", (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 128), 1)
+            cv2.putText(ui, f"Synced sets: {self.syncer.synced}  Dropped: {self.syncer.dropped}", (800, 90),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 128), 1)
+        writer = self.writer  # 可能被 close_writer() 同时置空
+        if writer is not None:
+            stats = writer.get_stats()
+            cv2.putText(ui, f"Saved: {stats['written']}  Dropped: {stats['dropped']}  Queue: {stats['queued']}",
+                        (1050, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 128), 1)
+        
         # 图像尺寸调整
         img_width, img_height = 620, 280
+        with self.image_lock:
+            rgb_image, depth_colormap = self.rgb_image, self.depth_colormap
+            left_image, right_image = self.left_image, self.right_image
         
         # 显示RGB图像 (左上)
-        if self.rgb_image is not None:
-            rgb_resized = cv2.resize(self.rgb_image, (img_width, img_height))
+        if rgb_image is not None:
+            rgb_resized = cv2.resize(rgb_image, (img_width, img_height))
             ui[130:130+img_height, 10:10+img_width] = rgb_resized
         else:
             cv2.rectangle(ui, (10, 130), (10+img_width, 130+img_height), (200, 200, 200), 2)
             cv2.putText(ui, "RGB Not Available", (260, 260), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
         
         # 显示深度图像 (右上)
-        if self.depth_colormap is not None:
-            depth_resized = cv2.resize(self.depth_colormap, (img_width, img_height))
+        if depth_colormap is not None:
+            depth_resized = cv2.resize(depth_colormap, (img_width, img_height))
             ui[130:130+img_height, 650:650+img_width] = depth_resized
         else:
             cv2.rectangle(ui, (650, 130), (650+img_width, 130+img_height), (200, 200, 200), 2)
             cv2.putText(ui, "Depth Not Available", (870, 260), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
         
         # 显示左相机图像 (左下)
-        if self.left_image is not None:
-            left_resized = cv2.resize(self.left_image, (img_width, img_height))
+        if left_image is not None:
+            left_resized = cv2.resize(left_image, (img_width, img_height))
             ui[440:440+img_height, 10:10+img_width] = cv2.cvtColor(left_resized, cv2.COLOR_GRAY2BGR)
         else:
             cv2.rectangle(ui, (10, 440), (10+img_width, 440+img_height), (200, 200, 200), 2)
             cv2.putText(ui, "Left Camera Not Available", (240, 570), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
         
         # 显示右相机图像 (右下)
-        if self.right_image is not None:
-            right_resized = cv2.resize(self.right_image, (img_width, img_height))
+        if right_image is not None:
+            right_resized = cv2.resize(right_image, (img_width, img_height))
             ui[440:440+img_height, 650:650+img_width] = cv2.cvtColor(right_resized, cv2.COLOR_GRAY2BGR)
         else:
             cv2.rectangle(ui, (650, 440), (650+img_width, 440+img_height), (200, 200, 200), 2)
@@ -205,8 +498,7 @@ class OAKCameraApp:
         """显示状态消息"""
         self.status_message = message
         self.status_time = time.time()
-        print(message)  # 控制台打印消息
-        self.create_ui()  # 刷新UI以显示状态
+        print(message)  # 控制台打印消息，UI 在主循环中按自身频率刷新
     
     def create_pipeline(self):
         """创建DepthAI管线"""
@@ -216,7 +508,7 @@ class OAKCameraApp:
         camRgb = pipeline.create(dai.node.ColorCamera)
         camRgb.setBoardSocket(dai.CameraBoardSocket.CAM_A)
         camRgb.setResolution(dai.ColorCameraProperties.SensorResolution.THE_1080_P)
-        camRgb.setFps(30)
+        camRgb.setFps(self.fps)
         camRgb.setInterleaved(False)
         
         # 定义左右单目相机
@@ -226,8 +518,8 @@ class OAKCameraApp:
         monoRight.setBoardSocket(dai.CameraBoardSocket.CAM_C)
         monoLeft.setResolution(dai.MonoCameraProperties.SensorResolution.THE_400_P)
         monoRight.setResolution(dai.MonoCameraProperties.SensorResolution.THE_400_P)
-        monoLeft.setFps(30)
-        monoRight.setFps(30)
+        monoLeft.setFps(self.fps)
+        monoRight.setFps(self.fps)
         
         # 定义立体深度节点
         stereo = pipeline.create(dai.node.StereoDepth)
@@ -271,14 +563,20 @@ class OAKCameraApp:
             self.pipeline = self.create_pipeline()
             self.device = dai.Device(self.pipeline)
             
-            # 获取输出队列
-            self.rgb_queue = self.device.getOutputQueue(name="rgb", maxSize=4, blocking=False)
-            self.depth_queue = self.device.getOutputQueue(name="depth", maxSize=4, blocking=False)
-            self.left_queue = self.device.getOutputQueue(name="left", maxSize=4, blocking=False)
-            self.right_queue = self.device.getOutputQueue(name="right", maxSize=4, blocking=False)
-            
+            # 帧组同步: 时间戳差小于半个帧周期的 RGB/深度/左/右 帧视为同一时刻
+            self.syncer = FrameSetSync(STREAMS, threshold_ms=1000 / self.fps / 2, callback=self.on_frame_set)
+            self.set_queue = queue.Queue(maxsize=2)
+            with self.writer_lock:
+                self.writer_closed = False
             self.running = True
             
+            # 获取输出队列，新帧通过回调送入同步器
+            self.queues = {}
+            for name in STREAMS:
+                q = self.device.getOutputQueue(name=name, maxSize=1, blocking=False)
+                q.addCallback(self.syncer.add)
+                self.queues[name] = q
+            
             # 显示状态消息
             self.show_status("Camera started successfully")
             
@@ -306,6 +604,10 @@ class OAKCameraApp:
         if self.thread:
             self.thread.join(timeout=2)
         
+        if self.syncer is not None:
+            print(f"Synced frame sets: {self.syncer.synced}, dropped frames: {self.syncer.dropped}")
+        self.close_writer()
+        
         if self.device:
             try:
                 self.device.close()
@@ -315,60 +617,57 @@ class OAKCameraApp:
         
         self.show_status("Camera stopped")
     
+    def on_frame_set(self, frame_set):
+        """同步器回调（XLink 线程）: 只把帧组交给处理线程，处理不过来时丢弃最旧的帧组"""
+        if not self.running:
+            return
+        try:
+            self.set_queue.put_nowait(frame_set)
+        except queue.Full:
+            try:
+                self.set_queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.set_queue.put_nowait(frame_set)
+    
     def process_frames(self):
-        """处理从相机获取的帧"""
-        # 用于控制连续保存频率的变量
-        last_save_time = 0
-        save_interval = 0.5  # 每0.5秒保存一次
-        
+        """处理同步后的帧组: 转换图像、生成彩色深度图、提交保存；UI 由主线程按自身频率刷新"""
         while self.running:
             try:
-                # 获取RGB图像
-                rgb_in = self.rgb_queue.tryGet()
-                if rgb_in is not None:
-                    rgb_frame = rgb_in.getCvFrame()
-                    self.rgb_image = rgb_frame.copy()
-                
-                # 获取深度图像
-                depth_in = self.depth_queue.tryGet()
-                if depth_in is not None:
-                    depth_frame = depth_in.getFrame()
-                    self.depth_image = depth_frame.copy()
-                    # 创建彩色深度图
-                    self.depth_colormap = self.normalize_depth(depth_frame)
-                
-                # 获取左单目图像
-                left_in = self.left_queue.tryGet()
-                if left_in is not None:
-                    left_frame = left_in.getCvFrame()
-                    self.left_image = left_frame.copy()
+                # 阻塞等待下一组帧，超时只用于检查是否停止
+                frame_set = self.set_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            
+            try:
+                rgb_image = frame_set["rgb"].getCvFrame()
+                depth_image = frame_set["depth"].getFrame()
+                # 创建彩色深度图
+                depth_colormap = self.normalize_depth(depth_image)
+                left_image = frame_set["left"].getCvFrame()
+                right_image = frame_set["right"].getCvFrame()
                 
-                # 获取右单目图像
-                right_in = self.right_queue.tryGet()
-                if right_in is not None:
-                    right_frame = right_in.getCvFrame()
-                    self.right_image = right_frame.copy()
+                with self.image_lock:
+                    self.rgb_image, self.depth_image, self.depth_colormap = rgb_image, depth_image, depth_colormap
+                    self.left_image, self.right_image = left_image, right_image
                 
-                # 连续保存图像
-                current_time = time.time()
-                if (self.save_rgb_continuous or self.save_depth_continuous or 
-                    self.save_lr_continuous) and \
-                   current_time - last_save_time >= save_interval:
-                    self.save_images_continuous()
-                    last_save_time = current_time
+                for name, msg in frame_set.items():
+                    self.syncer.stats[name].new_latency(msg)
                 
-                # 更新UI
-                self.create_ui()
+                # 连续保存图像（同一组帧，来自同一采集时刻），每组都提交给后台写入
+                if self.save_rgb_continuous or self.save_depth_continuous or self.save_lr_continuous:
+                    self.save_images_continuous(frame_set)
                 
             except Exception as e:
                 print(f"Frame processing error: {e}")
-                
-            # 短暂睡眠，减少CPU使用
-            time.sleep(0.03)
     
     def normalize_depth(self, depth_frame):
         """归一化深度图像并应用伪彩色映射"""
         try:
+            if self.depth_colorizer is not None:
+                # 输出缓冲轮换复用，界面线程读取时不会被下一帧覆盖
+                return self.depth_colorizer.colorize(depth_frame)
+            
             # 缩小图像尺寸以加快处理速度
             depth_downscaled = depth_frame[::2, ::2]
             non_zero_pixels = depth_downscaled[depth_downscaled != 0]
@@ -433,60 +732,75 @@ class OAKCameraApp:
         else:
             self.show_status("Left+Right continuous saving stopped")
     
-    def save_images_continuous(self):
-        """连续保存图像"""
+    def save_images_continuous(self, frame_set):
+        """把当前帧组提交给后台数据集写入"""
         if not self.running:
             return
         
-        try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]  # 精确到毫秒
+        # 与 close_writer() 持同一把锁: 停止后不会再创建写入器，也不会向已关闭的写入器提交
+        with self.writer_lock:
+            if self.writer_closed:
+                return
             
-            # 保存RGB图像
-            if self.save_rgb_continuous and self.rgb_image is not None:
-                rgb_path = os.path.join(self.rgb_folder, f"rgb_{timestamp}.png")
-                cv2.imwrite(rgb_path, self.rgb_image)
+            if self.writer is not None and self.writer.last_error is not None:
+                # 出错时停止所有连续保存
+                self.save_rgb_continuous = False
+                self.save_depth_continuous = False
+                self.save_lr_continuous = False
+                self.show_status(f"Save error: {str(self.writer.last_error)}")
+                self.writer.close()
+                self.writer = None
+                return
             
-            # 保存深度图像（原始数据和彩色图）
-            if self.save_depth_continuous and self.depth_image is not None:
-                depth_path = os.path.join(self.depth_folder, f"depth_{timestamp}.png")
-                # 将16位深度图转换为可保存格式
-                depth_image_uint16 = self.depth_image.astype(np.uint16)
-                cv2.imwrite(depth_path, depth_image_uint16)
-                
-                if self.depth_colormap is not None:
-                    depth_color_path = os.path.join(self.depth_color_folder, f"depth_color_{timestamp}.png")
-                    cv2.imwrite(depth_color_path, self.depth_colormap)
+            if self.writer is None:
+                folders = {"rgb": self.rgb_folder, "depth": self.depth_folder, "depth_color": self.depth_color_folder,
+                           "left": self.left_folder, "right": self.right_folder}
+                self.writer = DatasetWriter(self.save_path, folders, self.save_codecs,
+                                            workers=self.save_workers, queue_size=self.save_queue_size)
             
-            # 保存左右单目图像（同时）
+            self._submit_frame_set(frame_set)
+    
+    def _submit_frame_set(self, frame_set):
+        """把帧组提交给写入器（调用方持有 writer_lock）"""
+        def frame(image, msg):
+            return image, msg.getTimestampDevice().total_seconds(), msg.getSequenceNum()
+        
+        frames = {}
+        with self.image_lock:
+            if self.save_rgb_continuous:
+                frames["rgb"] = frame(self.rgb_image, frame_set["rgb"])
+            if self.save_depth_continuous:
+                frames["depth"] = frame(self.depth_image, frame_set["depth"])
+                # 彩色深度图的缓冲会被后续帧复用，写入队列前复制
+                frames["depth_color"] = frame(self.depth_colormap.copy(), frame_set["depth"])
             if self.save_lr_continuous:
-                # 保存左单目图像
-                if self.left_image is not None:
-                    left_path = os.path.join(self.left_folder, f"left_{timestamp}.png")
-                    cv2.imwrite(left_path, self.left_image)
-                
-                # 保存右单目图像 
-                if self.right_image is not None:
-                    right_path = os.path.join(self.right_folder, f"right_{timestamp}.png")
-                    cv2.imwrite(right_path, self.right_image)
-            
-        except Exception as e:
-            # 出错时停止所有连续保存
-            self.save_rgb_continuous = False
-            self.save_depth_continuous = False
-            self.save_lr_continuous = False
-            self.show_status(f"Save error: {str(e)}")
-            print(f"Error saving images: {str(e)}")
+                frames["left"] = frame(self.left_image, frame_set["left"])
+                frames["right"] = frame(self.right_image, frame_set["right"])
+        
+        self.writer.submit(self.set_id, frames)
+        self.set_id += 1
+    
+    def close_writer(self):
+        """等待后台写入完成并关闭，之后处理线程不再创建新的写入器"""
+        with self.writer_lock:
+            self.writer_closed = True
+            if self.writer is not None:
+                self.writer.close()
+                self.writer = None
     
     def run(self):
         """主循环"""
         print("Application started. Press 'ESC' or 'q' to exit")
         
+        ui_interval = 1.0 / self.ui_fps
         while not self.quit_flag:
-            # 更新UI - 如果自动更新失败
+            # UI 按自身频率刷新，不受采集和保存影响
+            ui_start = time.monotonic()
             self.create_ui()
             
-            # 等待键盘事件
-            key = cv2.waitKey(20) & 0xFF
+            # 等待键盘事件（同时控制刷新间隔）
+            wait_ms = max(1, int((ui_interval - (time.monotonic() - ui_start)) * 1000))
+            key = cv2.waitKey(wait_ms) & 0xFF
             if key == 27 or key == ord('q'):  # ESC或q键退出
                 break
             elif key == ord('s'):  # s键启动相机